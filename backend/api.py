@@ -1,34 +1,90 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import logging
 import os
 from dotenv import load_dotenv
 import uuid
+import json
+import threading
 from contextlib import asynccontextmanager
+from dataclasses import asdict
+
+from library.config import MicroBatchConfig, TranslationConfig
+from library.subtitle_processor import (
+    MultiTargetSubtitleProcessor,
+    SubtitleProcessor,
+)
+from library.model_cache import ModelCache
+from library.model_handler import ModelHandler
+from library.micro_batcher import MicroBatcherPool
+from library.replica_pool import ReplicaPool
+from library.job_queue import Job, JobQueue, QueueFullError
+from library.log_utils import configure_logging
+from library.metrics import (
+    JOB_PEAK_RSS_BYTES,
+    JOBS,
+    MODEL_LOAD_SECONDS,
+    JobRssSampler,
+    MetricsMiddleware,
+    register_service_collector,
+    set_request_model,
+)
+from library.tracing import profile_job, span
+from library.translation_memory import TranslationMemory
+from library.warmup import Readiness, parse_preload_models, warm_up
+from library.translator_registry import (
+    MULTI_TARGET_MODELS,
+    TRANSLATOR_CLASSES,
+    AIModel,
+    Backend,
+    check_backend,
+    create_translator,
+    import_seconds,
+    model_precision,
+    resolve_model_name,
+)
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.concurrency import run_in_threadpool
 
-from library.config import TranslationConfig
-from library.opus_translator import OpusTranslator
-from library.M2M100_translator import M2M100Translator
-from library.nllb_translator import NLLBTranslator
-from library.madlad_translator import MadladTranslator
-from library.hf_seamless_m4t import SeamlessTranslator
-from library.faseeh_translator import FaseehTranslator
-from library.subtitle_processor import SubtitleProcessor
 
-from enum import Enum
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create necessary directories on startup
+    os.makedirs("uploads", exist_ok=True)
+    os.makedirs("downloads", exist_ok=True)
+    job_queue.start()
+    # Jobs interrupted by a restart resume from their checkpoint journals
+    job_queue.recover()
+    # Preload in the background so the server answers /ready while it warms up
+    threading.Thread(target=preload_models, name="preload", daemon=True).start()
+    yield
+    job_queue.stop()
+    for pool in replica_pools.values():
+        pool.close()
+
 
 # Initialize FastAPI app with metadata
 app = FastAPI(
     title="Subtitle Translation API",
     description="API for translating subtitles and text",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Load environment variables
 load_dotenv()
+# LOG_LEVEL and LOG_FORMAT (text or json) control the log output
+configure_logging()
+logger = logging.getLogger(__name__)
 # Get origins from .env and split into list
 origins = os.getenv("CORS_ORIGINS", "").split(",")
 
@@ -49,26 +105,19 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 # Pydantic models
 
 
-class AIModel(str, Enum):
-    OPUS = "opus"
-    M2M100 = "m2m100"
-    NLLB = "nllb"
-    MADLAD = "madlad"
-    SEAMLESS = "seamless"
-    DARIJA = "darija"
-    FASEEH = "faseeh"
-
-
 class TranslationRequest(BaseModel):
     text: str
     source_lang: str
     target_lang: str
     model: AIModel
+    # Defaults to MODEL_BACKEND_<MODEL>, or transformers
+    backend: Optional[Backend] = None
 
 
 class BatchTranslationRequest(BaseModel):
@@ -76,6 +125,7 @@ class BatchTranslationRequest(BaseModel):
     source_lang: str
     target_lang: str
     model: AIModel
+    backend: Optional[Backend] = None
 
 
 class TranslationResponse(BaseModel):
@@ -91,82 +141,247 @@ class SubtitleTranslationRequest(BaseModel):
     source_lang: str
     target_lang: str
     model: AIModel
-    batch_size: Optional[int] = 15
+    backend: Optional[Backend] = None
+    # Upper bound on cues per batch; batches are sized by TranslationConfig.max_batch_tokens
+    batch_size: Optional[int] = 64
+    # Save a torch.profiler trace of the job to JOB_PROFILE_DIR
+    profile: bool = False
+
+
+class MultiTargetSubtitleTranslationRequest(BaseModel):
+    unique_filename: str
+    source_lang: str
+    target_langs: List[str]
+    model: AIModel
+    backend: Optional[Backend] = None
+    batch_size: Optional[int] = 64
+    profile: bool = False
 
 
-# Global variables
-translator: Optional[OpusTranslator] = None
+# Memory budget for loaded models, in megabytes
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "8192"))
 
+model_cache = ModelCache(max_bytes=int(MODEL_CACHE_MAX_MB * 1024 * 1024))
 
-# def get_translator(source_lang: str, target_lang: str):
-#     global translator
-#     # You might want to adjust the model selection logic based on language pairs
-#     model_name = f"facebook/mbart-large-50-many-to-many-mmt"
-#     model_name = f"Helsinki-NLP/opus-mt-mul-en"
-#     model_name = f"facebook/m2m100_1.2B"
-#     model_name = f"marefa-nlp/marefa-mt-en-ar"
-#     model_name = f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}"
-#     model_name = f"facebook/nllb-200-distilled-600M"
-#     model_name = f"Helsinki-NLP/opus-mt-tc-big-{source_lang}-{target_lang}"
+# Micro-batching window and token budget per model, overridable with
+# MICRO_BATCH_WAIT_MS_<MODEL> and MICRO_BATCH_MAX_TOKENS_<MODEL>
+MICRO_BATCH_CONFIGS = {
+    # MADLAD 3B is slow per call, so waiting a little longer for company pays off
+    AIModel.MADLAD: MicroBatchConfig(max_wait_ms=25.0, max_batch_tokens=2048),
+    AIModel.SEAMLESS: MicroBatchConfig(max_wait_ms=20.0, max_batch_tokens=768),
+    AIModel.MADLAD_GGUF: MicroBatchConfig(max_wait_ms=25.0, max_batch_tokens=2048),
+}
 
-#     if translator is None or translator.model_name != model_name:
-#         config = TranslationConfig()
+micro_batchers = MicroBatcherPool()
 
-#         """translator = M2M100Translator(
-#             model_name=model_name, src_lang="en", tgt_lang="fr", config=config
-#         )
-#         translator.load_model()"""
+# Remembered translations, shared by subtitle jobs and the text endpoints.
+# Set TRANSLATION_MEMORY_PATH to an empty value to disable it.
+TRANSLATION_MEMORY_PATH = os.getenv(
+    "TRANSLATION_MEMORY_PATH", "cache/translation_memory.sqlite3"
+)
+translation_memory = (
+    TranslationMemory(
+        TRANSLATION_MEMORY_PATH,
+        max_entries=int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "500000")),
+    )
+    if TRANSLATION_MEMORY_PATH
+    else None
+)
 
-#         translator = OpusTranslator(model_name, config)
-#         # translator = NLLBTranslator(model_name, config)
-#         translator.load_model()
-#     return translator
 
+def get_micro_batch_config(model: AIModel) -> MicroBatchConfig:
+    default = MICRO_BATCH_CONFIGS.get(model, MicroBatchConfig())
+    suffix = model.value.upper()
+    return MicroBatchConfig(
+        max_wait_ms=float(
+            os.getenv(f"MICRO_BATCH_WAIT_MS_{suffix}", default.max_wait_ms)
+        ),
+        max_batch_tokens=int(
+            os.getenv(f"MICRO_BATCH_MAX_TOKENS_{suffix}", default.max_batch_tokens)
+        ),
+        max_batch_size=int(
+            os.getenv(f"MICRO_BATCH_MAX_SIZE_{suffix}", default.max_batch_size)
+        ),
+    )
 
-def get_translator(source_lang: str, target_lang: str, model: AIModel):
-    global translator
-    config = TranslationConfig()
 
-    if model == AIModel.OPUS:
-        model_name = f"Helsinki-NLP/opus-mt-tc-big-{source_lang}-{target_lang}"
-        translator = OpusTranslator(model_name, config)
-    elif model == AIModel.M2M100:
-        model_name = "facebook/m2m100_418M"
-        translator = M2M100Translator(
-            model_name, src_lang=source_lang, tgt_lang=target_lang, config=config
-        )
-    elif model == AIModel.NLLB:
-        model_name = "facebook/nllb-200-distilled-600M"
-        translator = NLLBTranslator(model_name, config)
-    elif model == AIModel.MADLAD:
-        # model_name = "google/madlad400-3b-mt"
-        model_name = "santhosh/madlad400-3b-ct2"
-        translator = MadladTranslator(model_name, config)
-
-    elif model == AIModel.SEAMLESS:
-        # model_name = "facebook/hf-seamless-m4t-large"
-        model_name = "facebook/hf-seamless-m4t-medium"
-        translator = SeamlessTranslator(model_name, config)
-
-    elif model == AIModel.DARIJA:
-        # model_name = f"lachkarsalim/Helsinki-translation-English_Moroccan-Arabic"
-        model_name = "Trabis/Helsinki-NLPopus-mt-tc-big-en-moroccain_dialect"
-        translator = OpusTranslator(model_name, config)
-    elif model == AIModel.FASEEH:
-        model_name = "Abdulmohsena/Faseeh"
-        translator = FaseehTranslator(model_name, config)
-
-    translator.load_model()
-    return translator
+# Weight precision of the loaded models: auto, fp32, bf16, fp16 or int8. auto
+# keeps fp32 on CPU; int8 is faster there but changes translations, so it is opt-in
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "auto")
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Create necessary directories on startup
-    os.makedirs("uploads", exist_ok=True)
-    os.makedirs("downloads", exist_ok=True)
-    yield
-    # Cleanup can be added here if needed
+# llama.cpp contexts decoding a batch of a GGUF model concurrently. On CPU they
+# share the weights and split the cores; on GPU each holds its own copy of the
+# weights. Default: 1 on GPU, CPU cores / LLAMA_CPP_THREADS_PER_SLOT on CPU.
+LLAMA_CPP_PARALLEL_SLOTS = int(os.getenv("LLAMA_CPP_PARALLEL_SLOTS", "0"))
+LLAMA_CPP_THREADS_PER_SLOT = int(os.getenv("LLAMA_CPP_THREADS_PER_SLOT", "4"))
+
+
+def get_llama_cpp_parallel_slots() -> int:
+    if LLAMA_CPP_PARALLEL_SLOTS:
+        return LLAMA_CPP_PARALLEL_SLOTS
+    if ModelHandler.get_device().type == "cuda":
+        return 1
+    return max((os.cpu_count() or 1) // max(LLAMA_CPP_THREADS_PER_SLOT, 1), 1)
+
+
+def get_translation_config(
+    backend: Backend = Backend.TRANSFORMERS,
+) -> TranslationConfig:
+    return TranslationConfig(
+        precision=MODEL_PRECISION,
+        backend=backend.value,
+        parallel_slots=get_llama_cpp_parallel_slots(),
+    )
+
+
+def read_default_backends() -> Dict[AIModel, Backend]:
+    """
+    MODEL_BACKEND_<MODEL> of every model, read once at startup so a misconfigured
+    backend stops the server instead of failing its requests.
+    """
+    backends = {}
+    for model in AIModel:
+        variable = f"MODEL_BACKEND_{model.value.upper()}"
+        value = os.getenv(variable, Backend.TRANSFORMERS.value)
+        try:
+            backend = Backend(value)
+        except ValueError:
+            choices = ", ".join(b.value for b in Backend)
+            raise ValueError(f"Invalid {variable}={value!r}; choose from {choices}")
+        try:
+            check_backend(model, backend)
+        except ValueError as e:
+            raise ValueError(f"Invalid {variable}={value!r}: {e}") from e
+        backends[model] = backend
+    return backends
+
+
+DEFAULT_BACKENDS = read_default_backends()
+
+
+def get_backend(model: AIModel, requested: Optional[Backend] = None) -> Backend:
+    """The requested backend, else MODEL_BACKEND_<MODEL>, else transformers."""
+    backend = requested or DEFAULT_BACKENDS[model]
+    try:
+        check_backend(model, backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return backend
+
+
+def get_translator(
+    source_lang: str,
+    target_lang: str,
+    model: AIModel,
+    backend: Backend = Backend.TRANSFORMERS,
+):
+    config = get_translation_config(backend)
+    model_name = resolve_model_name(source_lang, target_lang, model)
+    device = ModelHandler.get_device()
+    key = (
+        model.value,
+        backend.value,
+        model_name,
+        str(device),
+        model_precision(model, config, device),
+    )
+
+    def load():
+        with MODEL_LOAD_SECONDS.labels(model.value, backend.value).time():
+            return create_translator(model, model_name, config)
+
+    return model_cache.get_or_load(key, load)
+
+
+# On CPU, subtitle jobs can shard a file across SHARD_REPLICAS model replicas,
+# each in its own process with SHARD_THREADS_PER_REPLICA torch threads
+# (default: CPU cores / replicas). 1 keeps jobs in the API process.
+SHARD_REPLICAS = int(os.getenv("SHARD_REPLICAS", "1"))
+SHARD_THREADS_PER_REPLICA = int(os.getenv("SHARD_THREADS_PER_REPLICA", "0")) or None
+
+replica_pools = {}
+replica_pools_lock = threading.Lock()
+
+
+def get_replica_pool(
+    source_lang: str,
+    target_lang: str,
+    model: AIModel,
+    backend: Backend = Backend.TRANSFORMERS,
+) -> Optional[ReplicaPool]:
+    if SHARD_REPLICAS <= 1 or ModelHandler.get_device().type != "cpu":
+        return None
+    model_name = resolve_model_name(source_lang, target_lang, model)
+    key = (model, backend, model_name)
+    with replica_pools_lock:
+        pool = replica_pools.get(key)
+    if pool is not None:
+        return pool
+
+    # Started outside the lock, so a slow or failing start does not hold up
+    # jobs of other models, and only published once its replicas have loaded
+    pool = ReplicaPool(
+        model,
+        model_name,
+        get_translation_config(backend),
+        replicas=SHARD_REPLICAS,
+        threads_per_replica=SHARD_THREADS_PER_REPLICA,
+    )
+    pool.start()
+    with replica_pools_lock:
+        published = replica_pools.setdefault(key, pool)
+    if published is not pool:
+        # Another job started the same replicas in the meantime
+        pool.close()
+    return published
+
+
+# Models loaded and warmed up at startup, as model[:source-target][@backend]
+# entries (e.g. "opus:en-fr,nllb@ctranslate2"; the language pair defaults to en-ar).
+# /ready only reports ready once all of them are warm.
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "")
+# Sizes of the batches run through each preloaded model
+WARMUP_BATCH_SIZES = [
+    int(size) for size in os.getenv("WARMUP_BATCH_SIZES", "1,8,32").split(",") if size
+]
+
+preload_specs = parse_preload_models(PRELOAD_MODELS)
+readiness = Readiness([spec.label for spec in preload_specs])
+
+
+def preload_models() -> None:
+    for spec in preload_specs:
+        try:
+            model = AIModel(spec.model)
+            backend = get_backend(
+                model, Backend(spec.backend) if spec.backend else None
+            )
+            readiness.update(spec.label, "loading")
+            translator = get_translator(
+                spec.source_lang, spec.target_lang, model, backend
+            )
+            readiness.update(spec.label, "warming")
+            warmup_seconds = warm_up(
+                translator, spec.source_lang, spec.target_lang, WARMUP_BATCH_SIZES
+            )
+            # Subtitle jobs on CPU go to the replicas, which load their own copies
+            pool = get_replica_pool(spec.source_lang, spec.target_lang, model, backend)
+            if pool is not None:
+                warmup_seconds += warm_up(
+                    pool,
+                    spec.source_lang,
+                    spec.target_lang,
+                    [max(WARMUP_BATCH_SIZES, default=1) * pool.replicas],
+                )
+            readiness.update(
+                spec.label, "ready", warmup_seconds=round(warmup_seconds, 3)
+            )
+            logger.info("Preloaded %s in %.1fs warmup", spec.label, warmup_seconds)
+        except Exception as e:
+            logger.exception("Could not preload %s", spec.label)
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            readiness.update(spec.label, "failed", error=detail)
 
 
 @app.get("/")
@@ -174,6 +389,13 @@ async def root():
     return {"message": "Subtitle Translation API is running"}
 
 
+@app.get("/ready")
+async def ready():
+    """200 once every model in PRELOAD_MODELS is loaded and warm, 503 until then."""
+    status = readiness.to_dict()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
 @app.post("/upload-subtitle")
 async def upload_subtitle(file: UploadFile = File(...)):
     try:
@@ -195,10 +417,10 @@ async def upload_subtitle(file: UploadFile = File(...)):
 
 
 @app.post("/translate-subtitle")
-async def translate_subtitle(
-    request: SubtitleTranslationRequest, background_tasks: BackgroundTasks
-):
+async def translate_subtitle(request: SubtitleTranslationRequest):
+    set_request_model(request.model.value)
     try:
+        backend = get_backend(request.model, request.backend)
         input_path = f"uploads/{request.unique_filename}"
         if not os.path.exists(input_path):
             raise HTTPException(
@@ -208,51 +430,318 @@ async def translate_subtitle(
         output_filename = f"{uuid.uuid4()}.srt"
         output_path = f"downloads/{output_filename}"
 
-        # Add the translation process to background tasks
-        background_tasks.add_task(
-            process_translation,
-            request.source_lang,
-            request.target_lang,
-            input_path,
-            output_path,
-            request.batch_size,
-            request.model,
+        job = job_queue.submit(
+            Job(
+                model=request.model.value,
+                params={
+                    "source_lang": request.source_lang,
+                    "target_lang": request.target_lang,
+                    "input_path": input_path,
+                    "output_path": output_path,
+                    "batch_size": request.batch_size,
+                    "backend": backend.value,
+                    "profile": request.profile,
+                },
+                result={"download_filename": output_filename},
+            )
         )
 
-        # Return a message immediately with the filename where the translated subtitle will be available
+        # Return immediately; progress is available from /jobs/{job_id}
         return {
             "message": "Subtitle translation started",
+            "job_id": job.id,
             "download_filename": output_filename,
-            "status": "Processing",
+            "status": job.state.value,
         }
 
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "30"}
+        )
     except Exception as e:
-        print(f"An error occurred: {str(e)}")
+        logger.exception("Request failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/translate-subtitle-multi")
+async def translate_subtitle_multi(request: MultiTargetSubtitleTranslationRequest):
+    """Translate one subtitle file into several target languages in a single job."""
+    set_request_model(request.model.value)
+    try:
+        if request.model not in MULTI_TARGET_MODELS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Model {request.model.value} does not support multiple target "
+                f"languages; use one of {', '.join(m.value for m in MULTI_TARGET_MODELS)}",
+            )
+        backend = get_backend(request.model, request.backend)
+        target_langs = list(dict.fromkeys(request.target_langs))
+        if not target_langs:
+            raise HTTPException(status_code=400, detail="No target languages given")
+
+        input_path = f"uploads/{request.unique_filename}"
+        if not os.path.exists(input_path):
+            raise HTTPException(
+                status_code=404, detail="Uploaded subtitle file not found"
+            )
+
+        job_prefix = uuid.uuid4()
+        output_filenames = {
+            target_lang: f"{job_prefix}.{target_lang}.srt"
+            for target_lang in target_langs
+        }
+
+        job = job_queue.submit(
+            Job(
+                model=request.model.value,
+                params={
+                    "source_lang": request.source_lang,
+                    "target_langs": target_langs,
+                    "input_path": input_path,
+                    "output_paths": {
+                        target_lang: f"downloads/{filename}"
+                        for target_lang, filename in output_filenames.items()
+                    },
+                    "batch_size": request.batch_size,
+                    "backend": backend.value,
+                    "profile": request.profile,
+                },
+                result={"download_filenames": output_filenames},
+            )
+        )
+
+        return {
+            "message": "Subtitle translation started",
+            "job_id": job.id,
+            "download_filenames": output_filenames,
+            "status": job.state.value,
+        }
+
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "30"}
+        )
+    except Exception as e:
+        logger.exception("Request failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 def process_translation(
-    source_lang, target_lang, input_path, output_path, batch_size, model: AIModel
+    source_lang,
+    target_lang,
+    input_path,
+    output_path,
+    batch_size,
+    model: AIModel,
+    progress_callback=None,
+    backend: Backend = Backend.TRANSFORMERS,
 ):
-    print(
-        f"process_translation, source_lang: {source_lang}, target_lang: {target_lang}, input_path: {input_path}, output_path: {output_path}, batch_size: {batch_size}, model: {model}"
+    logger.info(
+        "Translating %s from %s to %s with %s (batch size %s)",
+        input_path,
+        source_lang,
+        target_lang,
+        model.value,
+        batch_size,
+    )
+    translator = get_replica_pool(
+        source_lang, target_lang, model, backend
+    ) or get_translator(source_lang, target_lang, model, backend)
+    processor = SubtitleProcessor(
+        translator=translator,
+        batch_size=batch_size,
+        batch_processing=True,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        progress_callback=progress_callback,
+        translation_memory=translation_memory,
+        checkpoint_dir="downloads",
     )
+
+    processor.process_file(
+        input_path=input_path,
+        output_path=output_path,
+    )
+    return processor.stats
+
+
+def process_multi_target_translation(
+    source_lang,
+    target_langs,
+    input_path,
+    output_paths,
+    batch_size,
+    model: AIModel,
+    progress_callback=None,
+    backend: Backend = Backend.TRANSFORMERS,
+):
+    logger.info(
+        "Translating %s from %s to %s with %s",
+        input_path,
+        source_lang,
+        ", ".join(target_langs),
+        model.value,
+    )
+    # The model does not depend on the target language for many-to-many models
+    translator = get_translator(source_lang, target_langs[0], model, backend)
+    processor = MultiTargetSubtitleProcessor(
+        translator=translator,
+        source_lang=source_lang,
+        target_langs=target_langs,
+        batch_size=batch_size,
+        progress_callback=progress_callback,
+        translation_memory=translation_memory,
+        checkpoint_dir="downloads",
+    )
+    processor.process_file(input_path=input_path, output_paths=output_paths)
+    return processor.stats
+
+
+# Directory for torch.profiler traces of jobs submitted with profile=true.
+# Profiling is disabled while it is empty.
+JOB_PROFILE_DIR = os.getenv("JOB_PROFILE_DIR", "")
+
+
+def run_job(job: Job) -> None:
+    rss = JobRssSampler()
     try:
-        translator = get_translator(source_lang, target_lang, model)
-        processor = SubtitleProcessor(
-            translator=translator,
-            batch_size=batch_size,
-            batch_processing=False,
-            source_lang=source_lang,
-            target_lang=target_lang,
-        )
+        with span("job", job_id=job.id, model=job.model):
+            if job.params.get("profile") and JOB_PROFILE_DIR:
+                trace_path = os.path.join(JOB_PROFILE_DIR, f"{job.id}.json")
+                with profile_job(trace_path) as profiled:
+                    run_translation_job(job, rss)
+                if profiled:
+                    job.result["profile_trace"] = trace_path
+            else:
+                if job.params.get("profile"):
+                    logger.warning(
+                        "Job %s asked to be profiled but JOB_PROFILE_DIR is not set",
+                        job.id,
+                    )
+                run_translation_job(job, rss)
+    except Exception:
+        JOBS.labels(job.model, "failed").inc()
+        raise
+    finally:
+        JOB_PEAK_RSS_BYTES.labels(job.model).observe(rss.peak_bytes)
+    JOBS.labels(job.model, "done").inc()
+
+
+def run_translation_job(job: Job, rss: JobRssSampler) -> None:
+    backend = Backend(job.params.get("backend", Backend.TRANSFORMERS.value))
+    if "target_langs" in job.params:
+
+        def report_target_progress(target_lang, done, total, cues):
+            rss.sample()
+            job.update_progress(
+                done,
+                total,
+                [{**asdict(cue), "target_lang": target_lang} for cue in cues],
+            )
 
-        processor.process_file(
-            input_path=input_path,
-            output_path=output_path,
+        stats = process_multi_target_translation(
+            job.params["source_lang"],
+            job.params["target_langs"],
+            job.params["input_path"],
+            job.params["output_paths"],
+            job.params["batch_size"],
+            AIModel(job.model),
+            progress_callback=report_target_progress,
+            backend=backend,
         )
-    except Exception as e:
-        print(f"An error occurred in the background process: {str(e)}")
+        job.result.update(stats)
+        return
+
+    def report_progress(done, total, cues):
+        rss.sample()
+        job.update_progress(done, total, [asdict(cue) for cue in cues])
+
+    stats = process_translation(
+        job.params["source_lang"],
+        job.params["target_lang"],
+        job.params["input_path"],
+        job.params["output_path"],
+        job.params["batch_size"],
+        AIModel(job.model),
+        progress_callback=report_progress,
+        backend=backend,
+    )
+    job.result.update(stats)
+
+
+def get_job_workers() -> dict:
+    """Worker threads per model, from JOB_WORKERS_<MODEL> (default JOB_WORKERS)."""
+    return {
+        model.value: int(os.getenv(f"JOB_WORKERS_{model.value.upper()}", JOB_WORKERS))
+        for model in AIModel
+    }
+
+
+JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "32"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+
+job_queue = JobQueue(
+    runner=run_job,
+    max_queued=JOB_QUEUE_MAX_SIZE,
+    workers_per_model=get_job_workers(),
+    default_workers=JOB_WORKERS,
+    spool_dir="downloads",
+)
+
+# Model memory, queue depth and active jobs are read from these on each scrape
+register_service_collector(model_cache, job_queue)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, include_cues: bool = False):
+    """Server-sent events with the job state and per-batch progress until it finishes."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for event, data in job.events():
+            if event == "heartbeat":
+                yield ": keep-alive\n\n"
+                continue
+            if event == "progress" and not include_cues:
+                data = {key: value for key, value in data.items() if key != "cues"}
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of the requests, models, jobs and generation throughput."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/model-cache")
+async def model_cache_stats():
+    return {
+        **model_cache.stats(),
+        # Time it took to import each translator module when first needed
+        "import_seconds": {
+            module: round(seconds, 3) for module, seconds in import_seconds.items()
+        },
+    }
 
 
 @app.get("/download-subtitle/{filename}")
@@ -266,37 +755,189 @@ async def download_subtitle(filename: str):
     return FileResponse(file_path, media_type="application/x-subrip", filename=filename)
 
 
+async def remembered_translate(
+    translator,
+    texts: List[str],
+    source_lang: str,
+    target_lang: str,
+    translate_misses: Callable[[List[str]], Awaitable[List[str]]],
+) -> List[str]:
+    """Serve texts from the translation memory and translate only the misses."""
+    settings = (
+        TranslationMemory.translator_settings(translator)
+        if translation_memory is not None
+        else None
+    )
+    if settings is None:
+        return await translate_misses(texts)
+
+    remembered = await run_in_threadpool(
+        translation_memory.get_many,
+        translator.model_name,
+        settings,
+        source_lang,
+        target_lang,
+        texts,
+    )
+    misses = [text for text, known in zip(texts, remembered) if known is None]
+    if not misses:
+        return remembered
+
+    translations = await translate_misses(misses)
+    await run_in_threadpool(
+        translation_memory.put_many,
+        translator.model_name,
+        settings,
+        source_lang,
+        target_lang,
+        misses,
+        translations,
+    )
+    translated = iter(translations)
+    return [known if known is not None else next(translated) for known in remembered]
+
+
+def get_micro_batcher(
+    source_lang: str,
+    target_lang: str,
+    model: AIModel,
+    backend: Backend = Backend.TRANSFORMERS,
+):
+    return micro_batchers.get(
+        (model, backend, source_lang, target_lang),
+        source_lang,
+        target_lang,
+        get_micro_batch_config(model),
+    )
+
+
 @app.post("/translate", response_model=TranslationResponse)
 async def translate_text(request: TranslationRequest):
+    set_request_model(request.model.value)
+    backend = get_backend(request.model, request.backend)
     try:
-        translator = get_translator(
-            request.source_lang, request.target_lang, request.model
-        )
-        translated_text = translator.translate(
-            request.text.lower(), request.source_lang, request.target_lang
+        text = request.text.lower()
+        translator = await run_in_threadpool(
+            get_translator,
+            request.source_lang,
+            request.target_lang,
+            request.model,
+            backend,
         )
-        if isinstance(translated_text, list):
-            translated_text = translated_text[0] if translated_text else ""
+
+        # Texts the model cannot take whole, or too long to share a batch, are
+        # chunked by translate() itself and bypass the batcher, whose encode
+        # step would truncate them
+        if translator.count_tokens(text) > min(
+            translator.max_input_tokens(),
+            get_micro_batch_config(request.model).max_batch_tokens,
+        ):
+
+            async def translate_misses(texts: List[str]) -> List[str]:
+                translation = await run_in_threadpool(
+                    translator.translate,
+                    texts[0],
+                    request.source_lang,
+                    request.target_lang,
+                )
+                if isinstance(translation, list):
+                    translation = translation[0] if translation else ""
+                return [translation]
+
+        else:
+            batcher = get_micro_batcher(
+                request.source_lang, request.target_lang, request.model, backend
+            )
+
+            async def translate_misses(texts: List[str]) -> List[str]:
+                return await batcher.translate(translator, texts)
+
+        translated_text = (
+            await remembered_translate(
+                translator,
+                [text],
+                request.source_lang,
+                request.target_lang,
+                translate_misses,
+            )
+        )[0]
         return TranslationResponse(translated_text=translated_text)
     except Exception as e:
-        print(f"An error occurred: {str(e)}")
+        logger.exception("Request failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/batch-translate", response_model=BatchTranslationResponse)
 async def batch_translate_texts(request: BatchTranslationRequest):
+    set_request_model(request.model.value)
+    backend = get_backend(request.model, request.backend)
     try:
-        translator = get_translator(
-            request.source_lang, request.target_lang, request.model
+        translator = await run_in_threadpool(
+            get_translator,
+            request.source_lang,
+            request.target_lang,
+            request.model,
+            backend,
         )
-        translated_texts = translator.batch_translate(
-            request.texts, request.source_lang, request.target_lang
+        batcher = get_micro_batcher(
+            request.source_lang, request.target_lang, request.model, backend
+        )
+
+        async def translate_misses(texts: List[str]) -> List[str]:
+            return await batcher.translate(translator, texts)
+
+        translated_texts = await remembered_translate(
+            translator,
+            request.texts,
+            request.source_lang,
+            request.target_lang,
+            translate_misses,
         )
         return BatchTranslationResponse(translated_texts=translated_texts)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def current_memory_settings() -> List[str]:
+    """Translation memory settings of every model on every backend it supports."""
+    device = ModelHandler.get_device()
+    settings = set()
+    for backend, models in TRANSLATOR_CLASSES.items():
+        config = get_translation_config(backend)
+        for model in models:
+            settings.add(
+                TranslationMemory.settings_fingerprint(
+                    config, model_precision(model, config, device)
+                )
+            )
+    return sorted(settings)
+
+
+@app.get("/translation-memory")
+async def translation_memory_stats():
+    if translation_memory is None:
+        return {"enabled": False}
+    return {"enabled": True, **translation_memory.stats()}
+
+
+@app.delete("/translation-memory")
+async def invalidate_translation_memory(
+    model_name: Optional[str] = None, stale_only: bool = False
+):
+    """
+    Drop remembered translations, for one model_name or all of them. With
+    stale_only=true only entries made with settings no model and backend is
+    configured with any more are dropped.
+    """
+    if translation_memory is None:
+        raise HTTPException(status_code=404, detail="Translation memory is disabled")
+    keep_settings = current_memory_settings() if stale_only else None
+    deleted = await run_in_threadpool(
+        translation_memory.invalidate, model_name, keep_settings
+    )
+    return {"deleted": deleted}
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "api:app",
@@ -0,0 +1,184 @@
+# benchmark.py
+"""
+Offline throughput, latency and memory benchmark of the translators:
+
+    python benchmark.py --models opus,nllb --backends transformers,ctranslate2 \
+        --batch-sizes 8,32 --num-beams 1,4 --srt episode.srt
+
+    MADLAD_GGUF_MODEL=<repo> python benchmark.py --models madlad,madlad_gguf \
+        --num-beams 1 --parallel-slots 4
+
+Only models already in models/ are used and the Hugging Face hub is never
+contacted. --tiny swaps each model for a randomly initialized one of the same
+architecture, to measure pipeline overhead quickly. Results are saved as JSON
+so runs can be diffed across commits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+# Must be set before transformers or huggingface_hub are imported
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+from library.benchmark import (
+    BenchmarkCase,
+    run_benchmarks,
+    srt_corpus,
+    synthetic_corpus,
+)
+from library.log_utils import configure_logging
+from library.model_handler import ModelHandler
+from library.translator_registry import (
+    BACKEND_MODELS,
+    AIModel,
+    Backend,
+    resolve_model_name,
+)
+
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def is_downloaded(model: AIModel, source_lang: str, target_lang: str) -> bool:
+    try:
+        model_name = resolve_model_name(source_lang, target_lang, model)
+    except ValueError:
+        # A model whose repository is configured through the environment
+        return False
+    return ModelHandler.find_local_model(model_name) is not None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the translators offline")
+    parser.add_argument(
+        "--models",
+        type=parse_list,
+        help="Comma separated models (default: every model in models/)",
+    )
+    parser.add_argument(
+        "--backends", type=parse_list, default=[Backend.TRANSFORMERS.value]
+    )
+    parser.add_argument("--batch-sizes", type=parse_list, default=["8", "32"])
+    parser.add_argument("--num-beams", type=parse_list, default=["1", "4"])
+    parser.add_argument(
+        "--srt", action="append", default=[], help="Sample .srt corpus (repeatable)"
+    )
+    parser.add_argument(
+        "--synthetic-cues",
+        type=int,
+        default=300,
+        help="Cues in the synthetic corpus (0 to skip it)",
+    )
+    parser.add_argument("--source-lang", default="en")
+    parser.add_argument("--target-lang", default="ar")
+    parser.add_argument("--precision", default="auto")
+    parser.add_argument(
+        "--parallel-slots",
+        type=int,
+        default=1,
+        help="Concurrent llama.cpp contexts of GGUF models",
+    )
+    parser.add_argument(
+        "--tiny",
+        action="store_true",
+        help="Use tiny randomly initialized models of the same architecture",
+    )
+    parser.add_argument(
+        "--max-new-tokens",
+        type=int,
+        help="Cap generated tokens (random tiny models never stop on their own)",
+    )
+    parser.add_argument(
+        "--output",
+        help="JSON results path (default: benchmarks/benchmark-<timestamp>.json)",
+    )
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    models = [AIModel(model) for model in args.models] if args.models else list(AIModel)
+    backends = [Backend(backend) for backend in args.backends]
+    pairs = []
+    for model in models:
+        if not is_downloaded(model, args.source_lang, args.target_lang):
+            print(f"Skipping {model.value}: not in models/")
+            continue
+        for backend in backends:
+            if backend == Backend.TRANSFORMERS or model in BACKEND_MODELS[backend]:
+                pairs.append((model.value, backend.value))
+    if not pairs:
+        print("Nothing to benchmark")
+        return 1
+
+    corpora = {}
+    if args.synthetic_cues:
+        corpora["synthetic"] = synthetic_corpus(args.synthetic_cues)
+    for path in args.srt:
+        corpora[os.path.basename(path)] = srt_corpus(path)
+    cases = [
+        BenchmarkCase(batch_size=int(batch_size), num_beams=int(num_beams))
+        for batch_size in args.batch_sizes
+        for num_beams in args.num_beams
+    ]
+
+    results = run_benchmarks(
+        pairs,
+        corpora,
+        cases,
+        args.source_lang,
+        args.target_lang,
+        tiny=args.tiny,
+        max_new_tokens=args.max_new_tokens or (32 if args.tiny else None),
+        precision=args.precision,
+        parallel_slots=args.parallel_slots,
+    )
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "source_lang": args.source_lang,
+            "target_lang": args.target_lang,
+            "precision": args.precision,
+            "parallel_slots": args.parallel_slots,
+            "tiny": args.tiny,
+            "corpora": {name: len(texts) for name, texts in corpora.items()},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        "benchmarks", f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Saved {len(results)} results to {output}")
+    return 1 if any(result["error"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
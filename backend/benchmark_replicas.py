@@ -0,0 +1,139 @@
+# benchmark_replicas.py
+"""
+Find the best split of CPU cores into model replicas x threads per replica for
+sharded subtitle translation:
+
+    python benchmark_replicas.py episode.srt --model opus --source-lang en --target-lang fr
+
+Every split uses all --cores (default: every core of the machine); pass
+--splits 1x8,2x4,4x2 to choose them explicitly. Model load time is reported
+separately and not counted in the throughput.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+from library.config import TranslationConfig
+from library.log_utils import configure_logging
+from library.replica_pool import ReplicaPool
+from library.subtitle_processor import SubtitleProcessor
+from library.translator_registry import AIModel, resolve_model_name
+
+
+def default_splits(cores: int) -> List[Tuple[int, int]]:
+    """Every (replicas, threads) pair with power-of-two replicas that uses all cores."""
+    splits = []
+    replicas = 1
+    while replicas <= cores:
+        splits.append((replicas, cores // replicas))
+        replicas *= 2
+    return splits
+
+
+def parse_splits(value: str) -> List[Tuple[int, int]]:
+    splits = []
+    for split in value.split(","):
+        replicas, threads = split.lower().split("x")
+        splits.append((int(replicas), int(threads)))
+    return splits
+
+
+def run_split(
+    input_path: str,
+    model: AIModel,
+    source_lang: str,
+    target_lang: str,
+    replicas: int,
+    threads: int,
+) -> dict:
+    model_name = resolve_model_name(source_lang, target_lang, model)
+    pool = ReplicaPool(
+        model,
+        model_name,
+        TranslationConfig(),
+        replicas=replicas,
+        threads_per_replica=threads,
+    )
+    start = time.perf_counter()
+    pool.start()
+    load_seconds = time.perf_counter() - start
+    try:
+        # No translation memory or checkpoint, so every split does the same work
+        processor = SubtitleProcessor(
+            translator=pool,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            batch_size=64,
+            batch_processing=True,
+        )
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            processor.process_file(input_path, os.path.join(output_dir, "out.srt"))
+            seconds = time.perf_counter() - start
+    finally:
+        pool.close()
+
+    cues = processor.stats.get("unique_texts", 0)
+    return {
+        "replicas": replicas,
+        "threads_per_replica": threads,
+        "load_seconds": round(load_seconds, 2),
+        "seconds": round(seconds, 2),
+        "cues_per_second": round(cues / seconds, 2) if seconds else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark replica x thread splits for sharded translation"
+    )
+    parser.add_argument("input_path", help=".srt file to translate")
+    parser.add_argument(
+        "--model", type=AIModel, choices=list(AIModel), default=AIModel.OPUS
+    )
+    parser.add_argument("--source-lang", default="en")
+    parser.add_argument("--target-lang", default="ar")
+    parser.add_argument(
+        "--cores", type=int, default=os.cpu_count() or 1, help="Cores to split"
+    )
+    parser.add_argument(
+        "--splits", type=parse_splits, help="e.g. 1x8,2x4,4x2 (replicas x threads)"
+    )
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    results = []
+    for replicas, threads in args.splits or default_splits(args.cores):
+        print(f"Benchmarking {replicas} replicas x {threads} threads...")
+        results.append(
+            run_split(
+                args.input_path,
+                args.model,
+                args.source_lang,
+                args.target_lang,
+                replicas,
+                threads,
+            )
+        )
+
+    print(f"{'replicas':>8} {'threads':>8} {'load s':>8} {'run s':>8} {'cues/s':>8}")
+    for result in results:
+        print(
+            f"{result['replicas']:>8} {result['threads_per_replica']:>8} "
+            f"{result['load_seconds']:>8} {result['seconds']:>8} "
+            f"{result['cues_per_second']:>8}"
+        )
+    best = max(results, key=lambda result: result["cues_per_second"])
+    print(
+        f"Best split: SHARD_REPLICAS={best['replicas']} "
+        f"SHARD_THREADS_PER_REPLICA={best['threads_per_replica']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,35 @@
 # base_translator.py
+import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Union
+from typing import Any, Dict, List, Union
+import torch
 from library.config import TranslationConfig
 from library.model_handler import ModelHandler
+from library.precision import load_hf_model, resolve_precision
 from transformers import PreTrainedModel, PreTrainedTokenizer
+from transformers.modeling_outputs import BaseModelOutput
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
+# Input limit for models whose tokenizer and config do not state one
+DEFAULT_MAX_INPUT_TOKENS = 512
+
 
 class BaseTranslator(ABC):
+    # Whether a text always gets the same translation. Sampled translations are
+    # not kept in the translation memory.
+    deterministic = True
+
     def __init__(self, model_name: str, config: Optional[TranslationConfig] = None):
         self.model_name = model_name
         self.config = config or TranslationConfig()
         self.model: Optional[PreTrainedModel] = None
         self.tokenizer: Optional[PreTrainedTokenizer] = None
         self.device = ModelHandler.get_device()
+        # One translator serves every language pair and thread; see _tokenize_source()
+        self._tokenizer_lock = threading.Lock()
 
     @abstractmethod
     def load_model(self) -> None:
@@ -26,5 +42,138 @@ class BaseTranslator(ABC):
         pass
 
     @abstractmethod
-    def batch_translate(self, texts: List[str]) -> List[str]:
+    def batch_translate(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[str]:
         pass
+
+    # Staged batch API used by TranslationPipeline to overlap CPU-side
+    # tokenization/detokenization with generation. The defaults do all the work
+    # in generate_batch(); translators override them to split the stages.
+
+    def encode_batch(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> Any:
+        """Tokenize a batch on the CPU."""
+        return texts
+
+    def generate_batch(
+        self, encoded: Any, source_lang: str = "en", target_lang: str = "ar"
+    ) -> Any:
+        """Run the model on the output of encode_batch()."""
+        return self.batch_translate(encoded, source_lang, target_lang)
+
+    def decode_batch(self, generated: Any) -> List[str]:
+        """Turn the output of generate_batch() into text."""
+        return generated
+
+    def count_generated_tokens(self, generated: Any) -> Optional[int]:
+        """
+        Tokens in a generate_batch() output, padding excluded, for the generated
+        tokens metric; None when the output holds text rather than token ids.
+        """
+        if not isinstance(generated, torch.Tensor):
+            return None
+        pad_token_id = getattr(self.tokenizer, "pad_token_id", None)
+        if pad_token_id is None:
+            return generated.numel()
+        return int((generated != pad_token_id).sum())
+
+    def generate_batch_multi(
+        self, encoded: Any, source_lang: str, target_langs: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Run the model for several target languages on one encode_batch() output.
+        The default generates each target separately; translators whose target
+        language is picked on the decoder side override it to share the encoder pass.
+        """
+        return {
+            target_lang: self.generate_batch(encoded, source_lang, target_lang)
+            for target_lang in target_langs
+        }
+
+    def batch_translate_multi(
+        self, texts: List[str], source_lang: str, target_langs: List[str]
+    ) -> Dict[str, List[str]]:
+        """Translate texts into every language of target_langs."""
+        encoded = self.encode_batch(texts, source_lang, target_langs[0])
+        generated = self.generate_batch_multi(encoded, source_lang, target_langs)
+        return {
+            target_lang: self.decode_batch(output)
+            for target_lang, output in generated.items()
+        }
+
+    def _generate_with_shared_encoder(
+        self,
+        model: PreTrainedModel,
+        encoded: Any,
+        forced_bos_token_ids: Dict[str, int],
+        **generate_kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Encode a batch once and decode it once per target language, forcing each
+        target's language token as the first generated token.
+        """
+        encoded = encoded.to(self.device)
+        with torch.no_grad():
+            encoder_outputs = model.get_encoder()(
+                input_ids=encoded["input_ids"],
+                attention_mask=encoded["attention_mask"],
+                return_dict=True,
+            )
+
+        generated = {}
+        for target_lang, forced_bos_token_id in forced_bos_token_ids.items():
+            # generate() expands the encoder outputs for beam search in place, so
+            # every target gets a fresh wrapper around the shared hidden states
+            generated[target_lang] = model.generate(
+                attention_mask=encoded["attention_mask"],
+                encoder_outputs=BaseModelOutput(
+                    last_hidden_state=encoder_outputs.last_hidden_state
+                ),
+                forced_bos_token_id=forced_bos_token_id,
+                **generate_kwargs,
+            ).cpu()
+        return generated
+
+    def _tokenize_source(self, source_code: str, *args, **kwargs) -> Any:
+        """
+        Call the tokenizer with its src_lang set to source_code. The setting is
+        shared by every thread using this translator, so it is set and used under
+        a lock, otherwise a concurrent request could swap the language in between.
+        """
+        with self._tokenizer_lock:
+            self.tokenizer.src_lang = source_code
+            return self.tokenizer(*args, **kwargs)
+
+    def _load_hf_model(self, model_class, model_path, **kwargs) -> PreTrainedModel:
+        """Load a transformers model on self.device at the configured precision."""
+        precision = resolve_precision(self.config.precision, self.device)
+        logger.info("Loading %s in %s on %s", self.model_name, precision, self.device)
+        return load_hf_model(
+            model_class, model_path, self.model_name, precision, self.device, **kwargs
+        )
+
+    def resolved_precision(self) -> str:
+        """
+        Precision the model actually runs in on self.device; config.precision
+        "auto" resolves differently per device and backend.
+        """
+        return resolve_precision(self.config.precision, self.device)
+
+    def count_tokens(self, text: str) -> int:
+        """Number of source tokens the model sees for text, used to size batches."""
+        if self.tokenizer is None:
+            return len(text.split())
+        return len(self.tokenizer.encode(text))
+
+    def max_input_tokens(self) -> int:
+        """Longest source, in tokens, the model translates without truncating it."""
+        limit = getattr(self.tokenizer, "model_max_length", None)
+        # Tokenizers without a configured limit report a very large sentinel
+        if isinstance(limit, int) and 0 < limit < 100_000:
+            return limit
+        config = getattr(self.model, "config", None)
+        return getattr(config, "max_position_embeddings", None) or (
+            DEFAULT_MAX_INPUT_TOKENS
+        )
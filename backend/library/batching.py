@@ -0,0 +1,64 @@
+# batching.py
+from typing import Iterable, List, Optional, Sequence
+
+
+def token_budget_batches(
+    lengths: Sequence[int],
+    max_batch_tokens: int,
+    max_batch_size: Optional[int] = None,
+    sort_window: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    Group item indices into batches of similar length.
+
+    Items are sorted longest first and a batch is closed once its padded size
+    (longest item x number of items) would exceed max_batch_tokens, so short texts
+    are never padded up to a long one and peak memory is bounded regardless of
+    the number of items. An item longer than the budget gets a batch of its own.
+    With sort_window, items are only sorted within consecutive windows of that
+    many items, so early items finish early (e.g. for incremental output).
+
+    Args:
+        lengths: Token count of each item
+        max_batch_tokens: Upper bound on padded tokens per batch
+        max_batch_size: Optional upper bound on items per batch
+        sort_window: Optional number of consecutive items sorted together
+
+    Returns:
+        Lists of indices into lengths, one list per batch
+    """
+    window = sort_window or max(len(lengths), 1)
+    batches: List[List[int]] = []
+    for window_start in range(0, len(lengths), window):
+        window_indices = range(window_start, min(window_start + window, len(lengths)))
+        batches.extend(_pack(lengths, window_indices, max_batch_tokens, max_batch_size))
+    return batches
+
+
+def _pack(
+    lengths: Sequence[int],
+    indices: Iterable[int],
+    max_batch_tokens: int,
+    max_batch_size: Optional[int],
+) -> List[List[int]]:
+    order = sorted(indices, key=lambda i: lengths[i], reverse=True)
+
+    batches: List[List[int]] = []
+    current: List[int] = []
+    longest = 0
+    for i in order:
+        length = max(lengths[i], 1)
+        padded_longest = max(longest, length)
+        if current and (
+            padded_longest * (len(current) + 1) > max_batch_tokens
+            or (max_batch_size is not None and len(current) >= max_batch_size)
+        ):
+            batches.append(current)
+            current = []
+            padded_longest = length
+        current.append(i)
+        longest = padded_longest
+
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,291 @@
+# benchmark.py
+import gc
+import logging
+import multiprocessing
+import random
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from library.batching import token_budget_batches
+from library.config import TranslationConfig
+from library.log_utils import configure_logging
+from library.resource_usage import peak_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+# Vocabulary of the synthetic corpus; cue lengths follow typical subtitle lines
+_SYNTHETIC_WORDS = (
+    "I you we they he she it this that what where when why how "
+    "is are was were be have has had do did will would can could should "
+    "not never always maybe really just still again now then here there "
+    "go come see know think want need tell say look find take give leave "
+    "time day night home house door car road city world money job friend "
+    "mother father brother sister man woman kid people police doctor "
+    "good bad right wrong sure sorry fine okay great late early long "
+    "please thanks yes no hey well so but and or because if"
+).split()
+
+# Config fields shrunk to build a tiny model with the same architecture
+_TINY_CONFIG = {
+    "d_model": 64,
+    "encoder_layers": 1,
+    "decoder_layers": 1,
+    "encoder_attention_heads": 2,
+    "decoder_attention_heads": 2,
+    "encoder_ffn_dim": 128,
+    "decoder_ffn_dim": 128,
+}
+
+# Everything but the weights is copied into a tiny model's directory
+_WEIGHT_SUFFIXES = (".bin", ".safetensors", ".h5", ".msgpack", ".ot", ".npz")
+
+
+@dataclass
+class BenchmarkCase:
+    batch_size: int
+    num_beams: int
+
+
+@dataclass
+class BenchmarkResult:
+    model: str
+    backend: str
+    model_name: str
+    corpus: str
+    batch_size: int = 0
+    num_beams: int = 0
+    cues: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    cues_per_second: float = 0.0
+    source_tokens_per_second: float = 0.0
+    output_tokens_per_second: float = 0.0
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    load_seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    error: Optional[str] = None
+
+
+def synthetic_corpus(cues: int = 500, seed: int = 0) -> List[str]:
+    """Deterministic subtitle-like lines of 2-14 words."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(cues):
+        words = rng.choices(_SYNTHETIC_WORDS, k=rng.choice((2, 3, 4, 5, 6, 8, 10, 14)))
+        texts.append(" ".join(words).capitalize() + rng.choice((".", "?", "!")))
+    return texts
+
+
+def srt_corpus(path: str) -> List[str]:
+    from library.subtitle_processor import SubtitleProcessor
+
+    return [subtitle.text for subtitle in SubtitleProcessor._extract_subtitles(path)]
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Linearly interpolated p-th percentile (0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def make_tiny_model(model_name: str) -> str:
+    """
+    Build a randomly initialized copy of a downloaded model with the same
+    architecture and tokenizer but tiny dimensions, for offline runs that measure
+    overhead rather than quality. Returns the model name to load it by.
+    """
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM
+
+    from library.model_handler import ModelHandler
+
+    source_path = ModelHandler.find_local_model(model_name)
+    repo_id, _ = ModelHandler.split_revision(model_name)
+    # Stored like any other model, so translators load it by this name
+    tiny_name = f"{repo_id}-tiny"
+    tiny_path = ModelHandler.local_model_path(tiny_name)
+    if (tiny_path / "config.json").exists():
+        return tiny_name
+    if source_path is None or not (source_path / "config.json").exists():
+        raise FileNotFoundError(
+            f"{model_name} has no local config.json to derive a tiny model from"
+        )
+
+    config = AutoConfig.from_pretrained(source_path)
+    if not all(hasattr(config, name) for name in _TINY_CONFIG):
+        raise ValueError(f"Cannot shrink a {config.model_type} model")
+    for name, value in _TINY_CONFIG.items():
+        setattr(config, name, value)
+
+    tiny_path.mkdir(parents=True, exist_ok=True)
+    for path in source_path.iterdir():
+        if path.is_file() and not path.name.endswith(_WEIGHT_SUFFIXES):
+            shutil.copy2(path, tiny_path / path.name)
+    AutoModelForSeq2SeqLM.from_config(config).save_pretrained(tiny_path)
+    return tiny_name
+
+
+def run_model_benchmarks(
+    model: str,
+    backend: str,
+    corpora: Dict[str, List[str]],
+    cases: List[BenchmarkCase],
+    source_lang: str,
+    target_lang: str,
+    tiny: bool = False,
+    max_new_tokens: Optional[int] = None,
+    precision: str = "auto",
+    parallel_slots: int = 1,
+) -> List[dict]:
+    """
+    Load one model and run every case on every corpus with it. Meant to run in
+    a fresh process so load time and peak RSS belong to this model alone.
+    """
+    from library.translator_registry import (
+        AIModel,
+        create_translator,
+        resolve_model_name,
+    )
+
+    model_name = resolve_model_name(source_lang, target_lang, AIModel(model))
+    base = dict(model=model, backend=backend, model_name=model_name)
+    try:
+        if tiny:
+            model_name = make_tiny_model(model_name)
+            base["model_name"] = model_name
+        config = TranslationConfig(
+            precision=precision, backend=backend, parallel_slots=parallel_slots
+        )
+        if max_new_tokens:
+            config.max_new_tokens = max_new_tokens
+        start = time.perf_counter()
+        translator = create_translator(AIModel(model), model_name, config)
+        load_seconds = time.perf_counter() - start
+    except Exception as e:
+        return [
+            asdict(BenchmarkResult(corpus=corpus, error=str(e), **base))
+            for corpus in corpora
+        ]
+
+    results = []
+    for corpus, texts in corpora.items():
+        lengths = [translator.count_tokens(text) for text in texts]
+        for case in cases:
+            result = BenchmarkResult(
+                corpus=corpus,
+                batch_size=case.batch_size,
+                num_beams=case.num_beams,
+                load_seconds=round(load_seconds, 3),
+                **base,
+            )
+            try:
+                _run_case(
+                    translator, texts, lengths, case, source_lang, target_lang, result
+                )
+            except Exception as e:
+                result.error = str(e)
+            result.peak_rss_mb = round(peak_rss_bytes() / 1024**2, 1)
+            results.append(asdict(result))
+            logger.info(_summary(result))
+    del translator
+    gc.collect()
+    return results
+
+
+def _run_case(
+    translator,
+    texts: List[str],
+    lengths: List[int],
+    case: BenchmarkCase,
+    source_lang: str,
+    target_lang: str,
+    result: BenchmarkResult,
+) -> None:
+    translator.config.num_beams = case.num_beams
+    # Same batch formation as SubtitleProcessor, capped at the case's batch size
+    batches = token_budget_batches(
+        lengths,
+        translator.config.max_batch_tokens,
+        max_batch_size=case.batch_size,
+        sort_window=512,
+    )
+    # Warm up kernels and allocators outside of the measurement
+    translator.batch_translate([texts[i] for i in batches[0]], source_lang, target_lang)
+
+    latencies, output_tokens = [], 0
+    start = time.perf_counter()
+    for indices in batches:
+        batch_start = time.perf_counter()
+        translations = translator.batch_translate(
+            [texts[i] for i in indices], source_lang, target_lang
+        )
+        latencies.append(time.perf_counter() - batch_start)
+        output_tokens += sum(translator.count_tokens(text) for text in translations)
+    seconds = time.perf_counter() - start
+
+    result.cues = len(texts)
+    result.batches = len(batches)
+    result.seconds = round(seconds, 3)
+    result.cues_per_second = round(len(texts) / seconds, 2)
+    result.source_tokens_per_second = round(sum(lengths) / seconds, 1)
+    result.output_tokens_per_second = round(output_tokens / seconds, 1)
+    result.latency_ms = {
+        f"p{p}": round(percentile(latencies, p) * 1000, 1) for p in (50, 95, 99)
+    }
+
+
+def _summary(result: BenchmarkResult) -> str:
+    label = (
+        f"{result.model}/{result.backend} {result.corpus} "
+        f"batch {result.batch_size} beams {result.num_beams}"
+    )
+    if result.error:
+        return f"{label}: failed: {result.error}"
+    return (
+        f"{label}: {result.cues_per_second} cues/s, "
+        f"{result.output_tokens_per_second} tokens/s, "
+        f"p50 {result.latency_ms['p50']} ms, p99 {result.latency_ms['p99']} ms"
+    )
+
+
+def run_benchmarks(
+    models: List[tuple],
+    corpora: Dict[str, List[str]],
+    cases: List[BenchmarkCase],
+    source_lang: str,
+    target_lang: str,
+    tiny: bool = False,
+    max_new_tokens: Optional[int] = None,
+    precision: str = "auto",
+    parallel_slots: int = 1,
+) -> List[dict]:
+    """Benchmark each (model, backend) pair in its own process, one after another."""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for model, backend in models:
+        logger.info("Benchmarking %s on %s", model, backend)
+        with context.Pool(1, initializer=configure_logging) as pool:
+            results.extend(
+                pool.apply(
+                    run_model_benchmarks,
+                    (
+                        model,
+                        backend,
+                        corpora,
+                        cases,
+                        source_lang,
+                        target_lang,
+                        tiny,
+                        max_new_tokens,
+                        precision,
+                        parallel_slots,
+                    ),
+                )
+            )
+    return results
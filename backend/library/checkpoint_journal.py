@@ -0,0 +1,93 @@
+# checkpoint_journal.py
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, TextIO
+
+
+class CheckpointJournal:
+    """
+    Append-only JSON-lines journal of the translations finished so far for one
+    subtitle job. Re-running the same job (same input file contents, model,
+    decoding settings and language pair) resumes from it instead of starting over.
+
+    Lines are flushed after every append and fsync'ed at most every
+    fsync_interval seconds; a torn last line after a crash is ignored on load.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 10.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self._file: Optional[TextIO] = None
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def fingerprint(
+        input_path: str,
+        model_name: str,
+        settings: str,
+        source_lang: str,
+        target_lang: str,
+    ) -> str:
+        digest = hashlib.sha256()
+        with open(input_path, "rb") as input_file:
+            for block in iter(lambda: input_file.read(1024 * 1024), b""):
+                digest.update(block)
+        for part in (model_name, settings, source_lang, target_lang):
+            digest.update(b"\x1f" + part.encode("utf-8"))
+        return digest.hexdigest()[:32]
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def load(self) -> Dict[str, str]:
+        """
+        Return the journaled translations, keyed on normalized source text. A torn
+        line left by a crash is cut off the file, so later appends start on a
+        line of their own instead of continuing the broken one.
+        """
+        translations: Dict[str, str] = {}
+        if not os.path.exists(self.path):
+            return translations
+        intact_bytes = 0
+        with open(self.path, "rb") as journal:
+            for line in journal:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash; everything before it is intact
+                    break
+                translations[entry["source"]] = entry["translation"]
+                intact_bytes += len(line)
+        if intact_bytes < os.path.getsize(self.path):
+            os.truncate(self.path, intact_bytes)
+        return translations
+
+    def append(self, texts: List[str], translations: List[str]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        for text, translation in zip(texts, translations):
+            entry = {"source": self.normalize(text), "translation": translation}
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+        now = time.monotonic()
+        if now - self._last_sync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,6 +1,5 @@
 # config.py
 from dataclasses import dataclass
-from typing import Optional
 
 
 @dataclass
@@ -10,3 +9,22 @@ class TranslationConfig:
     num_beams: int = 8
     num_return_sequences: int = 1
     length_penalty: float = 0.1
+    # Padded source tokens per batch when SubtitleProcessor forms batches
+    max_batch_tokens: int = 1024
+    # Weight precision: "auto" (fp32 on CPU, bf16/fp16 on CUDA, as saved for
+    # CTranslate2), "fp32", "bf16", "fp16" or "int8" (opt-in quantization)
+    precision: str = "auto"
+    # Execution backend: "transformers", "ctranslate2" (Opus, M2M100, NLLB) or
+    # "onnx" (Opus)
+    backend: str = "transformers"
+    # Concurrent llama.cpp contexts of GGUF models
+    parallel_slots: int = 1
+
+
+@dataclass
+class MicroBatchConfig:
+    # How long the first request of a batch waits for others to join
+    max_wait_ms: float = 10.0
+    # Upper bound on the source tokens sent to a single batch_translate() call
+    max_batch_tokens: int = 1024
+    max_batch_size: int = 32
@@ -0,0 +1,173 @@
+# ctranslate2_translator.py
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import ctranslate2
+from transformers import AutoTokenizer
+
+from library.base_translator import BaseTranslator
+from library.language_utils import LanguageUtils
+from library.model_handler import ModelHandler
+from library.precision import ct2_compute_type
+from library.segmenter import translate_long_text
+
+logger = logging.getLogger(__name__)
+
+
+class CTranslate2Translator(BaseTranslator):
+    """
+    Serves a transformers seq2seq checkpoint through CTranslate2. On first use the
+    checkpoint from ModelHandler.download_model is converted and cached next to it
+    as models/<name>-ct2; TranslationConfig.precision picks the compute type.
+
+    This base class handles Marian (Opus) models, which have no language tokens.
+    Subclasses map languages for the many-to-many models.
+    """
+
+    def __init__(self, model_name: str, config=None):
+        super().__init__(model_name, config)
+        self.translator: Optional[ctranslate2.Translator] = None
+
+    def load_model(self) -> None:
+        model_path = ModelHandler.download_model(self.model_name)
+        ct2_path = self.convert(self.model_name, model_path)
+        compute_type = ct2_compute_type(self.config.precision, self.device)
+        logger.info(
+            "Loading %s with CTranslate2 (%s on %s)",
+            ct2_path,
+            compute_type,
+            self.device,
+        )
+        self.translator = ctranslate2.Translator(
+            str(ct2_path), device=self.device.type, compute_type=compute_type
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            model_path, clean_up_tokenization_spaces=False
+        )
+
+    @staticmethod
+    def convert(model_name: str, model_path: Path) -> Path:
+        """Convert a transformers checkpoint to CTranslate2 once and return its path."""
+        ct2_path = ModelHandler.derived_model_path(model_name, "ct2")
+        if (ct2_path / "model.bin").exists():
+            return ct2_path
+
+        with ModelHandler.model_lock(ct2_path):
+            # Another loader may have converted it while we waited for the lock
+            if (ct2_path / "model.bin").exists():
+                return ct2_path
+
+            logger.info("Converting %s to CTranslate2", model_name)
+            # Weights are kept unquantized so any compute type can be picked at load
+            temporary_path = ct2_path.with_name(f".{ct2_path.name}.{os.getpid()}")
+            converter = ctranslate2.converters.TransformersConverter(str(model_path))
+            converter.convert(str(temporary_path), force=True)
+            if ct2_path.exists():
+                shutil.rmtree(ct2_path)
+            os.replace(temporary_path, ct2_path)
+        return ct2_path
+
+    def resolved_precision(self) -> str:
+        return f"ct2-{ct2_compute_type(self.config.precision, self.device)}"
+
+    def _source_lang_code(self, lang: str) -> Optional[str]:
+        """Tokenizer src_lang for lang, or None for models without language tokens."""
+        return None
+
+    def _target_token(self, lang: str) -> Optional[str]:
+        """Token that starts the target sentence in lang, if the model uses one."""
+        return None
+
+    def translate(
+        self, text: str, source_lang: str = "en", target_lang: str = "ar"
+    ) -> str:
+        if self.count_tokens(text) > self.max_input_tokens():
+            return translate_long_text(self, text, source_lang, target_lang)
+        return self.batch_translate([text], source_lang, target_lang)[0]
+
+    def encode_batch(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[List[str]]:
+        source_code = self._source_lang_code(source_lang)
+        if source_code is not None:
+            encoded = self._tokenize_source(source_code, texts, truncation=True)
+        else:
+            encoded = self.tokenizer(texts, truncation=True)
+        return [
+            self.tokenizer.convert_ids_to_tokens(ids) for ids in encoded["input_ids"]
+        ]
+
+    def generate_batch(
+        self, encoded: List[List[str]], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[List[str]]:
+        return self.generate_batch_multi(encoded, source_lang, [target_lang])[
+            target_lang
+        ]
+
+    def generate_batch_multi(
+        self, encoded: List[List[str]], source_lang: str, target_langs: List[str]
+    ) -> Dict[str, List[List[str]]]:
+        # All targets go through one translate_batch() call, each with its own prefix
+        target_tokens = [self._target_token(lang) for lang in target_langs]
+        results = self.translator.translate_batch(
+            encoded * len(target_langs),
+            target_prefix=(
+                [[token] for token in target_tokens for _ in encoded]
+                if target_tokens[0] is not None
+                else None
+            ),
+            beam_size=self.config.num_beams,
+            length_penalty=self.config.length_penalty,
+            max_decoding_length=self.config.max_new_tokens,
+        )
+
+        generated = {}
+        for i, (target_lang, token) in enumerate(zip(target_langs, target_tokens)):
+            hypotheses = [
+                result.hypotheses[0]
+                for result in results[i * len(encoded) : (i + 1) * len(encoded)]
+            ]
+            # Drop the forced language token
+            generated[target_lang] = (
+                [hypothesis[1:] for hypothesis in hypotheses]
+                if token is not None
+                else hypotheses
+            )
+        return generated
+
+    def count_generated_tokens(self, generated: List[List[str]]) -> int:
+        return sum(len(tokens) for tokens in generated)
+
+    def decode_batch(self, generated: List[List[str]]) -> List[str]:
+        return [
+            self.tokenizer.decode(
+                self.tokenizer.convert_tokens_to_ids(tokens), skip_special_tokens=True
+            )
+            for tokens in generated
+        ]
+
+    def batch_translate(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[str]:
+        encoded = self.encode_batch(texts, source_lang, target_lang)
+        generated = self.generate_batch(encoded, source_lang, target_lang)
+        return self.decode_batch(generated)
+
+
+class CTranslate2M2M100Translator(CTranslate2Translator):
+    def _source_lang_code(self, lang: str) -> Optional[str]:
+        return lang
+
+    def _target_token(self, lang: str) -> Optional[str]:
+        return self.tokenizer.get_lang_token(lang)
+
+
+class CTranslate2NLLBTranslator(CTranslate2Translator):
+    def _source_lang_code(self, lang: str) -> Optional[str]:
+        return LanguageUtils.get_nllb_language_code(lang)
+
+    def _target_token(self, lang: str) -> Optional[str]:
+        return LanguageUtils.get_nllb_language_code(lang)
@@ -1,9 +1,11 @@
+import logging
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, GenerationConfig
-import torch
 from library.base_translator import BaseTranslator
 from library.model_handler import ModelHandler
 from typing import List
 
+logger = logging.getLogger(__name__)
+
 
 class FaseehTranslator(BaseTranslator):
     def __init__(self, model_name: str = "Abdulmohsena/Faseeh", config=None):
@@ -18,9 +20,7 @@ class FaseehTranslator(BaseTranslator):
         self.tokenizer = AutoTokenizer.from_pretrained(
             model_path, src_lang="eng_Latn", tgt_lang="arb_Arab"
         )
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(
-            model_path, torch_dtype=torch.bfloat16, device_map=self.device
-        )
+        self.model = self._load_hf_model(AutoModelForSeq2SeqLM, model_path)
         self.generation_config = GenerationConfig.from_pretrained(model_path)
 
     def translate(
@@ -37,26 +37,20 @@ class FaseehTranslator(BaseTranslator):
         Returns:
             Translated text
         """
-        try:
-            if source_lang != "en" or target_lang != "ar":
-                raise ValueError("Faseeh only supports English to Arabic translation")
-
-            print(f"Translating from English to Arabic using Faseeh")
-            encoded = self.tokenizer(text, return_tensors="pt").to(self.device)
+        if source_lang != "en" or target_lang != "ar":
+            raise ValueError("Faseeh only supports English to Arabic translation")
 
-            generated_tokens = self.model.generate(
-                **encoded,
-                generation_config=self.generation_config,
-                max_length=self.config.max_new_tokens,
-                num_beams=self.config.num_beams,
-                length_penalty=self.config.length_penalty,
-            )
+        encoded = self.tokenizer(text, return_tensors="pt").to(self.device)
 
-            return self.tokenizer.decode(generated_tokens[0], skip_special_tokens=True)
+        generated_tokens = self.model.generate(
+            **encoded,
+            generation_config=self.generation_config,
+            max_length=self.config.max_new_tokens,
+            num_beams=self.config.num_beams,
+            length_penalty=self.config.length_penalty,
+        )
 
-        except Exception as e:
-            print(f"An error occurred during translation: {str(e)}")
-            return text
+        return self.tokenizer.decode(generated_tokens[0], skip_special_tokens=True)
 
     def batch_translate(
         self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
@@ -72,29 +66,23 @@ class FaseehTranslator(BaseTranslator):
         Returns:
             List of translated texts
         """
-        try:
-            if source_lang != "en" or target_lang != "ar":
-                raise ValueError("Faseeh only supports English to Arabic translation")
-
-            print(f"Batch translating from English to Arabic using Faseeh")
-            results = []
-
-            # Process each text individually since the model expects single inputs
-            for text in texts:
-                encoded = self.tokenizer(text, return_tensors="pt").to(self.device)
-                generated_tokens = self.model.generate(
-                    **encoded,
-                    generation_config=self.generation_config,
-                    max_length=self.config.max_new_tokens,
-                    num_beams=self.config.num_beams,
-                    length_penalty=self.config.length_penalty,
-                )
-                results.append(
-                    self.tokenizer.decode(generated_tokens[0], skip_special_tokens=True)
-                )
-
-            return results
-
-        except Exception as e:
-            print(f"An error occurred during batch translation: {str(e)}")
-            return texts
+        if source_lang != "en" or target_lang != "ar":
+            raise ValueError("Faseeh only supports English to Arabic translation")
+
+        results = []
+
+        # Process each text individually since the model expects single inputs
+        for text in texts:
+            encoded = self.tokenizer(text, return_tensors="pt").to(self.device)
+            generated_tokens = self.model.generate(
+                **encoded,
+                generation_config=self.generation_config,
+                max_length=self.config.max_new_tokens,
+                num_beams=self.config.num_beams,
+                length_penalty=self.config.length_penalty,
+            )
+            results.append(
+                self.tokenizer.decode(generated_tokens[0], skip_special_tokens=True)
+            )
+
+        return results
@@ -1,127 +1,148 @@
+import logging
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from library.base_translator import BaseTranslator
 from library.model_handler import ModelHandler
-from typing import List, Optional
-import re
-from llama_cpp import Llama
-from sentencepiece import SentencePieceProcessor
-import torch
+from library.segmenter import translate_long_text
+
+logger = logging.getLogger(__name__)
+
+try:
+    from llama_cpp import Llama
+except ImportError:  # Optional dependency: pip install ".[gguf]"
+    Llama = None
+
+# The instruction is the same for every cue of a target language, so it is kept
+# in each slot's KV cache and only the text after it is evaluated per cue
+PROMPT_PREFIX = """Translate the following text to {target_lang}.
+Only output the translation, without any additional text or explanation.
+
+Text: """
+PROMPT_SUFFIX = """{text}
+
+Translation:"""
 
 
 class LlamaCppMadladTranslator(BaseTranslator):
+    """
+    MADLAD in GGUF format, run with llama.cpp.
+
+    batch_translate() spreads a batch over config.parallel_slots llama.cpp
+    contexts decoding concurrently (llama.cpp releases the GIL). The contexts
+    share the memory-mapped weights; each keeps its own KV cache, where the
+    instruction prefix stays evaluated between cues.
+    """
+
     def __init__(self, model_name: str, config=None):
         super().__init__(model_name, config)
-        self.llm: Optional[Llama] = None
-        self.tokenizer: Optional[SentencePieceProcessor] = None
+        self.slots: List["Llama"] = []
+        self._free_slots: "queue.Queue[Llama]" = queue.Queue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._prefix_tokens: Dict[str, List[int]] = {}
         self.model_path = None
 
-        # Set default parameters for translation
-        self.max_tokens = config.max_tokens if config else 2048
-        self.temperature = config.temperature if config else 0.1
-        self.top_p = config.top_p if config else 0.95
-        self.n_ctx = config.n_ctx if config else 4096
+        # Sampling settings; TranslationConfig has no fields for them, so a
+        # config that does overrides the defaults
+        self.max_tokens = getattr(self.config, "max_tokens", self.config.max_new_tokens)
+        self.temperature = getattr(self.config, "temperature", 0.1)
+        self.top_p = getattr(self.config, "top_p", 0.95)
+        self.n_ctx = getattr(self.config, "n_ctx", 4096)
+        # Translations are sampled unless the temperature is 0
+        self.deterministic = self.temperature == 0
 
     def load_model(self) -> None:
         """
-        Load the GGUF model and its associated tokenizer.
+        Load the GGUF model into one llama.cpp context per parallel slot.
         """
+        if Llama is None:
+            raise ImportError(
+                'The madlad_gguf model needs llama-cpp-python: pip install ".[gguf]"'
+            )
         self.model_path = ModelHandler.download_model(self.model_name)
 
         # Find the GGUF file
-        gguf_files = list(self.model_path.glob("*.gguf"))
+        gguf_files = sorted(self.model_path.glob("*.gguf"))
         if not gguf_files:
             raise FileNotFoundError(f"No GGUF model found in {self.model_path}")
 
         # Initialize llama.cpp
         n_gpu_layers = -1 if self.device.type == "cuda" else 0
-
-        self.llm = Llama(
-            model_path=str(gguf_files[0]),
-            n_ctx=self.n_ctx,
-            n_gpu_layers=n_gpu_layers,
-            verbose=False,
+        slots = max(self.config.parallel_slots, 1)
+        # The CPU cores are split between the slots decoding at the same time
+        n_threads = max((os.cpu_count() or 1) // slots, 1)
+
+        self.slots = [
+            Llama(
+                model_path=str(gguf_files[0]),
+                n_ctx=self.n_ctx,
+                n_gpu_layers=n_gpu_layers,
+                n_threads=n_threads,
+                use_mmap=True,
+                verbose=False,
+            )
+            for _ in range(slots)
+        ]
+        for slot in self.slots:
+            self._free_slots.put(slot)
+        self._executor = ThreadPoolExecutor(
+            max_workers=slots, thread_name_prefix="llama-slot"
+        )
+        logger.info(
+            "Loaded %s with %d slot(s) of %d thread(s)",
+            gguf_files[0].name,
+            slots,
+            n_threads,
         )
 
-        # Load SentencePiece tokenizer if available
-        tokenizer_path = self.model_path / "sentencepiece.model"
-        if tokenizer_path.exists():
-            self.tokenizer = SentencePieceProcessor()
-            self.tokenizer.load(str(tokenizer_path))
-
-    def split_text(self, text: str, word_limit: int = 250) -> List[dict]:
-        """Split text into chunks of the specified word limit, tracking line breaks."""
-        chunks = []
-        current_chunk = {"text": "", "ends_with_newline": False}
-        current_word_count = 0
-
-        paragraphs = text.split("\n")
-
-        for i, paragraph in enumerate(paragraphs):
-            words = paragraph.split()
-
-            if not words:  # Empty paragraph (just a newline)
-                if current_chunk["text"]:
-                    current_chunk["ends_with_newline"] = True
-                    chunks.append(current_chunk)
-                    current_chunk = {"text": "", "ends_with_newline": False}
-                    current_word_count = 0
-                chunks.append({"text": "", "ends_with_newline": True})
-                continue
-
-            start = 0
-            while start < len(words):
-                remaining_words = word_limit - current_word_count
-                end = min(start + remaining_words, len(words))
-
-                chunk_text = " ".join(words[start:end])
-
-                # Try to find the last punctuation mark within the chunk
-                match = re.search(r"([.!?])\s", chunk_text)
-                if match and start + len(chunk_text[: match.end()].split()) < len(
-                    words
-                ):
-                    end = start + len(chunk_text[: match.end()].split())
-                    chunk_text = " ".join(words[start:end])
-
-                if current_chunk["text"]:
-                    current_chunk["text"] += " "
-                current_chunk["text"] += chunk_text
-                current_word_count += len(chunk_text.split())
-
-                if current_word_count >= word_limit or end == len(words):
-                    if i < len(paragraphs) - 1 or end == len(words):
-                        current_chunk["ends_with_newline"] = True
-                    chunks.append(current_chunk)
-                    current_chunk = {"text": "", "ends_with_newline": False}
-                    current_word_count = 0
-
-                start = end
-
-        if current_chunk["text"]:
-            chunks.append(current_chunk)
-
-        return chunks
-
-    def simple_translate(self, text: str, target_lang: str) -> str:
-        """Translate a single piece of text using llama.cpp."""
-        prompt = f"""Translate the following text to {target_lang}. 
-Only output the translation, without any additional text or explanation.
+    def resolved_precision(self) -> str:
+        # Quantization is part of the GGUF file
+        return "gguf"
 
-Text: {text}
+    def count_tokens(self, text: str) -> int:
+        return len(self.slots[0].tokenize(text.encode("utf-8"), add_bos=False))
 
-Translation:"""
+    def max_input_tokens(self) -> int:
+        # Room is left in the context for the instruction and the translation
+        return min(super().max_input_tokens(), self.n_ctx - self.max_tokens - 64)
 
-        response = self.llm(
-            prompt,
-            max_tokens=self.max_tokens,
-            temperature=self.temperature,
-            top_p=self.top_p,
-            echo=False,
-            stop=["Text:", "\n\n"],
+    def _prompt_tokens(self, text: str, target_lang: str) -> List[int]:
+        """
+        Tokenize the prompt as prefix + text separately, so the prefix tokens are
+        identical for every cue and llama.cpp reuses them from the KV cache.
+        """
+        prefix = self._prefix_tokens.get(target_lang)
+        if prefix is None:
+            prefix = self.slots[0].tokenize(
+                PROMPT_PREFIX.format(target_lang=target_lang).encode("utf-8"),
+                add_bos=True,
+            )
+            self._prefix_tokens[target_lang] = prefix
+        suffix = self.slots[0].tokenize(
+            PROMPT_SUFFIX.format(text=text).encode("utf-8"), add_bos=False
         )
+        return prefix + suffix
 
-        if response and "choices" in response and len(response["choices"]) > 0:
-            return response["choices"][0]["text"].strip()
-        return text
+    def simple_translate(self, text: str, target_lang: str) -> str:
+        """Translate a single piece of text on the next free slot."""
+        prompt = self._prompt_tokens(text, target_lang)
+        slot = self._free_slots.get()
+        try:
+            response = slot(
+                prompt,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                top_p=self.top_p,
+                echo=False,
+                stop=["Text:", "\n\n"],
+            )
+        finally:
+            self._free_slots.put(slot)
+
+        if not response or not response.get("choices"):
+            raise RuntimeError(f"llama.cpp returned no completion for {text!r}")
+        return response["choices"][0]["text"].strip()
 
     def translate(
         self, text: str, source_lang: str = "en", target_lang: str = "ar"
@@ -130,24 +151,16 @@ Translation:"""
         Translate text from source language to target language.
         Handles long texts by splitting them into chunks.
         """
-        try:
-            if len(text.split()) > 250:
-                chunks = self.split_text(text)
-                result = []
-                for chunk in chunks:
-                    if chunk["text"]:
-                        translated_text = self.simple_translate(
-                            chunk["text"], target_lang
-                        )
-                        result.append(translated_text)
-                    if chunk["ends_with_newline"]:
-                        result.append("\n")
-                return "".join(result).rstrip()
-            return self.simple_translate(text, target_lang)
-        except Exception as e:
-            print(f"An error occurred during translation: {str(e)}")
-            return text
-
-    def batch_translate(self, inputs: List[str], target_lang: str = "ar") -> List[str]:
-        """Translate multiple texts."""
-        return [self.translate(text, target_lang=target_lang) for text in inputs]
+        if self.count_tokens(text) > self.max_input_tokens():
+            return translate_long_text(self, text, source_lang, target_lang)
+        return self.simple_translate(text, target_lang)
+
+    def batch_translate(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[str]:
+        """Translate multiple texts, one per free slot at a time."""
+        return list(
+            self._executor.map(
+                lambda text: self.simple_translate(text, target_lang), texts
+            )
+        )
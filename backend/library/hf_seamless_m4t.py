@@ -1,9 +1,15 @@
-from typing import List, Union, Optional, Dict
+import logging
+from typing import Dict, List, Optional
 from transformers import AutoProcessor, SeamlessM4TModel
+from transformers.modeling_outputs import BaseModelOutput
 import torch
 from library.base_translator import BaseTranslator
+from library.batching import token_budget_batches
 from library.config import TranslationConfig
 from library.model_handler import ModelHandler
+from library.segmenter import translate_long_text
+
+logger = logging.getLogger(__name__)
 
 
 class SeamlessTranslator(BaseTranslator):
@@ -68,8 +74,9 @@ class SeamlessTranslator(BaseTranslator):
     def load_model(self) -> None:
         """Load the model and processor from the specified path."""
         model_path = ModelHandler.download_model(self.model_name)
-        self.model = SeamlessM4TModel.from_pretrained(model_path).to(self.device)
+        self.model = self._load_hf_model(SeamlessM4TModel, model_path)
         self.processor = AutoProcessor.from_pretrained(model_path)
+        self.tokenizer = self.processor.tokenizer
 
     def _map_language_code(self, code: str) -> str:
         """
@@ -97,37 +104,75 @@ class SeamlessTranslator(BaseTranslator):
         Returns:
             Translated text
         """
-        # Map language codes to Seamless format
-        src_lang = self._map_language_code(source_lang)
-        tgt_lang = self._map_language_code(target_lang)
+        if self.count_tokens(text) > self.max_input_tokens():
+            return translate_long_text(self, text, source_lang, target_lang)
+        return self.batch_translate([text], source_lang, target_lang)[0]
 
-        try:
-            # Process input
-            input_data = self.processor(
-                text=text, src_lang=src_lang, return_tensors="pt"
-            ).to(self.device)
+    def encode_batch(
+        self, texts: List[str], source_lang: str = "eng", target_lang: str = "arb"
+    ):
+        return self.processor(
+            text=texts,
+            src_lang=self._map_language_code(source_lang),
+            padding=True,
+            return_tensors="pt",
+        )
+
+    def generate_batch(
+        self, encoded, source_lang: str = "eng", target_lang: str = "arb"
+    ) -> torch.Tensor:
+        # Text decoder only: no speech is synthesized, and the generation output
+        # holds the text token ids as sequences
+        output = self.model.generate(
+            **encoded.to(self.device),
+            tgt_lang=self._map_language_code(target_lang),
+            num_beams=self.config.num_beams or 5,
+            generate_speech=False,
+        )
+        return output.sequences.cpu()
+
+    def generate_batch_multi(
+        self, encoded, source_lang: str, target_langs: List[str]
+    ) -> Dict[str, torch.Tensor]:
+        """
+        Run the text encoder once and decode its output for every target language.
+        The target language is only the decoder's start token, so the encoder
+        pass is the same for all of them.
+        """
+        encoded = encoded.to(self.device)
+        with torch.no_grad():
+            encoder_outputs = self.model.text_encoder(
+                input_ids=encoded["input_ids"],
+                attention_mask=encoded["attention_mask"],
+                return_dict=True,
+            )
 
-            # Generate translation
+        generated = {}
+        for target_lang in target_langs:
+            # generate() skips the encoder when given its outputs; input_ids only
+            # sets the batch size. Beam search expands the outputs in place, so
+            # every target gets a fresh wrapper around the shared hidden states.
             output = self.model.generate(
-                **input_data,
-                tgt_lang=tgt_lang,
+                **encoded,
+                encoder_outputs=BaseModelOutput(
+                    last_hidden_state=encoder_outputs.last_hidden_state
+                ),
+                tgt_lang=self._map_language_code(target_lang),
                 num_beams=self.config.num_beams or 5,
-                do_sample=True,
                 generate_speech=False,
             )
+            generated[target_lang] = output.sequences.cpu()
+        return generated
 
-            # Process output
-            tokens = output[0].cpu().squeeze().detach().tolist()
-            return self.processor.decode(tokens, skip_special_tokens=True)
-        except Exception as e:
-            print(f"An error occurred during translation: {str(e)}")
-            return text
+    def decode_batch(self, generated) -> List[str]:
+        return self.tokenizer.batch_decode(generated, skip_special_tokens=True)
 
     def batch_translate(
         self, texts: List[str], source_lang: str = "eng", target_lang: str = "arb"
     ) -> List[str]:
         """
-        Translate a batch of texts.
+        Translate a batch of texts, in padded sub-batches of at most
+        config.max_batch_tokens source tokens.
 
         Args:
             texts: List of input texts to translate
@@ -137,6 +182,13 @@ class SeamlessTranslator(BaseTranslator):
         Returns:
             List of translated texts
         """
-        # TODO: Implement batch translation
-
-        return [self.translate(text, source_lang, target_lang) for text in texts]
+        lengths = [self.count_tokens(text) for text in texts]
+        translations = [""] * len(texts)
+        for indices in token_budget_batches(lengths, self.config.max_batch_tokens):
+            encoded = self.encode_batch(
+                [texts[i] for i in indices], source_lang, target_lang
+            )
+            generated = self.generate_batch(encoded, source_lang, target_lang)
+            for i, translation in zip(indices, self.decode_batch(generated)):
+                translations[i] = translation
+        return translations
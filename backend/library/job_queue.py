@@ -0,0 +1,327 @@
+# job_queue.py
+import logging
+import asyncio
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    model: str
+    params: Dict[str, Any]
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    state: JobState = JobState.QUEUED
+    cues_done: int = 0
+    cues_total: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Dict[str, Any] = field(default_factory=dict)
+    _subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = field(
+        default_factory=list, repr=False
+    )
+    _subscribers_lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False
+    )
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JobState.DONE, JobState.FAILED)
+
+    @property
+    def cues_per_second(self) -> float:
+        if self.started_at is None or not self.cues_done:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return self.cues_done / elapsed if elapsed > 0 else 0.0
+
+    def update_progress(
+        self,
+        cues_done: int,
+        cues_total: int,
+        cues: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        self.cues_done = cues_done
+        self.cues_total = cues_total
+        self.publish(
+            "progress",
+            {
+                "cues_done": cues_done,
+                "cues_total": cues_total,
+                "cues_per_second": round(self.cues_per_second, 2),
+                "cues": cues or [],
+            },
+        )
+
+    def set_state(self, state: JobState, error: Optional[str] = None) -> None:
+        now = time.time()
+        if state == JobState.RUNNING:
+            self.started_at = now
+        elif state in (JobState.DONE, JobState.FAILED):
+            self.finished_at = now
+        self.error = error
+        self.state = state
+        self.publish("state", self.to_dict())
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Push an event to every subscriber; safe to call from worker threads."""
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for loop, events in subscribers:
+            try:
+                loop.call_soon_threadsafe(events.put_nowait, (event, data))
+            except RuntimeError:
+                # The subscriber's event loop has already been closed
+                pass
+
+    async def events(
+        self, heartbeat_seconds: float = 15.0
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (event, data) pairs until the job finishes, starting with a state
+        snapshot. ("heartbeat", {}) is yielded when nothing happened for a while.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), events)
+        with self._subscribers_lock:
+            self._subscribers.append(subscriber)
+        try:
+            yield "state", self.to_dict()
+            if self.finished:
+                return
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(
+                        events.get(), heartbeat_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield "heartbeat", {}
+                    continue
+                yield event, data
+                if event == "state" and self.finished:
+                    return
+        finally:
+            with self._subscribers_lock:
+                self._subscribers.remove(subscriber)
+
+    def to_spec(self) -> Dict[str, Any]:
+        """The fields needed to run the job again after a restart."""
+        return {
+            "id": self.id,
+            "model": self.model,
+            "params": self.params,
+            "result": self.result,
+            "created_at": self.created_at,
+        }
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any]) -> "Job":
+        return cls(
+            id=spec["id"],
+            model=spec["model"],
+            params=spec["params"],
+            result=spec.get("result", {}),
+            created_at=spec.get("created_at", time.time()),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "model": self.model,
+            "state": self.state.value,
+            "cues_done": self.cues_done,
+            "cues_total": self.cues_total,
+            "cues_per_second": round(self.cues_per_second, 2),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            **self.result,
+        }
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Bounded job queue with a fixed pool of worker threads per model.
+
+    Each model gets its own queue so a backlog of slow MADLAD jobs does not hold
+    up Opus jobs. Finished jobs are kept for status queries until max_finished_jobs
+    is exceeded, oldest first.
+
+    With a spool_dir, every unfinished job is also written there as a spec file
+    so recover() can re-submit it after a restart.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[Job], None],
+        max_queued: int = 32,
+        workers_per_model: Optional[Dict[str, int]] = None,
+        default_workers: int = 1,
+        max_finished_jobs: int = 1000,
+        spool_dir: Optional[str] = None,
+    ):
+        self.runner = runner
+        self.max_queued = max_queued
+        self.workers_per_model = workers_per_model or {}
+        self.default_workers = default_workers
+        self.max_finished_jobs = max_finished_jobs
+        self.spool_dir = spool_dir
+        self._jobs: Dict[str, Job] = {}
+        self._queues: Dict[str, queue.Queue] = {}
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self) -> None:
+        with self._lock:
+            self._running = True
+
+    def stop(self) -> None:
+        with self._lock:
+            self._running = False
+            for model, model_queue in self._queues.items():
+                # Drop jobs that have not started so the stop sentinels fit; their
+                # spec files stay in spool_dir so recover() picks them up again
+                while not model_queue.empty():
+                    job = model_queue.get_nowait()
+                    if job is not None:
+                        job.set_state(JobState.FAILED, error="Server shutting down")
+                for _ in range(self.workers_per_model.get(model, self.default_workers)):
+                    model_queue.put(None)
+            workers, self._workers = self._workers, []
+            self._queues = {}
+        for worker in workers:
+            worker.join(timeout=1)
+
+    def submit(self, job: Job) -> Job:
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("Job queue is not running")
+            model_queue = self._queues.get(job.model)
+            if model_queue is None:
+                model_queue = self._start_workers(job.model)
+            # Spooled before a worker can see the job, so a job that finishes
+            # right away never leaves its spec behind
+            recovering = self._is_spooled(job)
+            self._spool(job)
+            try:
+                model_queue.put_nowait(job)
+            except queue.Full:
+                if not recovering:
+                    self._unspool(job)
+                raise QueueFullError(
+                    f"Too many queued jobs for model {job.model}, try again later"
+                )
+            self._jobs[job.id] = job
+            self._prune_finished()
+        return job
+
+    def recover(self) -> List[Job]:
+        """Re-submit the jobs that were queued or running when the server stopped."""
+        if self.spool_dir is None:
+            return []
+        recovered = []
+        for spec_path in sorted(glob.glob(os.path.join(self.spool_dir, "*.job.json"))):
+            try:
+                with open(spec_path, "r", encoding="utf-8") as spec_file:
+                    job = Job.from_spec(json.load(spec_file))
+                recovered.append(self.submit(job))
+            except (OSError, ValueError, KeyError, QueueFullError) as e:
+                logger.warning("Could not recover job from %s: %s", spec_path, e)
+        if recovered:
+            logger.info("Recovered %d unfinished jobs", len(recovered))
+        return recovered
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_depths(self) -> Dict[str, int]:
+        with self._lock:
+            return {model: q.qsize() for model, q in self._queues.items()}
+
+    def active_jobs(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.state == JobState.RUNNING)
+
+    def _start_workers(self, model: str) -> queue.Queue:
+        """Create the queue and worker threads for a model. Caller holds self._lock."""
+        model_queue: queue.Queue = queue.Queue(maxsize=self.max_queued)
+        self._queues[model] = model_queue
+        for i in range(self.workers_per_model.get(model, self.default_workers)):
+            worker = threading.Thread(
+                target=self._work,
+                args=(model_queue,),
+                name=f"job-worker-{model}-{i}",
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+        return model_queue
+
+    def _work(self, model_queue: queue.Queue) -> None:
+        while True:
+            job = model_queue.get()
+            if job is None:
+                return
+
+            job.set_state(JobState.RUNNING)
+            try:
+                self.runner(job)
+                job.set_state(JobState.DONE)
+            except Exception as e:
+                logger.exception("Job %s failed", job.id)
+                job.set_state(JobState.FAILED, error=str(e))
+            finally:
+                self._unspool(job)
+
+    def _spec_path(self, job: Job) -> str:
+        return os.path.join(self.spool_dir, f"{job.id}.job.json")
+
+    def _spool(self, job: Job) -> None:
+        if self.spool_dir is None:
+            return
+        spec_path = self._spec_path(job)
+        with open(f"{spec_path}.tmp", "w", encoding="utf-8") as spec_file:
+            json.dump(job.to_spec(), spec_file)
+        os.replace(f"{spec_path}.tmp", spec_path)
+
+    def _is_spooled(self, job: Job) -> bool:
+        return self.spool_dir is not None and os.path.exists(self._spec_path(job))
+
+    def _unspool(self, job: Job) -> None:
+        if self.spool_dir is not None and os.path.exists(self._spec_path(job)):
+            os.remove(self._spec_path(job))
+
+    def _prune_finished(self) -> None:
+        """Forget the oldest finished jobs beyond the retention limit. Caller holds self._lock."""
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(finished) - self.max_finished_jobs
+        if excess <= 0:
+            return
+        finished.sort(key=lambda job: job.finished_at or 0)
+        for job in finished[:excess]:
+            del self._jobs[job.id]
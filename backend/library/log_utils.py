@@ -0,0 +1,95 @@
+# log_utils.py
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any fields passed through extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and not name.startswith("_"):
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(
+    level: Optional[str] = None, log_format: Optional[str] = None
+) -> None:
+    """
+    Send log records to stderr at LOG_LEVEL (default INFO), formatted as text or,
+    with LOG_FORMAT=json, as one JSON object per line. Safe to call repeatedly.
+    """
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = (log_format or os.getenv("LOG_FORMAT", "text")).lower()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if getattr(handler, "_translator_handler", False):
+            root.removeHandler(handler)
+    handler = logging.StreamHandler()
+    handler._translator_handler = True
+    handler.setFormatter(
+        JsonFormatter() if log_format == "json" else logging.Formatter(_TEXT_FORMAT)
+    )
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+class RateLimitedLogger:
+    """
+    Emits at most one message per interval_seconds through logger and drops the
+    rest, for progress lines in loops that run once per batch or cue. The next
+    message that gets through reports how many were dropped; force=True always
+    gets through (e.g. for the last batch).
+    """
+
+    def __init__(
+        self, logger: logging.Logger, interval_seconds: Optional[float] = None
+    ):
+        self.logger = logger
+        self.interval_seconds = (
+            interval_seconds
+            if interval_seconds is not None
+            else float(os.getenv("LOG_PROGRESS_INTERVAL_SECONDS", "5"))
+        )
+        self._last = -math.inf
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def log(self, level: int, msg: str, *args, force: bool = False) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last < self.interval_seconds:
+                self._suppressed += 1
+                return
+            suppressed, self._suppressed = self._suppressed, 0
+            self._last = now
+        if suppressed:
+            msg += " (%d similar messages suppressed)"
+            args += (suppressed,)
+        self.logger.log(level, msg, *args)
+
+    def info(self, msg: str, *args, force: bool = False) -> None:
+        self.log(logging.INFO, msg, *args, force=force)
@@ -1,72 +1,29 @@
+import logging
 import ctranslate2
 from sentencepiece import SentencePieceProcessor
 from library.base_translator import BaseTranslator
 from library.model_handler import ModelHandler
+from library.segmenter import translate_long_text
+from library.precision import ct2_compute_type
 from typing import List
-import re
+
+logger = logging.getLogger(__name__)
 
 
 class MadladTranslator(BaseTranslator):
 
     def load_model(self) -> None:
         model_path = ModelHandler.download_model(self.model_name)
-        self.translator = ctranslate2.Translator(str(model_path))
+        self.translator = ctranslate2.Translator(
+            str(model_path),
+            device=self.device.type,
+            compute_type=ct2_compute_type(self.config.precision, self.device),
+        )
         self.tokenizer = SentencePieceProcessor()
         self.tokenizer.load(f"{model_path}/sentencepiece.model")
 
-    def split_text(self, text: str, word_limit: int = 250) -> List[dict]:
-        """Split text into chunks of the specified word limit, tracking line breaks."""
-        chunks = []
-        current_chunk = {"text": "", "ends_with_newline": False}
-        current_word_count = 0
-
-        paragraphs = text.split("\n")
-
-        for i, paragraph in enumerate(paragraphs):
-            words = paragraph.split()
-
-            if not words:  # Empty paragraph (just a newline)
-                if current_chunk["text"]:
-                    current_chunk["ends_with_newline"] = True
-                    chunks.append(current_chunk)
-                    current_chunk = {"text": "", "ends_with_newline": False}
-                    current_word_count = 0
-                chunks.append({"text": "", "ends_with_newline": True})
-                continue
-
-            start = 0
-            while start < len(words):
-                remaining_words = word_limit - current_word_count
-                end = min(start + remaining_words, len(words))
-
-                chunk_text = " ".join(words[start:end])
-
-                # Try to find the last punctuation mark within the chunk
-                match = re.search(r"([.!?])\s", chunk_text)
-                if match and start + len(chunk_text[: match.end()].split()) < len(
-                    words
-                ):
-                    end = start + len(chunk_text[: match.end()].split())
-                    chunk_text = " ".join(words[start:end])
-
-                if current_chunk["text"]:
-                    current_chunk["text"] += " "
-                current_chunk["text"] += chunk_text
-                current_word_count += len(chunk_text.split())
-
-                if current_word_count >= word_limit or end == len(words):
-                    if i < len(paragraphs) - 1 or end == len(words):
-                        current_chunk["ends_with_newline"] = True
-                    chunks.append(current_chunk)
-                    current_chunk = {"text": "", "ends_with_newline": False}
-                    current_word_count = 0
-
-                start = end
-
-        if current_chunk["text"]:
-            chunks.append(current_chunk)
-
-        return chunks
+    def resolved_precision(self) -> str:
+        return f"ct2-{ct2_compute_type(self.config.precision, self.device)}"
 
     def simple_translate(self, text: str, target_lang: str) -> str:
         input_tokens = self.tokenizer.encode(f"<2{target_lang}> {text}", out_type=str)
@@ -84,38 +41,42 @@ class MadladTranslator(BaseTranslator):
     def translate(
         self, text: str, source_lang: str = "en", target_lang: str = "ar"
     ) -> str:
-        try:
-            if len(text.split()) > 250:
-                chunks = self.split_text(text)
-                result = []
-                for chunk in chunks:
-                    if chunk["text"]:
-                        translated_text = self.simple_translate(
-                            chunk["text"], target_lang
-                        )
-                        result.append(translated_text)
-                    if chunk["ends_with_newline"]:
-                        result.append("\n")
-                return "".join(result).rstrip()
-            return self.simple_translate(text, target_lang)
-        except Exception as e:
-            print(f"An error occurred during translation: {str(e)}")
-            return text
-
-    def batch_translate(self, inputs: List[str], target_lang: str = "ar") -> List[str]:
-        input_tokens_batch = [
+        if self.count_tokens(text) > self.max_input_tokens():
+            return translate_long_text(self, text, source_lang, target_lang)
+        return self.simple_translate(text, target_lang)
+
+    def encode_batch(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[List[str]]:
+        return [
             self.tokenizer.encode(f"<2{target_lang}> {text}", out_type=str)
-            for text in inputs
+            for text in texts
         ]
-        results = self.translator.translate_batch(
-            input_tokens_batch,
+
+    def generate_batch(
+        self,
+        encoded: List[List[str]],
+        source_lang: str = "en",
+        target_lang: str = "ar",
+    ):
+        return self.translator.translate_batch(
+            encoded,
             batch_type="tokens",
             max_batch_size=1024,
             beam_size=self.config.num_beams,
             no_repeat_ngram_size=1,
             repetition_penalty=2,
         )
-        translated_sentences = [
-            self.tokenizer.decode(result.hypotheses[0]) for result in results
-        ]
-        return translated_sentences
+
+    def count_generated_tokens(self, generated) -> int:
+        return sum(len(result.hypotheses[0]) for result in generated)
+
+    def decode_batch(self, generated) -> List[str]:
+        return [self.tokenizer.decode(result.hypotheses[0]) for result in generated]
+
+    def batch_translate(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[str]:
+        encoded = self.encode_batch(texts, source_lang, target_lang)
+        generated = self.generate_batch(encoded, source_lang, target_lang)
+        return self.decode_batch(generated)
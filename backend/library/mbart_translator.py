@@ -8,9 +8,7 @@ from typing import List
 class MBartTranslator(BaseTranslator):
     def load_model(self) -> None:
         model_path = ModelHandler.download_model(self.model_name)
-        self.model = MBartForConditionalGeneration.from_pretrained(model_path).to(
-            self.device
-        )
+        self.model = self._load_hf_model(MBartForConditionalGeneration, model_path)
         self.tokenizer = MBart50TokenizerFast.from_pretrained(
             model_path,
             clean_up_tokenization_spaces=False,
@@ -22,15 +20,15 @@ class MBartTranslator(BaseTranslator):
         self.tokenizer.src_lang = "en_XX"
         self.tokenizer.tgt_lang = "ar_AR"
 
-    def translate(self, text: str, src_lang: str, tgt_lang: str) -> List[str]:
+    def translate(self, text: str, source_lang: str, target_lang: str) -> List[str]:
         # Set the source language
-        self.tokenizer.src_lang = src_lang
+        self.tokenizer.src_lang = source_lang
         input_ids = self.tokenizer(text, return_tensors="pt").input_ids.to(self.device)
 
         # Translate to target language
         generated_tokens = self.model.generate(
             input_ids=input_ids,
-            forced_bos_token_id=self.tokenizer.lang_code_to_id[tgt_lang],
+            forced_bos_token_id=self.tokenizer.lang_code_to_id[target_lang],
             max_new_tokens=self.config.max_new_tokens,
             num_beams=self.config.num_beams,
             num_return_sequences=self.config.num_return_sequences,
@@ -42,10 +40,10 @@ class MBartTranslator(BaseTranslator):
         ]
 
     def batch_translate(
-        self, texts: List[str], src_lang: str, tgt_lang: str
+        self, texts: List[str], source_lang: str, target_lang: str
     ) -> List[str]:
         # Set the source language
-        self.tokenizer.src_lang = src_lang
+        self.tokenizer.src_lang = source_lang
         input_ids = self.tokenizer(
             texts, padding=True, truncation=True, return_tensors="pt"
         ).input_ids.to(self.device)
@@ -53,7 +51,9 @@ class MBartTranslator(BaseTranslator):
         # Translate to target language
         generated_tokens = self.model.generate(
             input_ids=input_ids,
-            forced_bos_token_id=self.tokenizer.lang_code_to_id[tgt_lang],
+            forced_bos_token_id=self.tokenizer.lang_code_to_id[target_lang],
+            num_beams=self.config.num_beams,
+            length_penalty=self.config.length_penalty,
         )
 
         return self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)
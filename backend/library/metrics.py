@@ -0,0 +1,201 @@
+# metrics.py
+import contextvars
+import time
+from typing import Dict, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import REGISTRY, GaugeMetricFamily
+
+from library.resource_usage import current_rss_bytes, peak_rss_bytes
+
+REQUESTS = Counter(
+    "translator_requests_total",
+    "HTTP requests by endpoint, model and status code",
+    ["endpoint", "model", "status"],
+)
+REQUEST_SECONDS = Histogram(
+    "translator_request_duration_seconds",
+    "HTTP request latency by endpoint and model",
+    ["endpoint", "model"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "translator_model_load_duration_seconds",
+    "Time to load a model into the cache",
+    ["model", "backend"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600),
+)
+BATCH_SIZE = Histogram(
+    "translator_batch_size",
+    "Texts per generate call; path is pipeline (subtitle jobs) or micro_batch",
+    ["model_name", "path"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+GENERATED_TOKENS = Counter(
+    "translator_generated_tokens_total",
+    "Tokens generated, counted from the output ids of generate calls",
+    ["model_name"],
+)
+GENERATION_SECONDS = Counter(
+    "translator_generation_seconds_total",
+    "Time spent in generate calls",
+    ["model_name"],
+)
+MODULE_IMPORT_SECONDS = Gauge(
+    "translator_module_import_seconds",
+    "Time to import a translator module on first use",
+    ["module"],
+)
+JOBS = Counter(
+    "translator_jobs_total",
+    "Subtitle jobs finished, by model and final state",
+    ["model", "state"],
+)
+JOB_PEAK_RSS_BYTES = Histogram(
+    "translator_job_peak_rss_bytes",
+    "Highest process RSS sampled after each batch of a subtitle job",
+    ["model"],
+    buckets=tuple(gib * 1024**3 for gib in (0.5, 1, 2, 4, 6, 8, 12, 16, 24, 32, 48)),
+)
+
+# Labels filled in by an endpoint for the request being served
+_request_labels: contextvars.ContextVar[Optional[Dict[str, str]]] = (
+    contextvars.ContextVar("request_labels", default=None)
+)
+
+
+def set_request_model(model: str) -> None:
+    """Attach the model label to the metrics of the current request."""
+    labels = _request_labels.get()
+    if labels is not None:
+        labels["model"] = model
+
+
+def model_label(translator) -> str:
+    return getattr(translator, "model_name", type(translator).__name__)
+
+
+def observe_generation(translator, batch_size: int, seconds: float, path: str) -> None:
+    model_name = model_label(translator)
+    BATCH_SIZE.labels(model_name, path).observe(batch_size)
+    GENERATION_SECONDS.labels(model_name).inc(seconds)
+
+
+def observe_generated(translator, generated) -> None:
+    """Count the tokens of a generate_batch() output, if the translator can tell."""
+    count_generated_tokens = getattr(translator, "count_generated_tokens", None)
+    tokens = count_generated_tokens(generated) if count_generated_tokens else None
+    if tokens is not None:
+        GENERATED_TOKENS.labels(model_label(translator)).inc(tokens)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the count and latency of every HTTP request,
+    labelled with the route template rather than the raw path so path
+    parameters like job ids do not each become a time series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        labels = {"model": "", "status": "500"}
+        token = _request_labels.set(labels)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                labels["status"] = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_labels.reset(token)
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.labels(endpoint, labels["model"]).observe(
+                time.perf_counter() - start
+            )
+            REQUESTS.labels(endpoint, labels["model"], labels["status"]).inc()
+
+
+class JobRssSampler:
+    """Tracks the highest RSS seen while a job runs; sample() after each batch."""
+
+    def __init__(self):
+        self.peak_bytes = current_rss_bytes()
+
+    def sample(self) -> None:
+        self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+
+class ServiceCollector:
+    """
+    Reports the state of the model cache and job queue when /metrics is scraped,
+    so nothing has to keep gauges in sync as models load and jobs move.
+    """
+
+    def __init__(self, model_cache, job_queue):
+        self.model_cache = model_cache
+        self.job_queue = job_queue
+
+    def collect(self):
+        cache_stats = self.model_cache.stats()
+        resident = GaugeMetricFamily(
+            "translator_model_resident_bytes",
+            "Memory held by each loaded model",
+            labels=["model", "backend", "model_name", "device", "precision"],
+        )
+        load_peak = GaugeMetricFamily(
+            "translator_model_load_peak_bytes",
+            "Highest RSS growth while each loaded model was loading",
+            labels=["model", "backend", "model_name", "device", "precision"],
+        )
+        load_seconds = GaugeMetricFamily(
+            "translator_model_load_seconds",
+            "Load time of each loaded model",
+            labels=["model", "backend", "model_name", "device", "precision"],
+        )
+        for entry in cache_stats["models"]:
+            resident.add_metric(entry["key"], entry["resident_bytes"])
+            load_peak.add_metric(entry["key"], entry["load_peak_bytes"])
+            load_seconds.add_metric(entry["key"], entry["load_seconds"])
+        yield resident
+        yield load_peak
+        yield load_seconds
+        yield GaugeMetricFamily(
+            "translator_model_cache_budget_bytes",
+            "Memory budget of the model cache",
+            value=cache_stats["max_bytes"],
+        )
+
+        depth = GaugeMetricFamily(
+            "translator_job_queue_depth",
+            "Subtitle jobs waiting to start, per model",
+            labels=["model"],
+        )
+        for model, queued in self.job_queue.queue_depths().items():
+            depth.add_metric([model], queued)
+        yield depth
+        yield GaugeMetricFamily(
+            "translator_active_jobs",
+            "Subtitle jobs currently running",
+            value=self.job_queue.active_jobs(),
+        )
+        yield GaugeMetricFamily(
+            "translator_process_peak_rss_bytes",
+            "Peak resident set size of the API process",
+            value=peak_rss_bytes(),
+        )
+
+
+def register_service_collector(model_cache, job_queue) -> ServiceCollector:
+    collector = ServiceCollector(model_cache, job_queue)
+    REGISTRY.register(collector)
+    return collector
@@ -0,0 +1,160 @@
+# micro_batcher.py
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional
+
+from library.config import MicroBatchConfig
+from library.metrics import observe_generated, observe_generation
+
+
+@dataclass
+class _PendingText:
+    translator: object
+    text: str
+    tokens: int
+    future: asyncio.Future
+
+
+class MicroBatcher:
+    """
+    Collects texts submitted by concurrent requests for one (model, source_lang,
+    target_lang) and translates them in a single batch, through the translator's
+    encode_batch(), generate_batch() and decode_batch().
+
+    A batch is flushed when the wait window of its first text expires, or earlier
+    once it reaches the token budget or the maximum batch size. Generation runs in
+    the default executor so the event loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(
+        self,
+        source_lang: str,
+        target_lang: str,
+        config: Optional[MicroBatchConfig] = None,
+    ):
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.config = config or MicroBatchConfig()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._carry: Optional[_PendingText] = None
+
+    async def translate(self, translator, texts: List[str]) -> List[str]:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            tokens = translator.count_tokens(text)
+            self._queue.put_nowait(_PendingText(translator, text, tokens, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            await self._flush(batch)
+
+    async def _collect_batch(self) -> List[_PendingText]:
+        loop = asyncio.get_running_loop()
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = await self._queue.get()
+
+        batch = [first]
+        tokens = first.tokens
+        deadline = loop.time() + self.config.max_wait_ms / 1000
+
+        while (
+            len(batch) < self.config.max_batch_size
+            and tokens < self.config.max_batch_tokens
+        ):
+            timeout = deadline - loop.time()
+            if timeout <= 0 and self._queue.empty():
+                break
+            try:
+                if self._queue.empty():
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except asyncio.TimeoutError:
+                break
+
+            # A text that would blow the budget (or needs a reloaded model) starts the next batch
+            if (
+                tokens + item.tokens > self.config.max_batch_tokens
+                or item.translator is not first.translator
+            ):
+                self._carry = item
+                break
+            batch.append(item)
+            tokens += item.tokens
+
+        return batch
+
+    async def _flush(self, batch: List[_PendingText]) -> None:
+        loop = asyncio.get_running_loop()
+        translator = batch[0].translator
+        texts = [item.text for item in batch]
+        try:
+            translations = await loop.run_in_executor(
+                None, self._translate_batch, translator, texts
+            )
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        if len(translations) != len(batch):
+            error = RuntimeError(
+                f"Expected {len(batch)} translations, got {len(translations)}"
+            )
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(error)
+            return
+
+        for item, translation in zip(batch, translations):
+            if not item.future.done():
+                item.future.set_result(translation)
+
+    def _translate_batch(self, translator, texts: List[str]) -> List[str]:
+        start = time.perf_counter()
+        # The staged calls do what batch_translate() does, and leave the output
+        # ids at hand for the generated tokens metric
+        encoded = translator.encode_batch(texts, self.source_lang, self.target_lang)
+        generated = translator.generate_batch(
+            encoded, self.source_lang, self.target_lang
+        )
+        translations = translator.decode_batch(generated)
+        observe_generation(
+            translator, len(texts), time.perf_counter() - start, "micro_batch"
+        )
+        observe_generated(translator, generated)
+        return translations
+
+
+class MicroBatcherPool:
+    """Hands out one MicroBatcher per (model, source_lang, target_lang) key."""
+
+    def __init__(self):
+        self._batchers: Dict[Hashable, MicroBatcher] = {}
+
+    def get(
+        self,
+        key: Hashable,
+        source_lang: str,
+        target_lang: str,
+        config: Optional[MicroBatchConfig] = None,
+    ) -> MicroBatcher:
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            batcher = MicroBatcher(source_lang, target_lang, config)
+            self._batchers[key] = batcher
+        return batcher
@@ -0,0 +1,215 @@
+# model_cache.py
+import logging
+import gc
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional
+
+from library.resource_usage import (
+    PeakRssSampler,
+    current_rss_bytes,
+    llama_resident_bytes,
+    module_resident_bytes,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    translator: object
+    resident_bytes: int
+    load_seconds: float
+    loaded_at: float
+    last_used: float
+    # Highest RSS growth while loading, which can exceed resident_bytes when
+    # weights are copied or converted on the way
+    load_peak_bytes: int = 0
+    hits: int = 0
+
+
+class ModelCache:
+    """
+    Keeps loaded translators in memory and evicts the least recently used ones
+    once their combined resident size exceeds the configured budget.
+
+    Loads of the same key are serialized through a per-key lock so concurrent
+    first requests only load a model once; loads of different keys run in parallel.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], object]) -> object:
+        """Return the cached translator for key, calling loader() on a miss."""
+        translator = self._lookup(key)
+        if translator is not None:
+            return translator
+
+        with self._load_lock(key):
+            # Another request may have finished loading while we waited
+            translator = self._lookup(key)
+            if translator is not None:
+                return translator
+
+            with self._lock:
+                self.misses += 1
+
+            start = time.perf_counter()
+            with PeakRssSampler() as rss:
+                translator = loader()
+            load_seconds = time.perf_counter() - start
+            resident_bytes = self._measure(translator, rss.start_bytes)
+
+            now = time.time()
+            with self._lock:
+                self._entries[key] = CacheEntry(
+                    translator=translator,
+                    resident_bytes=resident_bytes,
+                    load_seconds=load_seconds,
+                    loaded_at=now,
+                    last_used=now,
+                    load_peak_bytes=rss.peak_increase_bytes,
+                )
+                self._entries.move_to_end(key)
+                evicted = self._evict_over_budget(keep=key)
+
+            if evicted:
+                self._release_memory()
+            logger.info(
+                "Loaded %s in %.1fs (%.0f MB resident, peak %.0f MB while loading)",
+                key,
+                load_seconds,
+                resident_bytes / 1024**2,
+                rss.peak_increase_bytes / 1024**2,
+            )
+            return translator
+
+    def evict(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.evictions += 1
+                self._drop_load_lock(key)
+        if entry is None:
+            return False
+        del entry
+        self._release_memory()
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self.evictions += len(self._entries)
+            for key in self._entries:
+                self._drop_load_lock(key)
+            self._entries.clear()
+        self._release_memory()
+
+    def stats(self) -> dict:
+        with self._lock:
+            models: List[dict] = [
+                {
+                    "key": [str(part) for part in key],
+                    "resident_bytes": entry.resident_bytes,
+                    "load_seconds": round(entry.load_seconds, 3),
+                    "load_peak_bytes": entry.load_peak_bytes,
+                    "hits": entry.hits,
+                    "loaded_at": entry.loaded_at,
+                    "last_used": entry.last_used,
+                }
+                for key, entry in self._entries.items()
+            ]
+            return {
+                "max_bytes": self.max_bytes,
+                "resident_bytes": sum(e.resident_bytes for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "models": models,
+            }
+
+    def _lookup(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.hits += 1
+            entry.hits += 1
+            entry.last_used = time.time()
+            self._entries.move_to_end(key)
+            return entry.translator
+
+    def _load_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def _drop_load_lock(self, key: Hashable) -> None:
+        """
+        Forget the load lock of an evicted key. Caller holds self._lock. A load of
+        key still in flight keeps its lock object; a new request takes a fresh one
+        and at worst loads the model once more.
+        """
+        lock = self._load_locks.get(key)
+        if lock is not None and not lock.locked():
+            del self._load_locks[key]
+
+    def _evict_over_budget(self, keep: Hashable) -> int:
+        """Drop least recently used entries until the budget fits. Caller holds self._lock."""
+        evicted = 0
+        total = sum(entry.resident_bytes for entry in self._entries.values())
+        for key in list(self._entries.keys()):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            entry = self._entries.pop(key)
+            total -= entry.resident_bytes
+            self.evictions += 1
+            self._drop_load_lock(key)
+            evicted += 1
+            logger.info("Evicted %s from model cache", key)
+        if total > self.max_bytes:
+            logger.warning(
+                "Model cache over budget: %.0f MB resident, budget %.0f MB",
+                total / 1024**2,
+                self.max_bytes / 1024**2,
+            )
+        return evicted
+
+    @staticmethod
+    def _measure(translator: object, rss_before: int) -> int:
+        """
+        Measure the memory held by a translator. Torch models are sized from their
+        parameters and buffers, llama.cpp slots from their GGUF weights and context
+        state; other backends (CTranslate2) fall back to the RSS growth observed
+        during the load.
+        """
+        resident_bytes = llama_resident_bytes(getattr(translator, "slots", None) or [])
+        for attribute in ("model", "translator", "llm"):
+            component = getattr(translator, attribute, None)
+            component_bytes = module_resident_bytes(component)
+            if not component_bytes:
+                # transformers pipelines keep the model one level down
+                component_bytes = module_resident_bytes(
+                    getattr(component, "model", None)
+                )
+            resident_bytes += component_bytes
+        if resident_bytes:
+            return resident_bytes
+        return max(current_rss_bytes() - rss_before, 0)
+
+    @staticmethod
+    def _release_memory() -> None:
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
@@ -1,51 +1,162 @@
 # model_handler.py
+import logging
 import os
 import shutil
 from pathlib import Path
-import huggingface_hub as hub
-import torch
-from transformers import PreTrainedModel, PreTrainedTokenizer
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    import torch
+
+logger = logging.getLogger(__name__)
+
+# Root of the local model store
+MODELS_DIR = Path(os.getenv("MODEL_DIR", "models"))
+
+DEFAULT_REVISION = "main"
+
+
+def is_offline() -> bool:
+    """Whether models must be resolved from MODELS_DIR alone, without the hub."""
+    return any(
+        os.getenv(name, "").lower() in ("1", "true", "yes")
+        for name in ("MODEL_OFFLINE", "HF_HUB_OFFLINE")
+    )
 
 
 class ModelHandler:
+    # Repository files none of the loaders need
+    IGNORE_PATTERNS = [
+        "flax_model.msgpack",
+        "tf_model.h5",
+        "rust_model.ot",
+        "model.npz.best-chrf.npz",
+        "325orch_model.bin",
+        "optimizer.pt",
+    ]
+
+    @staticmethod
+    def split_revision(model_name: str) -> Tuple[str, str]:
+        """Split "org/name@revision" into repo id and revision (default: main)."""
+        repo_id, _, revision = model_name.partition("@")
+        return repo_id, revision or DEFAULT_REVISION
+
+    @staticmethod
+    def local_model_path(model_name: str) -> Path:
+        """Store directory of a model, keyed on its full repo id and revision."""
+        repo_id, revision = ModelHandler.split_revision(model_name)
+        return MODELS_DIR / repo_id.replace("/", "--") / revision
+
+    @staticmethod
+    def find_local_model(model_name: str) -> Optional[Path]:
+        """The local directory of a model if it has been fetched, else None."""
+        model_path = ModelHandler.local_model_path(model_name)
+        if model_path.exists():
+            return model_path
+        # Layout of older versions: models/<name>, copied from the hub's main branch
+        repo_id, revision = ModelHandler.split_revision(model_name)
+        legacy_path = MODELS_DIR / repo_id.split("/")[-1]
+        if revision == DEFAULT_REVISION and legacy_path.exists():
+            return legacy_path
+        return None
+
     @staticmethod
     def download_model(model_name: str) -> Path:
-        model_path = Path("models") / model_name.split("/")[-1]
+        """
+        Return the local directory of model_name ("org/name" or "org/name@revision"),
+        fetching it on first use. The files are hard-linked from the Hugging Face
+        cache rather than copied, and a file lock makes concurrent loaders of the
+        same model wait for the first one instead of racing it. With MODEL_OFFLINE
+        (or HF_HUB_OFFLINE) set, only the local store is consulted.
+        """
+        model_path = ModelHandler.find_local_model(model_name)
+        if model_path is not None:
+            return model_path
 
-        if not model_path.exists():
-            try:
-                # Exclude files you don't need: flax_model.msgpack and tf_model.h5, rust_model.ot,model.safetensors
-                ignore_patterns = [
-                    "flax_model.msgpack",
-                    "tf_model.h5",
-                    "rust_model.ot",
-                    "model.npz.best-chrf.npz",
-                    "325orch_model.bin",
-                    "optimizer.pt",
-                ]
-
-                # Download only the necessary files
-                dirname = hub.snapshot_download(
-                    model_name,
-                    ignore_patterns=ignore_patterns,
-                    force_download=True,
-                )
+        model_path = ModelHandler.local_model_path(model_name)
+        if is_offline():
+            raise FileNotFoundError(
+                f"Model {model_name} is not in {model_path} and offline mode is on"
+            )
 
-                # Ensure dirname is not None
-                if dirname is None or not Path(dirname).exists():
-                    raise ValueError(
-                        f"Model download failed. No valid directory found for model: {model_name}"
-                    )
+        with ModelHandler.model_lock(model_path):
+            # Another process may have fetched it while we waited for the lock
+            if model_path.exists():
+                return model_path
 
-                # Copy the downloaded files to the models directory
-                shutil.copytree(dirname, model_path)
+            import huggingface_hub as hub
 
+            repo_id, revision = ModelHandler.split_revision(model_name)
+            try:
+                snapshot_path = hub.snapshot_download(
+                    repo_id,
+                    revision=revision,
+                    ignore_patterns=ModelHandler.IGNORE_PATTERNS,
+                )
             except Exception as e:
-                print(f"Error during model download: {e}")
-                raise e  # Re-raise the error after logging it
+                logger.error("Error during model download: %s", e)
+                raise
 
+            # Built next to the target and moved into place, so a crash never
+            # leaves a partial model behind
+            temporary_path = model_path.with_name(f".{model_path.name}.{os.getpid()}")
+            shutil.rmtree(temporary_path, ignore_errors=True)
+            method = ModelHandler._link_tree(Path(snapshot_path), temporary_path)
+            os.replace(temporary_path, model_path)
+            logger.info("Stored %s in %s (%s)", model_name, model_path, method)
         return model_path
 
     @staticmethod
-    def get_device() -> torch.device:
+    def model_lock(model_path: Path):
+        """
+        File lock for building model_path (a download, conversion or quantization),
+        so concurrent loaders in any process wait for the first one instead of
+        racing it. Re-check for the finished model after acquiring it.
+        """
+        from filelock import FileLock
+
+        model_path.parent.mkdir(parents=True, exist_ok=True)
+        return FileLock(f"{model_path}.lock")
+
+    @staticmethod
+    def _link_tree(source: Path, target: Path) -> str:
+        """
+        Recreate the files of source in target as hard links to the cache blobs,
+        falling back to symlinks, then copies (e.g. across file systems).
+
+        Returns:
+            The method(s) used
+        """
+        target.mkdir(parents=True)
+        methods = set()
+        for path in source.rglob("*"):
+            if path.is_dir():
+                continue
+            destination = target / path.relative_to(source)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            # Hub snapshots are symlinks into the blob store
+            blob = path.resolve()
+            try:
+                os.link(blob, destination)
+                methods.add("hardlink")
+            except OSError:
+                try:
+                    os.symlink(blob, destination)
+                    methods.add("symlink")
+                except OSError:
+                    shutil.copy2(blob, destination)
+                    methods.add("copy")
+        return "/".join(sorted(methods)) or "empty"
+
+    @staticmethod
+    def derived_model_path(model_name: str, variant: str) -> Path:
+        """Directory for a model converted or quantized from model_name."""
+        model_path = ModelHandler.local_model_path(model_name)
+        return model_path.with_name(f"{model_path.name}-{variant}")
+
+    @staticmethod
+    def get_device() -> "torch.device":
+        # Imported here so modules that only need paths stay free of torch
+        import torch
+
         return torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -1,13 +1,16 @@
 # nllb_translator.py
-from transformers import pipeline
-import torch
-from transformers.utils import logging
+import logging
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+from transformers.utils import logging as transformers_logging
 from library.base_translator import BaseTranslator
 from library.model_handler import ModelHandler
 from library.language_utils import LanguageUtils
-from typing import List, Union
+from library.segmenter import translate_long_text
+from typing import Dict, List
 
-logging.set_verbosity_error()
+logger = logging.getLogger(__name__)
+
+transformers_logging.set_verbosity_error()
 
 
 class NLLBTranslator(BaseTranslator):
@@ -18,50 +21,78 @@ class NLLBTranslator(BaseTranslator):
 
     def load_model(self) -> None:
         model_path = ModelHandler.download_model(self.model_name)
+        model = self._load_hf_model(AutoModelForSeq2SeqLM, model_path)
+        # A model already placed by accelerate (device_map) rejects a device argument
+        device = (
+            {} if getattr(model, "hf_device_map", None) else {"device": self.device}
+        )
         self.translator = pipeline(
             task="translation",
-            model=model_path,
-            torch_dtype=torch.bfloat16,
-            device=self.device,
+            model=model,
+            tokenizer=AutoTokenizer.from_pretrained(model_path),
+            **device,
         )
+        self.tokenizer = self.translator.tokenizer
 
     def translate(
         self, text: str, source_lang: str = "en", target_lang: str = "ar"
     ) -> str:
-        try:
-            nllb_src = LanguageUtils.get_nllb_language_code(source_lang)
-            nllb_tgt = LanguageUtils.get_nllb_language_code(target_lang)
-            print(f"Translating from {nllb_src} to {nllb_tgt}")
-            output = self.translator(
-                text,
-                src_lang=nllb_src,
-                tgt_lang=nllb_tgt,
-                max_length=self.config.max_new_tokens,
-                num_beams=self.config.num_beams,
-                length_penalty=self.config.length_penalty,
-            )
-            return output[0]["translation_text"]
-        except Exception as e:
-            print(f"An error occurred during translation: {str(e)}")
-            return text
+        # Not through self.translator: the pipeline sets tokenizer.src_lang without
+        # the lock that encode_batch() holds
+        if self.count_tokens(text) > self.max_input_tokens():
+            return translate_long_text(self, text, source_lang, target_lang)
+        return self.batch_translate([text], source_lang, target_lang)[0]
+
+    def encode_batch(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ):
+        return self._tokenize_source(
+            LanguageUtils.get_nllb_language_code(source_lang),
+            texts,
+            padding=True,
+            truncation=True,
+            return_tensors="pt",
+        )
+
+    def generate_batch(self, encoded, source_lang: str = "en", target_lang: str = "ar"):
+        nllb_tgt = LanguageUtils.get_nllb_language_code(target_lang)
+        generated_tokens = self.translator.model.generate(
+            **encoded.to(self.device),
+            forced_bos_token_id=self.tokenizer.convert_tokens_to_ids(nllb_tgt),
+            max_length=self.config.max_new_tokens,
+            num_beams=self.config.num_beams,
+            length_penalty=self.config.length_penalty,
+        )
+        return generated_tokens.cpu()
+
+    def generate_batch_multi(
+        self, encoded, source_lang: str, target_langs: List[str]
+    ) -> Dict:
+        return self._generate_with_shared_encoder(
+            self.translator.model,
+            encoded,
+            {
+                target_lang: self.tokenizer.convert_tokens_to_ids(
+                    LanguageUtils.get_nllb_language_code(target_lang)
+                )
+                for target_lang in target_langs
+            },
+            max_length=self.config.max_new_tokens,
+            num_beams=self.config.num_beams,
+            length_penalty=self.config.length_penalty,
+        )
+
+    def decode_batch(self, generated) -> List[str]:
+        return self.tokenizer.batch_decode(generated, skip_special_tokens=True)
 
     def batch_translate(
         self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
     ) -> List[str]:
-        try:
-            nllb_src = LanguageUtils.get_nllb_language_code(source_lang)
-            nllb_tgt = LanguageUtils.get_nllb_language_code(target_lang)
-            print(f"Translating from {nllb_src} to {nllb_tgt}")
+        nllb_src = LanguageUtils.get_nllb_language_code(source_lang)
+        nllb_tgt = LanguageUtils.get_nllb_language_code(target_lang)
+        logger.debug("Translating from %s to %s", nllb_src, nllb_tgt)
 
-            outputs = self.translator(
-                texts,
-                src_lang=nllb_src,
-                tgt_lang=nllb_tgt,
-                max_length=self.config.max_new_tokens,
-                num_beams=self.config.num_beams,
-                length_penalty=self.config.length_penalty,
-            )
-            return [output["translation_text"] for output in outputs]
-        except Exception as e:
-            print(f"An error occurred during batch translation: {str(e)}")
-            return texts
+        # One padded generate() call instead of the pipeline's per-text loop
+        encoded = self.encode_batch(texts, source_lang, target_lang)
+        generated = self.generate_batch(encoded, source_lang, target_lang)
+        return self.decode_batch(generated)
@@ -0,0 +1,72 @@
+# onnx_translator.py
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from transformers import MarianTokenizer
+
+from library.model_handler import ModelHandler
+from library.opus_translator import OpusTranslator
+
+logger = logging.getLogger(__name__)
+
+try:
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+except ImportError:  # Optional dependency: pip install "optimum[onnxruntime]"
+    ORTModelForSeq2SeqLM = None
+
+
+class OnnxOpusTranslator(OpusTranslator):
+    """
+    Opus (Marian) translator running on ONNX Runtime. On first use the checkpoint
+    is exported to an encoder and a decoder-with-past graph, cached as
+    models/<name>-onnx; beam and greedy search reuse the decoder's KV cache.
+    The graphs are exported in fp32 whatever TranslationConfig.precision says.
+    """
+
+    def load_model(self) -> None:
+        if ORTModelForSeq2SeqLM is None:
+            raise ImportError(
+                'The onnx backend needs optimum: pip install "optimum[onnxruntime]"'
+            )
+        model_path = ModelHandler.download_model(self.model_name)
+        onnx_path = self.export(self.model_name, model_path)
+        provider = (
+            "CUDAExecutionProvider"
+            if self.device.type == "cuda"
+            else "CPUExecutionProvider"
+        )
+        logger.info("Loading %s with ONNX Runtime (%s)", onnx_path, provider)
+        self.model = ORTModelForSeq2SeqLM.from_pretrained(
+            onnx_path, use_cache=True, provider=provider
+        )
+        self.tokenizer = MarianTokenizer.from_pretrained(
+            model_path, clean_up_tokenization_spaces=False
+        )
+
+    def resolved_precision(self) -> str:
+        return "onnx-fp32"
+
+    @staticmethod
+    def export(model_name: str, model_path: Path) -> Path:
+        """Export a transformers checkpoint to ONNX once and return its path."""
+        onnx_path = ModelHandler.derived_model_path(model_name, "onnx")
+        if (onnx_path / "encoder_model.onnx").exists():
+            return onnx_path
+
+        with ModelHandler.model_lock(onnx_path):
+            # Another loader may have exported it while we waited for the lock
+            if (onnx_path / "encoder_model.onnx").exists():
+                return onnx_path
+
+            logger.info("Exporting %s to ONNX", model_name)
+            temporary_path = onnx_path.with_name(f".{onnx_path.name}.{os.getpid()}")
+            model = ORTModelForSeq2SeqLM.from_pretrained(
+                model_path, export=True, use_cache=True
+            )
+            model.save_pretrained(temporary_path)
+            if onnx_path.exists():
+                shutil.rmtree(onnx_path)
+            os.replace(temporary_path, onnx_path)
+        return onnx_path
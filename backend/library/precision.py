@@ -0,0 +1,143 @@
+# precision.py
+import logging
+import os
+from pathlib import Path
+
+import torch
+import transformers
+from transformers.utils import is_accelerate_available
+
+from library.model_handler import ModelHandler
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("auto", "fp32", "bf16", "fp16", "int8")
+
+# int8 models are loaded in fp32 and then quantized
+TORCH_DTYPES = {
+    "fp32": torch.float32,
+    "bf16": torch.bfloat16,
+    "fp16": torch.float16,
+    "int8": torch.float32,
+}
+
+CT2_COMPUTE_TYPES = {
+    "fp32": "float32",
+    "bf16": "bfloat16",
+    "fp16": "float16",
+    "int8": "int8",
+}
+
+
+def has_quantized_engine() -> bool:
+    engines = torch.backends.quantized.supported_engines
+    return any(engine in engines for engine in ("x86", "fbgemm", "qnnpack"))
+
+
+def resolve_precision(precision: str, device: torch.device) -> str:
+    """Turn a TranslationConfig.precision into the concrete precision for device."""
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Unsupported precision: {precision} (expected one of {', '.join(PRECISIONS)})"
+        )
+    if device.type == "cuda":
+        if precision == "auto":
+            return "bf16" if torch.cuda.is_bf16_supported() else "fp16"
+        if precision == "int8":
+            # Dynamic quantization only has CPU kernels
+            logger.warning("int8 precision is only supported on CPU, using fp16")
+            return "fp16"
+        return precision
+    if precision == "auto":
+        # int8 is faster but changes the translations, so it is only used when
+        # asked for explicitly
+        return "fp32"
+    if precision == "int8" and not has_quantized_engine():
+        logger.warning("No quantized engine for int8 on this CPU, using fp32")
+        return "fp32"
+    return precision
+
+
+def ct2_compute_type(precision: str, device: torch.device) -> str:
+    """CTranslate2 compute_type for a TranslationConfig.precision."""
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Unsupported precision: {precision} (expected one of {', '.join(PRECISIONS)})"
+        )
+    if precision == "auto":
+        # The type the weights were saved in, i.e. unquantized for converted models
+        return "default"
+    # CTranslate2 has int8 kernels on both CPU and CUDA
+    if precision == "int8":
+        return "int8_float16" if device.type == "cuda" else "int8"
+    return CT2_COMPUTE_TYPES[precision]
+
+
+def low_copy_load_kwargs(model_path, device) -> dict:
+    """
+    from_pretrained() arguments that keep a single copy of the weights in memory
+    while loading: safetensors checkpoints are memory-mapped, and with accelerate
+    the parameters are allocated empty and filled from the checkpoint directly
+    on device, instead of building a randomly initialized fp32 model in RAM first.
+    """
+    load_kwargs = {}
+    if any(Path(model_path).glob("*.safetensors")):
+        load_kwargs["use_safetensors"] = True
+    if is_accelerate_available():
+        load_kwargs["low_cpu_mem_usage"] = True
+        load_kwargs["device_map"] = {"": str(device)}
+    return load_kwargs
+
+
+def load_hf_model(
+    model_class, model_path, model_name: str, precision: str, device, **kwargs
+):
+    """
+    Load a transformers model at a resolved precision. int8 models are quantized
+    once and the result is cached under models/, keyed on the torch and
+    transformers versions that pickled it.
+    """
+    if precision != "int8":
+        load_kwargs = low_copy_load_kwargs(model_path, device)
+        model = model_class.from_pretrained(
+            model_path,
+            torch_dtype=TORCH_DTYPES[precision],
+            **load_kwargs,
+            **kwargs,
+        )
+        return model if "device_map" in load_kwargs else model.to(device)
+
+    quantized_path = (
+        ModelHandler.derived_model_path(
+            model_name,
+            f"int8-torch{torch.__version__}-transformers{transformers.__version__}",
+        )
+        / "model.pt"
+    )
+    if quantized_path.exists():
+        # Memory-mapped rather than read into a second buffer
+        return torch.load(quantized_path, weights_only=False, mmap=True)
+
+    with ModelHandler.model_lock(quantized_path.parent):
+        # Another loader may have quantized it while we waited for the lock
+        if quantized_path.exists():
+            return torch.load(quantized_path, weights_only=False, mmap=True)
+
+        logger.info("Quantizing %s to int8", model_name)
+        model = model_class.from_pretrained(
+            model_path,
+            torch_dtype=torch.float32,
+            **low_copy_load_kwargs(model_path, torch.device("cpu")),
+            **kwargs,
+        )
+        model.eval()
+        quantized = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        quantized_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = quantized_path.with_name(
+            f".{os.getpid()}.{quantized_path.name}"
+        )
+        torch.save(quantized, temporary_path)
+        os.replace(temporary_path, quantized_path)
+    return quantized
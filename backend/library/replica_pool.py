@@ -0,0 +1,203 @@
+# replica_pool.py
+import logging
+import math
+import multiprocessing
+import os
+from typing import Iterator, List, Optional, Tuple
+
+from library.batching import token_budget_batches
+from library.config import TranslationConfig
+from library.log_utils import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Set in each replica process by _init_replica
+_translator = None
+_ready_barrier = None
+_init_error: Optional[str] = None
+
+
+def _init_replica(
+    model, model_name: str, config: TranslationConfig, threads: int, ready_barrier
+) -> None:
+    """
+    Load one model replica, pinned to its share of the CPU cores. A failure is
+    kept for _wait_ready to report: raising here would make the pool respawn the
+    process and retry the load forever.
+    """
+    global _translator, _ready_barrier, _init_error
+    _ready_barrier = ready_barrier
+    configure_logging()
+    # Must be set before torch is imported to size its OpenMP pool
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+
+        from library.translator_registry import create_translator
+
+        _translator = create_translator(model, model_name, config)
+    except Exception as e:
+        logger.exception("Could not load replica of %s", model_name)
+        _init_error = f"{type(e).__name__}: {e}"
+
+
+def _wait_ready(_) -> Optional[str]:
+    """Wait until every replica has loaded and return this one's load error, if any."""
+    # Every replica blocks here until all have loaded, so each one takes exactly one call
+    _ready_barrier.wait()
+    return _init_error
+
+
+def _translate_shard(args: Tuple[List[str], str, str, int]) -> List[str]:
+    texts, source_lang, target_lang, max_batch_size = args
+    lengths = [_translator.count_tokens(text) for text in texts]
+    translations: List[Optional[str]] = [None] * len(texts)
+    for indices in token_budget_batches(
+        lengths, _translator.config.max_batch_tokens, max_batch_size=max_batch_size
+    ):
+        translated = _translator.batch_translate(
+            [texts[i] for i in indices], source_lang, target_lang
+        )
+        for i, translation in zip(indices, translated):
+            translations[i] = translation
+    return translations
+
+
+class ReplicaPool:
+    """
+    Pool of worker processes that each hold their own replica of a model, for CPU
+    nodes where a single process leaves cores idle during generation.
+
+    Every replica gets threads_per_replica torch threads (default: the CPU cores
+    divided evenly). SubtitleProcessor hands it contiguous shards of a file and
+    merges the results back in order. It exposes model_name and config so it can
+    stand in for the translator it replicates.
+    """
+
+    def __init__(
+        self,
+        model,
+        model_name: str,
+        config: Optional[TranslationConfig] = None,
+        replicas: int = 2,
+        threads_per_replica: Optional[int] = None,
+        shards_per_replica: int = 4,
+        start_timeout: Optional[float] = 600.0,
+    ):
+        self.model = model
+        self.model_name = model_name
+        self.config = config or TranslationConfig()
+        self.replicas = max(1, replicas)
+        self.threads_per_replica = threads_per_replica or max(
+            1, (os.cpu_count() or 1) // self.replicas
+        )
+        # More shards than replicas keeps them all busy when shards differ in cost
+        self.shards_per_replica = shards_per_replica
+        # Seconds start() waits for the replicas to load, which also bounds the
+        # wait when a replica process dies (e.g. out of memory) and is respawned
+        self.start_timeout = start_timeout
+        self._pool = None
+
+    def start(self) -> None:
+        """
+        Start the replicas and wait until each one has loaded its model.
+
+        Raises:
+            RuntimeError: If a replica failed to load or they did not all load
+                within start_timeout; the pool is shut down first
+        """
+        if self._pool is not None:
+            return
+        # spawn gives every replica a clean interpreter, so the thread settings
+        # take effect before torch is first imported
+        context = multiprocessing.get_context("spawn")
+        ready_barrier = context.Barrier(self.replicas)
+        pool = context.Pool(
+            processes=self.replicas,
+            initializer=_init_replica,
+            initargs=(
+                self.model,
+                self.model_name,
+                self.config,
+                self.threads_per_replica,
+                ready_barrier,
+            ),
+        )
+        try:
+            errors = pool.map_async(_wait_ready, range(self.replicas), chunksize=1).get(
+                timeout=self.start_timeout
+            )
+        except multiprocessing.TimeoutError:
+            errors = [f"replicas did not load within {self.start_timeout}s"]
+        errors = [error for error in errors if error is not None]
+        if errors:
+            pool.terminate()
+            pool.join()
+            raise RuntimeError(
+                f"Could not start replicas of {self.model_name}: {errors[0]}"
+            )
+        self._pool = pool
+        logger.info(
+            "Started %d replicas of %s with %d threads each",
+            self.replicas,
+            self.model_name,
+            self.threads_per_replica,
+        )
+
+    @property
+    def deterministic(self) -> bool:
+        # llama.cpp replicas sample their translations
+        from library.translator_registry import GGUF_MODELS
+
+        return self.model not in GGUF_MODELS
+
+    def resolved_precision(self) -> str:
+        """Precision the replicas run in, as reported by their translators."""
+        import torch
+
+        from library.translator_registry import model_precision
+
+        return model_precision(self.model, self.config, torch.device("cpu"))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def shard_size(self, count: int) -> int:
+        return max(1, math.ceil(count / (self.replicas * self.shards_per_replica)))
+
+    def translate_shards(
+        self,
+        shards: List[List[str]],
+        source_lang: str,
+        target_lang: str,
+        max_batch_size: Optional[int] = None,
+    ) -> Iterator[List[str]]:
+        """Translate shards across the replicas, yielding results in shard order."""
+        self.start()
+        return self._pool.imap(
+            _translate_shard,
+            [(texts, source_lang, target_lang, max_batch_size) for texts in shards],
+            chunksize=1,
+        )
+
+    def batch_translate(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[str]:
+        size = self.shard_size(len(texts))
+        shards = [texts[i : i + size] for i in range(0, len(texts), size)]
+        return [
+            translation
+            for translated in self.translate_shards(shards, source_lang, target_lang)
+            for translation in translated
+        ]
+
+    def count_tokens(self, text: str) -> int:
+        # Batches are formed by token count inside the replicas; this is only a
+        # rough figure for callers that size work in the parent process
+        return len(text.split())
@@ -0,0 +1,142 @@
+# resource_usage.py
+import os
+import sys
+import threading
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss_bytes() -> int:
+    """Return the resident set size of the current process in bytes (0 if unknown)."""
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return peak_rss_bytes()
+
+
+class PeakRssSampler:
+    """
+    Samples the resident set size from a background thread while a block runs,
+    to find the peak of that block alone (peak_rss_bytes() covers the whole
+    process lifetime):
+
+        with PeakRssSampler() as rss:
+            load()
+        rss.peak_increase_bytes
+    """
+
+    def __init__(self, interval_seconds: float = 0.05):
+        self.interval_seconds = interval_seconds
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def peak_increase_bytes(self) -> int:
+        return max(self.peak_bytes - self.start_bytes, 0)
+
+    def __enter__(self) -> "PeakRssSampler":
+        self.start_bytes = self.peak_bytes = current_rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="rss-sampler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self._sample()
+
+    def _sample(self) -> None:
+        self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size of the current process in bytes (0 if unknown)."""
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def module_resident_bytes(module) -> int:
+    """
+    Sum the weight and buffer bytes of a torch module (0 for anything else). The
+    state dict is used so the packed weights of quantized layers count too.
+    """
+    if not hasattr(module, "state_dict"):
+        return 0
+    seen = set()
+    return sum(
+        _tensor_bytes(value, seen)
+        for value in module.state_dict(keep_vars=True).values()
+    )
+
+
+def _tensor_bytes(value, seen: set) -> int:
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item, seen) for item in value)
+    if not hasattr(value, "element_size"):
+        return 0
+    # Tied weights appear once per module that uses them
+    key = (value.data_ptr(), value.numel())
+    if key in seen:
+        return 0
+    seen.add(key)
+    return value.numel() * value.element_size()
+
+
+def llama_resident_bytes(contexts) -> int:
+    """
+    Size llama.cpp contexts (llama_cpp.Llama) from their GGUF weights plus each
+    context's state (KV cache and logits). Contexts over the same memory-mapped
+    file share its pages, so the weights count once per file.
+    """
+    weight_bytes = {}
+    state_bytes = 0
+    for context in contexts:
+        model_path = getattr(context, "model_path", None)
+        if model_path is None:
+            continue
+        if model_path not in weight_bytes:
+            try:
+                weight_bytes[model_path] = os.path.getsize(model_path)
+            except OSError:
+                weight_bytes[model_path] = 0
+        state_bytes += _llama_state_bytes(context)
+    return sum(weight_bytes.values()) + state_bytes
+
+
+def _llama_state_bytes(context) -> int:
+    llama_cpp = sys.modules.get("llama_cpp")
+    # Renamed from llama_get_state_size in llama-cpp-python 0.2.77
+    state_size = getattr(llama_cpp, "llama_state_get_size", None) or getattr(
+        llama_cpp, "llama_get_state_size", None
+    )
+    if state_size is None:
+        return 0
+    try:
+        return int(state_size(context.ctx))
+    except Exception:
+        return 0
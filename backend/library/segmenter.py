@@ -0,0 +1,118 @@
+# segmenter.py
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from library.batching import token_budget_batches
+
+# Sentence ends: Latin, Arabic and CJK terminators followed by whitespace
+_SENTENCE_END = re.compile(r"(?<=[.!?…؟。！？])\s+")
+
+
+@dataclass
+class Segmentation:
+    """
+    Chunks of a text that each fit the model, and for every line of the text the
+    indices of its chunks, so translations can be put back on the original lines.
+    """
+
+    chunks: List[str]
+    lines: List[List[int]]
+
+    def reassemble(self, translations: List[str]) -> str:
+        return "\n".join(
+            " ".join(translations[i].strip() for i in line) for line in self.lines
+        )
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+def segment_text(
+    text: str, count_tokens: Callable[[str], int], max_tokens: int
+) -> Segmentation:
+    """
+    Split text on line breaks and sentence boundaries into chunks of at most
+    max_tokens as measured by count_tokens. Consecutive sentences of a line are
+    packed into the same chunk while they fit; a sentence longer than max_tokens
+    is split between words.
+    """
+    # Special tokens (e.g. </s>) are counted once per chunk, not once per piece
+    overhead = count_tokens("")
+    budget = max(max_tokens - overhead, 1)
+
+    chunks: List[str] = []
+    lines: List[List[int]] = []
+    for line in text.split("\n"):
+        pieces = []
+        for sentence in split_sentences(line):
+            if count_tokens(sentence) - overhead <= budget:
+                pieces.append(sentence)
+            else:
+                pieces.extend(_split_words(sentence, count_tokens, overhead, budget))
+
+        line_chunks: List[int] = []
+        current: List[str] = []
+        current_tokens = 0
+        for piece in pieces:
+            piece_tokens = count_tokens(piece) - overhead
+            if current and current_tokens + piece_tokens > budget:
+                line_chunks.append(len(chunks))
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+        if current:
+            line_chunks.append(len(chunks))
+            chunks.append(" ".join(current))
+        lines.append(line_chunks)
+    return Segmentation(chunks=chunks, lines=lines)
+
+
+def _split_words(
+    sentence: str, count_tokens: Callable[[str], int], overhead: int, budget: int
+) -> List[str]:
+    pieces: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for word in sentence.split():
+        word_tokens = count_tokens(word) - overhead
+        if current and current_tokens + word_tokens > budget:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def translate_long_text(
+    translator,
+    text: str,
+    source_lang: str,
+    target_lang: str,
+    max_batch_tokens: Optional[int] = None,
+) -> str:
+    """
+    Translate a text longer than the model's input limit: segment it against
+    translator.max_input_tokens(), translate the chunks with batch_translate()
+    in token-budgeted batches and join the translations on the original lines.
+    """
+    segmentation = segment_text(
+        text, translator.count_tokens, translator.max_input_tokens()
+    )
+    lengths = [translator.count_tokens(chunk) for chunk in segmentation.chunks]
+    translations = [""] * len(segmentation.chunks)
+    for indices in token_budget_batches(
+        lengths,
+        max_batch_tokens or translator.config.max_batch_tokens,
+        max_batch_size=translator.config.batch_size,
+    ):
+        batch = translator.batch_translate(
+            [segmentation.chunks[i] for i in indices], source_lang, target_lang
+        )
+        for i, translation in zip(indices, batch):
+            translations[i] = translation
+    return segmentation.reassemble(translations)
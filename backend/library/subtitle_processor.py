@@ -1,7 +1,22 @@
+import logging
+import os
+import queue
 import re
-from typing import List, Dict, Union
+import threading
+import time
+from typing import Callable, List, Dict, Optional, Union
 from dataclasses import dataclass
 
+from library.batching import token_budget_batches
+from library.checkpoint_journal import CheckpointJournal
+from library.log_utils import RateLimitedLogger
+from library.replica_pool import ReplicaPool
+from library.translation_memory import TranslationMemory
+from library.tracing import span
+from library.translation_pipeline import StageStats, TranslationPipeline
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class Subtitle:
@@ -10,6 +25,87 @@ class Subtitle:
     text: str
 
 
+def normalize_text(text: str) -> str:
+    """Key under which cues count as the same text: whitespace runs collapsed."""
+    return " ".join(text.split())
+
+
+class IncrementalSubtitleWriter:
+    """
+    Writes cues to output_path in file order from its own thread, as soon as every
+    earlier cue has been translated. Output goes to a ".part" file that close()
+    completes and moves into place, so readers never see a half-written file.
+    """
+
+    def __init__(self, subtitles: List[Subtitle], output_path: str):
+        self.subtitles = subtitles
+        self.output_path = output_path
+        self.stats = StageStats("write")
+        self._part_path = f"{output_path}.part"
+        self._positions = {id(subtitle): i for i, subtitle in enumerate(subtitles)}
+        self._done = [False] * len(subtitles)
+        self._next = 0
+        self._error: Optional[Exception] = None
+        self._queue: queue.Queue = queue.Queue()
+        self._file = open(self._part_path, "w", encoding="utf-8")
+        self._thread = threading.Thread(
+            target=self._run, name="pipeline-write", daemon=True
+        )
+        self._thread.start()
+
+    def mark_done(self, subtitles: List[Subtitle]) -> None:
+        self._queue.put(list(subtitles))
+
+    def close(self) -> None:
+        """Write the remaining cues, translated or not, and move the file into place."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            self.abort()
+            raise self._error
+        self._write_until(len(self.subtitles))
+        self._file.close()
+        os.replace(self._part_path, self.output_path)
+
+    def abort(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._file.close()
+        if os.path.exists(self._part_path):
+            os.remove(self._part_path)
+
+    def _run(self) -> None:
+        while True:
+            subtitles = self._queue.get()
+            if subtitles is None:
+                return
+            if self._error is not None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                with span("write", cues=len(subtitles)):
+                    for subtitle in subtitles:
+                        self._done[self._positions[id(subtitle)]] = True
+                    end = self._next
+                    while end < len(self._done) and self._done[end]:
+                        end += 1
+                    self._write_until(end)
+            except Exception as e:
+                self._error = e
+            self.stats.items += len(subtitles)
+            self.stats.busy_seconds += time.perf_counter() - start
+
+    def _write_until(self, end: int) -> None:
+        for subtitle in self.subtitles[self._next : end]:
+            self._file.write(f"{subtitle.index}\n")
+            self._file.write(f"{subtitle.timestamp}\n")
+            self._file.write(f"{subtitle.text}\n\n")
+        self._file.flush()
+        self._next = max(self._next, end)
+
+
 class SubtitleProcessor:
     def __init__(
         self,
@@ -18,66 +114,341 @@ class SubtitleProcessor:
         target_lang: str = "ar",
         batch_size: int = 5,
         batch_processing: bool = False,
+        progress_callback: Optional[
+            Callable[[int, int, List["Subtitle"]], None]
+        ] = None,
+        translation_memory=None,
+        max_batch_tokens: Optional[int] = None,
+        sort_window: Optional[int] = 512,
+        checkpoint_dir: Optional[str] = None,
     ):
         self.translator = translator
         self.source_lang = source_lang
         self.target_lang = target_lang
         self.batch_size = batch_size
         self.batch_processing = batch_processing
+        # Batches are formed by padded token count; batch_size only caps the cue count
+        self.max_batch_tokens = max_batch_tokens or translator.config.max_batch_tokens
+        # Cues are length-sorted within windows of this size so output can be
+        # written incrementally; None sorts the whole file at once
+        self.sort_window = sort_window
+        # Directory for resumable journals of finished translations (None disables them)
+        self.checkpoint_dir = checkpoint_dir
+        self._journal: Optional[CheckpointJournal] = None
+        # Called as progress_callback(cues_done, cues_total, newly_translated_cues)
+        self.progress_callback = progress_callback
+        # Optional TranslationMemory consulted before any model call
+        self.translation_memory = translation_memory
+        # Its key for the translator's settings; None for sampled translations,
+        # which are only journaled
+        self._memory_settings = (
+            TranslationMemory.translator_settings(translator)
+            if translation_memory is not None
+            else None
+        )
+        self._cues_done = 0
+        self._cues_total = 0
+        # Cues sharing the text of a unique representative cue, keyed by id()
+        self._duplicates: Dict[int, List[Subtitle]] = {}
+        # Per-file figures (cue count, unique texts, dedup ratio, stage
+        # utilization) of the last run
+        self.stats: Dict[str, Union[int, float, dict]] = {}
+        self._stage_stats: List[StageStats] = []
+        self._writer: Optional[IncrementalSubtitleWriter] = None
+        # Per-batch and per-cue progress lines are throttled
+        self._progress_logger = RateLimitedLogger(logger)
 
     def process_file(self, input_path: str, output_path: str) -> None:
-        subtitles = self._extract_subtitles(input_path)
-        translated_subtitles = self._process_subtitles(subtitles)
-        self._write_subtitles(translated_subtitles, output_path)
+        start = time.perf_counter()
+        with span("parse", input_path=input_path):
+            subtitles = self._extract_subtitles(input_path)
+        self._stage_stats = [
+            StageStats("parse", len(subtitles), time.perf_counter() - start)
+        ]
 
-    def _process_subtitles(self, subtitles: List[Subtitle]) -> List[Subtitle]:
-        if self.batch_processing:
-            return self._batch_process_subtitles(subtitles)
-        return self._individual_process_subtitles(subtitles)
+        pending = self.begin_file(input_path, output_path, subtitles)
+        try:
+            self._process_subtitles(pending)
+        except Exception:
+            self.abort_file()
+            raise
+        self._stage_stats.append(self.finish_file())
 
-    def _batch_process_subtitles(self, subtitles: List[Subtitle]) -> List[Subtitle]:
-        print("Batch processing subtitles...")
+        wall_seconds = time.perf_counter() - start
+        self.stats["wall_seconds"] = round(wall_seconds, 3)
+        self.stats["stages"] = {
+            stage.name: stage.to_dict(wall_seconds) for stage in self._stage_stats
+        }
+        logger.info(
+            "Stage utilization: %s",
+            ", ".join(
+                f"{name} {stage['utilization']:.0%}"
+                for name, stage in self.stats["stages"].items()
+            ),
+        )
+
+    # begin_file(), deliver() and finish_file() (or abort_file()) let a caller
+    # that does its own batching, like MultiTargetSubtitleProcessor, use this
+    # processor's dedup, journal, translation memory and output writer.
+
+    def begin_file(
+        self, input_path: str, output_path: str, subtitles: List[Subtitle]
+    ) -> List[Subtitle]:
+        """
+        Set up the checkpoint journal and the output writer for a file, and
+        return the cues left to translate: one per distinct text, without those
+        the journal or the translation memory already know.
+        """
+        if self.checkpoint_dir is not None:
+            self._journal = CheckpointJournal(
+                self._checkpoint_path(input_path, self.checkpoint_dir)
+            )
+        self._writer = IncrementalSubtitleWriter(subtitles, output_path)
         try:
-            model_inputs = []
-            results = []
-            total_subtitles = len(subtitles)
-
-            for i, subtitle in enumerate(subtitles):
-                print(f"Processing subtitle {i+1}/{total_subtitles}")
-                model_inputs.append(subtitle.text)
-
-                # Process when batch is full or at the end
-                if len(model_inputs) == self.batch_size or i == total_subtitles - 1:
-                    translations = self.translator.batch_translate(
-                        model_inputs,
-                        source_lang=self.source_lang,
-                        target_lang=self.target_lang,
-                    )
-
-                    # Process translations
-                    for translated_text in translations:
-                        # Check and fix leading dot
-                        if translated_text.startswith("."):
-                            translated_text = translated_text[1:] + "."
-                        results.append(translated_text)
-
-                    model_inputs = []
-
-            # Update subtitle texts with translations
-            for subtitle, translation in zip(subtitles, results):
-                subtitle.text = translation
+            return self._prepare(subtitles)
+        except Exception:
+            self.abort_file()
+            raise
 
-            return subtitles
+    def abort_file(self) -> None:
+        """Drop the partial output, keeping the journal so a re-run resumes."""
+        writer, self._writer = self._writer, None
+        journal, self._journal = self._journal, None
+        if writer is not None:
+            writer.abort()
+        if journal is not None:
+            # Keep the journal so a re-run resumes from here
+            journal.close()
+
+    def finish_file(self) -> StageStats:
+        """Complete the output file, drop the journal and return the writer's stats."""
+        writer, self._writer = self._writer, None
+        journal, self._journal = self._journal, None
+        writer.close()
+        if journal is not None:
+            journal.remove()
+        return writer.stats
 
-        except Exception as e:
-            print(f"An error occurred during batch processing: {str(e)}")
+    def _process_subtitles(self, pending: List[Subtitle]) -> List[Subtitle]:
+        if self.batch_processing:
+            self._batch_process_subtitles(pending)
+        else:
+            self._individual_process_subtitles(pending)
+        return pending
+
+    def _prepare(self, subtitles: List[Subtitle]) -> List[Subtitle]:
+        """Deduplicate and fill in known translations; return the cues left to translate."""
+        self._cues_done = 0
+        self._cues_total = len(subtitles)
+
+        pending = self._deduplicate(subtitles)
+        if self._journal is not None:
+            pending = self._apply_checkpoint(pending)
+        if self._memory_settings is not None:
+            pending = self._apply_translation_memory(pending)
+        return pending
+
+    def _deduplicate(self, subtitles: List[Subtitle]) -> List[Subtitle]:
+        """
+        Collapse cues with identical normalized text. Only the first cue of each
+        group is translated; _report_progress copies its translation to the rest.
+        """
+        groups: Dict[str, List[Subtitle]] = {}
+        for subtitle in subtitles:
+            groups.setdefault(normalize_text(subtitle.text), []).append(subtitle)
+
+        self._duplicates = {id(group[0]): group[1:] for group in groups.values()}
+        unique = [group[0] for group in groups.values()]
+
+        self.stats = {
+            "cues_total": len(subtitles),
+            "unique_texts": len(unique),
+            "dedup_ratio": (
+                round(1 - len(unique) / len(subtitles), 4) if subtitles else 0.0
+            ),
+        }
+        logger.info(
+            "Deduplicated %d cues into %d unique texts (dedup ratio %.1f%%)",
+            len(subtitles),
+            len(unique),
+            self.stats["dedup_ratio"] * 100,
+        )
+        return unique
+
+    def _report_progress(self, translated: List[Subtitle]) -> None:
+        # Scatter each translation to the cues that share its source text
+        scattered = []
+        for subtitle in translated:
+            scattered.append(subtitle)
+            for duplicate in self._duplicates.get(id(subtitle), []):
+                duplicate.text = subtitle.text
+                scattered.append(duplicate)
+
+        self._cues_done += len(scattered)
+        if self._writer is not None:
+            self._writer.mark_done(scattered)
+        if self.progress_callback is not None:
+            self.progress_callback(self._cues_done, self._cues_total, scattered)
+
+    def _apply_translation_memory(self, subtitles: List[Subtitle]) -> List[Subtitle]:
+        """Fill in remembered translations and return the subtitles still to translate."""
+        remembered = self.translation_memory.get_many(
+            self.translator.model_name,
+            self._memory_settings,
+            self.source_lang,
+            self.target_lang,
+            [subtitle.text for subtitle in subtitles],
+        )
+
+        pending, hits = [], []
+        for subtitle, translation in zip(subtitles, remembered):
+            if translation is None:
+                pending.append(subtitle)
+                continue
+            subtitle.text = self._postprocess(translation)
+            hits.append(subtitle)
+
+        logger.info(
+            "Translation memory: %d/%d cues remembered", len(hits), len(subtitles)
+        )
+        if hits:
+            self._report_progress(hits)
+        return pending
+
+    def _checkpoint_path(self, input_path: str, checkpoint_dir: str) -> str:
+        fingerprint = CheckpointJournal.fingerprint(
+            input_path,
+            self.translator.model_name,
+            TranslationMemory.settings_fingerprint(
+                self.translator.config, self.translator.resolved_precision()
+            ),
+            self.source_lang,
+            self.target_lang,
+        )
+        return os.path.join(checkpoint_dir, f"{fingerprint}.journal.jsonl")
+
+    def _apply_checkpoint(self, subtitles: List[Subtitle]) -> List[Subtitle]:
+        """Fill in translations journaled by an earlier run of the same job."""
+        journaled = self._journal.load()
+        if not journaled:
             return subtitles
 
-    def _process_batch(self, texts: List[str]) -> List[str]:
-        translations = self.translator.batch_translate(
-            texts, source_lang=self.source_lang, target_lang=self.target_lang
+        pending, resumed = [], []
+        for subtitle in subtitles:
+            translation = journaled.get(normalize_text(subtitle.text))
+            if translation is None:
+                pending.append(subtitle)
+                continue
+            subtitle.text = self._postprocess(translation)
+            resumed.append(subtitle)
+
+        logger.info(
+            "Resuming from checkpoint: %d texts already translated", len(resumed)
+        )
+        self.stats["resumed_texts"] = len(resumed)
+        if resumed:
+            self._report_progress(resumed)
+        return pending
+
+    def _remember(self, texts: List[str], translations: List[str]) -> None:
+        if self._journal is not None:
+            self._journal.append(texts, translations)
+        if self._memory_settings is None:
+            return
+        self.translation_memory.put_many(
+            self.translator.model_name,
+            self._memory_settings,
+            self.source_lang,
+            self.target_lang,
+            texts,
+            translations,
+        )
+
+    def _postprocess(self, translation: str) -> str:
+        if self.batch_processing:
+            return self._format_translation(translation)
+        return translation
+
+    def _batch_process_subtitles(self, subtitles: List[Subtitle]) -> List[Subtitle]:
+        if isinstance(self.translator, ReplicaPool):
+            return self._sharded_process_subtitles(subtitles)
+
+        # Tokenize everything up front so batches can be formed by padded length
+        lengths = [self.translator.count_tokens(s.text) for s in subtitles]
+        batches = token_budget_batches(
+            lengths,
+            self.max_batch_tokens,
+            max_batch_size=self.batch_size,
+            sort_window=self.sort_window,
         )
-        return [self._format_translation(t) for t in translations]
+        logger.info("Translating %d cues in %d batches", len(subtitles), len(batches))
+
+        def on_translated(batch_number: int, translations: List[str]) -> None:
+            self._progress_logger.info(
+                "Processed batch %d/%d",
+                batch_number + 1,
+                len(batches),
+                force=batch_number + 1 == len(batches),
+            )
+            self.deliver([subtitles[i] for i in batches[batch_number]], translations)
+
+        pipeline = TranslationPipeline(
+            self.translator, self.source_lang, self.target_lang
+        )
+        self._stage_stats.extend(
+            pipeline.run(
+                ([subtitles[i].text for i in indices] for indices in batches),
+                on_translated,
+            )
+        )
+
+        return subtitles
+
+    def _sharded_process_subtitles(self, subtitles: List[Subtitle]) -> List[Subtitle]:
+        """
+        Split the cues into contiguous shards and translate them on the replicas
+        of a ReplicaPool. Shards complete in order, so output is still written
+        incrementally.
+        """
+        size = self.translator.shard_size(len(subtitles))
+        shards = [subtitles[i : i + size] for i in range(0, len(subtitles), size)]
+        logger.info(
+            "Translating %d cues in %d shards on %d replicas",
+            len(subtitles),
+            len(shards),
+            self.translator.replicas,
+        )
+
+        start = time.perf_counter()
+        results = self.translator.translate_shards(
+            [[subtitle.text for subtitle in shard] for shard in shards],
+            self.source_lang,
+            self.target_lang,
+            max_batch_size=self.batch_size,
+        )
+        for shard_number, (shard, translations) in enumerate(zip(shards, results)):
+            self._progress_logger.info(
+                "Processed shard %d/%d",
+                shard_number + 1,
+                len(shards),
+                force=shard_number + 1 == len(shards),
+            )
+            self.deliver(shard, translations)
+        self._stage_stats.append(
+            StageStats("replicas", len(shards), time.perf_counter() - start)
+        )
+        return subtitles
+
+    def deliver(self, batch: List[Subtitle], translations: List[str]) -> None:
+        """Record the translations of cues returned by begin_file() and write them out."""
+        self._remember([subtitle.text for subtitle in batch], translations)
+
+        # Writing through the Subtitle objects restores the original order
+        for batch_subtitle, translated_text in zip(batch, translations):
+            # Check and fix leading dot
+            batch_subtitle.text = self._postprocess(translated_text)
+
+        self._report_progress(batch)
 
     def _individual_process_subtitles(
         self, subtitles: List[Subtitle]
@@ -85,7 +456,12 @@ class SubtitleProcessor:
         total_subtitles = len(subtitles)
 
         for i, subtitle in enumerate(subtitles):
-            print(f"Processing subtitle {subtitle.index}/{total_subtitles}")
+            self._progress_logger.info(
+                "Processing subtitle %d/%d",
+                i + 1,
+                total_subtitles,
+                force=i + 1 == total_subtitles,
+            )
             translation = self.translator.translate(
                 subtitle.text,
                 source_lang=self.source_lang,
@@ -95,7 +471,9 @@ class SubtitleProcessor:
             if isinstance(translation, list):
                 translation = translation[0]
 
-            subtitle.text = translation
+            self._remember([subtitle.text], [translation])
+            subtitle.text = self._postprocess(translation)
+            self._report_progress([subtitle])
 
         return subtitles
 
@@ -133,19 +511,199 @@ class SubtitleProcessor:
                 subtitles.append(subtitle)
 
         except FileNotFoundError:
-            print(f"Error: The file '{file_path}' was not found.")
-        except Exception as e:
-            print(f"An error occurred: {e}")
+            logger.error("The file '%s' was not found", file_path)
+        except Exception:
+            logger.exception("Could not read subtitles from %s", file_path)
 
         if not subtitles:
-            print("No subtitles found.")
+            logger.warning("No subtitles found in %s", file_path)
 
         return subtitles
 
-    @staticmethod
-    def _write_subtitles(subtitles: List[Subtitle], file_path: str) -> None:
-        with open(file_path, "w", encoding="utf-8") as file:
-            for subtitle in subtitles:
-                file.write(f"{subtitle.index}\n")
-                file.write(f"{subtitle.timestamp}\n")
-                file.write(f"{subtitle.text}\n\n")
+
+class MultiTargetSubtitleProcessor:
+    """
+    Translates one subtitle file into several target languages in a single pass.
+    The file is parsed once, each batch is tokenized once, and translators whose
+    target language is picked on the decoder side (M2M100, NLLB, SeamlessM4T) run
+    the encoder once per batch for all targets.
+
+    Every target keeps its own SubtitleProcessor for dedup, checkpoint journal,
+    translation memory lookups and the incremental output file, driven through
+    its begin_file(), deliver() and finish_file().
+    """
+
+    def __init__(
+        self,
+        translator,
+        source_lang: str,
+        target_langs: List[str],
+        batch_size: int = 64,
+        progress_callback: Optional[
+            Callable[[str, int, int, List[Subtitle]], None]
+        ] = None,
+        translation_memory=None,
+        max_batch_tokens: Optional[int] = None,
+        sort_window: Optional[int] = 512,
+        checkpoint_dir: Optional[str] = None,
+    ):
+        self.translator = translator
+        self.source_lang = source_lang
+        self.target_langs = list(dict.fromkeys(target_langs))
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens or translator.config.max_batch_tokens
+        self.sort_window = sort_window
+        # Called as progress_callback(target_lang, cues_done, cues_total, cues),
+        # with cues_done and cues_total summed over all target languages
+        self.progress_callback = progress_callback
+        self._cues_done = {target_lang: 0 for target_lang in self.target_langs}
+        self.processors = {
+            target_lang: SubtitleProcessor(
+                translator=translator,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                batch_size=batch_size,
+                batch_processing=True,
+                progress_callback=self._target_progress_callback(target_lang),
+                translation_memory=translation_memory,
+                max_batch_tokens=self.max_batch_tokens,
+                sort_window=sort_window,
+                checkpoint_dir=checkpoint_dir,
+            )
+            for target_lang in self.target_langs
+        }
+        self.stats: Dict[str, Union[int, float, dict, list]] = {}
+        self._progress_logger = RateLimitedLogger(logger)
+
+    def process_file(self, input_path: str, output_paths: Dict[str, str]) -> None:
+        start = time.perf_counter()
+        with span("parse", input_path=input_path):
+            subtitles = SubtitleProcessor._extract_subtitles(input_path)
+        stage_stats = [StageStats("parse", len(subtitles), time.perf_counter() - start)]
+        self._cues_done = {target_lang: 0 for target_lang in self.target_langs}
+
+        # Cues each target still has to translate, keyed on normalized text
+        pending: Dict[str, Dict[str, Subtitle]] = {}
+        opened: List[SubtitleProcessor] = []
+        try:
+            for target_lang, processor in self.processors.items():
+                copies = [
+                    Subtitle(subtitle.index, subtitle.timestamp, subtitle.text)
+                    for subtitle in subtitles
+                ]
+                target_pending = processor.begin_file(
+                    input_path, output_paths[target_lang], copies
+                )
+                opened.append(processor)
+                pending[target_lang] = {
+                    normalize_text(subtitle.text): subtitle
+                    for subtitle in target_pending
+                }
+            stage_stats.extend(self._translate(pending))
+        except Exception:
+            for processor in opened:
+                processor.abort_file()
+            raise
+
+        writes = [processor.finish_file() for processor in self.processors.values()]
+        stage_stats.append(
+            StageStats(
+                "write",
+                sum(write.items for write in writes),
+                sum(write.busy_seconds for write in writes),
+            )
+        )
+
+        wall_seconds = time.perf_counter() - start
+        self.stats = {
+            "cues_total": len(subtitles),
+            "target_langs": self.target_langs,
+            "texts_translated": len(set().union(*pending.values())),
+            "wall_seconds": round(wall_seconds, 3),
+            "stages": {
+                stage.name: stage.to_dict(wall_seconds) for stage in stage_stats
+            },
+            "targets": {
+                target_lang: processor.stats
+                for target_lang, processor in self.processors.items()
+            },
+        }
+        logger.info(
+            "Translated %d cues into %d languages in %.1fs",
+            len(subtitles),
+            len(self.target_langs),
+            wall_seconds,
+        )
+
+    def _translate(self, pending: Dict[str, Dict[str, Subtitle]]) -> List[StageStats]:
+        """Translate the union of every target's pending texts, batch by batch."""
+        texts: Dict[str, str] = {}
+        for target_pending in pending.values():
+            for key, subtitle in target_pending.items():
+                texts.setdefault(key, subtitle.text)
+        keys = list(texts)
+        if not keys:
+            return []
+
+        lengths = [self.translator.count_tokens(texts[key]) for key in keys]
+        batches = token_budget_batches(
+            lengths,
+            self.max_batch_tokens,
+            max_batch_size=self.batch_size,
+            sort_window=self.sort_window,
+        )
+        # Only decode for targets that still need a text of the batch
+        batch_targets = [
+            [
+                target_lang
+                for target_lang, target_pending in pending.items()
+                if any(keys[i] in target_pending for i in indices)
+            ]
+            for indices in batches
+        ]
+        logger.info(
+            "Translating %d texts into %d languages in %d batches",
+            len(keys),
+            len(self.target_langs),
+            len(batches),
+        )
+
+        def on_translated(batch_number: int, translations: Dict[str, List[str]]):
+            self._progress_logger.info(
+                "Processed batch %d/%d",
+                batch_number + 1,
+                len(batches),
+                force=batch_number + 1 == len(batches),
+            )
+            indices = batches[batch_number]
+            for target_lang, translated in translations.items():
+                target_pending = pending[target_lang]
+                batch, batch_translations = [], []
+                for i, translation in zip(indices, translated):
+                    subtitle = target_pending.get(keys[i])
+                    if subtitle is not None:
+                        batch.append(subtitle)
+                        batch_translations.append(translation)
+                self.processors[target_lang].deliver(batch, batch_translations)
+
+        pipeline = TranslationPipeline(self.translator, self.source_lang)
+        return pipeline.run_multi(
+            (
+                ([texts[keys[i]] for i in indices], targets)
+                for indices, targets in zip(batches, batch_targets)
+            ),
+            on_translated,
+        )
+
+    def _target_progress_callback(self, target_lang: str):
+        def report(cues_done: int, cues_total: int, cues: List[Subtitle]) -> None:
+            self._cues_done[target_lang] = cues_done
+            if self.progress_callback is not None:
+                self.progress_callback(
+                    target_lang,
+                    sum(self._cues_done.values()),
+                    cues_total * len(self.target_langs),
+                    cues,
+                )
+
+        return report
@@ -0,0 +1,102 @@
+# tracing.py
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Iterator
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+# Spans are recorded only when TRACE_SPANS is set, or inside profile_job()
+_tracing_enabled = os.getenv("TRACE_SPANS", "").lower() in ("1", "true", "yes")
+_profiling = False
+# torch.profiler supports a single active profiler per process
+_profile_lock = threading.Lock()
+
+
+def enable_tracing(enabled: bool = True) -> None:
+    global _tracing_enabled
+    _tracing_enabled = enabled
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[None]:
+    """
+    Time a block as a named span. Spans go to OpenTelemetry when it is installed
+    and otherwise to this module's logger with the duration and attributes as
+    structured fields. Inside profile_job() they also label the torch.profiler
+    trace. When neither is on this costs one flag check.
+    """
+    if not _tracing_enabled and not _profiling:
+        yield
+        return
+
+    with ExitStack() as stack:
+        if _profiling:
+            import torch
+
+            stack.enter_context(torch.profiler.record_function(name))
+        if _tracing_enabled and otel_trace is not None:
+            stack.enter_context(
+                otel_trace.get_tracer(__name__).start_as_current_span(
+                    name, attributes=attributes
+                )
+            )
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if _tracing_enabled:
+                duration_ms = (time.perf_counter() - start) * 1000
+                logger.info(
+                    "span %s %.1f ms",
+                    name,
+                    duration_ms,
+                    extra={
+                        "span": name,
+                        "duration_ms": round(duration_ms, 3),
+                        **attributes,
+                    },
+                )
+
+
+@contextmanager
+def profile_job(trace_path: str) -> Iterator[bool]:
+    """
+    Record a torch.profiler trace of the block and save it to trace_path in
+    Chrome trace format (open it in chrome://tracing or Perfetto). Yields False
+    without profiling when another profile is already running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning("Another job is being profiled, not profiling %s", trace_path)
+        yield False
+        return
+
+    global _profiling
+    try:
+        import torch
+        from torch.profiler import ProfilerActivity, profile
+
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+        with profile(activities=activities) as profiler:
+            _profiling = True
+            try:
+                yield True
+            finally:
+                _profiling = False
+        os.makedirs(os.path.dirname(trace_path) or ".", exist_ok=True)
+        profiler.export_chrome_trace(trace_path)
+        logger.info("Saved profiler trace to %s", trace_path)
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,245 @@
+# translation_memory.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+from library.config import TranslationConfig
+
+# Config fields that do not influence the generated text. The backend does, as
+# each one runs its own kernels and, for "auto", its own precision.
+NON_DECODING_FIELDS = (
+    "batch_size",
+    "max_batch_tokens",
+    "parallel_slots",
+)
+
+# SQLite limits the number of bound parameters per statement
+QUERY_CHUNK_SIZE = 500
+
+
+class TranslationMemory:
+    """
+    On-disk cache of finished translations, keyed on the model, the decoding
+    settings, the language pair and the normalized source text.
+
+    Entries for a changed TranslationConfig are simply never hit again; use
+    invalidate() to reclaim their space. The least recently used entries are
+    evicted once max_entries is exceeded.
+    """
+
+    def __init__(self, path: str, max_entries: int = 500_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                model_name TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS translations_model ON translations (model_name, settings)"
+        )
+        self._connection.commit()
+        self._entries = self._connection.execute(
+            "SELECT COUNT(*) FROM translations"
+        ).fetchone()[0]
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    @staticmethod
+    def settings_fingerprint(
+        config: TranslationConfig, precision: Optional[str] = None
+    ) -> str:
+        """
+        Fingerprint of the settings that shape a translation. precision is the one
+        the model resolved config.precision to (see resolved_precision()), so
+        "auto" on CPU and on CUDA are told apart.
+        """
+        settings = {
+            name: value
+            for name, value in asdict(config).items()
+            if name not in NON_DECODING_FIELDS
+        }
+        if precision is not None:
+            settings["precision"] = precision
+        encoded = json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    @staticmethod
+    def translator_settings(translator) -> Optional[str]:
+        """
+        settings_fingerprint() of a translator's config and resolved precision, or
+        None if its translations are sampled and must not be remembered.
+        """
+        if not getattr(translator, "deterministic", True):
+            return None
+        return TranslationMemory.settings_fingerprint(
+            translator.config, translator.resolved_precision()
+        )
+
+    def get_many(
+        self,
+        model_name: str,
+        settings: str,
+        source_lang: str,
+        target_lang: str,
+        texts: Sequence[str],
+    ) -> List[Optional[str]]:
+        """Return the remembered translation for each text, or None on a miss."""
+        keys = [
+            self._key(model_name, settings, source_lang, target_lang, text)
+            for text in texts
+        ]
+        found = {}
+        now = time.time()
+        with self._lock:
+            for chunk in self._chunks(list(set(keys))):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    self._connection.execute(
+                        f"UPDATE translations SET last_used = ? WHERE key IN ({placeholders})",
+                        [now, *chunk],
+                    )
+            self._connection.commit()
+
+            results = [found.get(key) for key in keys]
+            hits = sum(1 for result in results if result is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(
+        self,
+        model_name: str,
+        settings: str,
+        source_lang: str,
+        target_lang: str,
+        texts: Sequence[str],
+        translations: Sequence[str],
+    ) -> None:
+        now = time.time()
+        rows = [
+            (
+                self._key(model_name, settings, source_lang, target_lang, text),
+                model_name,
+                settings,
+                source_lang,
+                target_lang,
+                self.normalize(text),
+                translation,
+                now,
+                now,
+            )
+            for text, translation in zip(texts, translations)
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._connection.commit()
+            # Replaced rows make this an over-estimate, so recount before evicting
+            self._entries += len(rows)
+            if self._entries > self.max_entries:
+                self._entries = self._connection.execute(
+                    "SELECT COUNT(*) FROM translations"
+                ).fetchone()[0]
+                if self._entries > self.max_entries:
+                    self._evict()
+
+    def invalidate(
+        self,
+        model_name: Optional[str] = None,
+        keep_settings: Optional[Sequence[str]] = None,
+    ) -> int:
+        """
+        Delete entries for model_name (or every model). When keep_settings is given,
+        only entries produced with settings not in it are deleted.
+        """
+        conditions, params = [], []
+        if model_name is not None:
+            conditions.append("model_name = ?")
+            params.append(model_name)
+        if keep_settings:
+            conditions.append(f"settings NOT IN ({','.join('?' * len(keep_settings))})")
+            params.extend(keep_settings)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            deleted = self._connection.execute(
+                f"DELETE FROM translations{where}", params
+            ).rowcount
+            self._connection.commit()
+            self._entries -= deleted
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": str(self.path),
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries, leaving 10% headroom. Caller holds self._lock."""
+        target = int(self.max_entries * 0.9)
+        excess = self._entries - target
+        self._connection.execute(
+            "DELETE FROM translations WHERE key IN "
+            "(SELECT key FROM translations ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._connection.commit()
+        self._entries = target
+
+    def _key(
+        self,
+        model_name: str,
+        settings: str,
+        source_lang: str,
+        target_lang: str,
+        text: str,
+    ) -> str:
+        parts = (model_name, settings, source_lang, target_lang, self.normalize(text))
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _chunks(items: List[str]) -> Iterator[List[str]]:
+        for start in range(0, len(items), QUERY_CHUNK_SIZE):
+            yield items[start : start + QUERY_CHUNK_SIZE]
@@ -0,0 +1,209 @@
+# translation_pipeline.py
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from library.metrics import observe_generated, observe_generation
+from library.tracing import span
+
+# Sentinel passed down the queues once the input is exhausted
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+
+    def to_dict(self, wall_seconds: float) -> Dict[str, float]:
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "utilization": (
+                round(self.busy_seconds / wall_seconds, 3) if wall_seconds else 0.0
+            ),
+        }
+
+
+class PipelineStage(threading.Thread):
+    """
+    Worker thread that applies work() to every item of its inbox and forwards the
+    result to its outbox. After a failure it keeps draining the inbox so upstream
+    stages never block on a full queue; the error is raised by the pipeline.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        work: Callable[[Any], Any],
+        inbox: queue.Queue,
+        outbox: Optional[queue.Queue] = None,
+    ):
+        super().__init__(name=f"pipeline-{name}", daemon=True)
+        self.work = work
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stats = StageStats(name)
+        self.error: Optional[Exception] = None
+
+    def run(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                break
+            if self.error is not None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                with span(self.stats.name):
+                    result = self.work(item)
+            except Exception as e:
+                self.error = e
+                continue
+            finally:
+                self.stats.busy_seconds += time.perf_counter() - start
+
+            self.stats.items += 1
+            if self.outbox is not None:
+                self.outbox.put(result)
+
+        if self.outbox is not None:
+            self.outbox.put(_DONE)
+
+
+class TranslationPipeline:
+    """
+    Runs batches through tokenize -> generate -> decode stages on separate threads
+    connected by bounded queues, so tokenizing the next batch and decoding the
+    previous one overlap with generation of the current batch.
+    """
+
+    def __init__(
+        self,
+        translator,
+        source_lang: str = "en",
+        target_lang: str = "ar",
+        queue_size: int = 2,
+    ):
+        self.translator = translator
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.queue_size = queue_size
+
+    def run(
+        self,
+        batches: Iterable[List[str]],
+        on_translated: Callable[[int, List[str]], None],
+    ) -> List[StageStats]:
+        """
+        Translate every batch and call on_translated(batch_number, translations)
+        from the decode thread as each one completes, in input order.
+
+        Returns:
+            Busy time and item count of each stage
+        """
+
+        def generate(encoded):
+            return self.translator.generate_batch(
+                encoded, self.source_lang, self.target_lang
+            )
+
+        def decode(batch_number, output):
+            observe_generated(self.translator, output)
+            translations = self.translator.decode_batch(output)
+            on_translated(batch_number, translations)
+
+        return self._run(
+            ((texts, [self.target_lang]) for texts in batches), generate, decode
+        )
+
+    def run_multi(
+        self,
+        batches: Iterable[Tuple[List[str], List[str]]],
+        on_translated: Callable[[int, Dict[str, List[str]]], None],
+    ) -> List[StageStats]:
+        """
+        Like run(), for (texts, target_langs) batches: each batch is tokenized once
+        and translated into all of its target languages, and on_translated receives
+        the translations keyed on target language.
+        """
+
+        def generate(item):
+            encoded, target_langs = item
+            return self.translator.generate_batch_multi(
+                encoded, self.source_lang, target_langs
+            )
+
+        def decode(batch_number, outputs):
+            translations = {}
+            for target_lang, output in outputs.items():
+                observe_generated(self.translator, output)
+                translations[target_lang] = self.translator.decode_batch(output)
+            on_translated(batch_number, translations)
+
+        return self._run(batches, generate, decode, pass_targets=True)
+
+    def _run(
+        self,
+        batches: Iterable[Tuple[List[str], List[str]]],
+        generate: Callable[[Any], Any],
+        decode: Callable[[int, Any], None],
+        pass_targets: bool = False,
+    ) -> List[StageStats]:
+        inputs: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        tokenized: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        generated: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        # Encoded batches are backend specific, so their sizes are kept aside
+        batch_sizes: Dict[int, int] = {}
+
+        def tokenize_stage(item):
+            batch_number, (texts, target_langs) = item
+            batch_sizes[batch_number] = len(texts)
+            # Source-side tokenization does not depend on the target language
+            encoded = self.translator.encode_batch(
+                texts, self.source_lang, target_langs[0]
+            )
+            return batch_number, (encoded, target_langs) if pass_targets else encoded
+
+        def generate_stage(item):
+            batch_number, encoded = item
+            start = time.perf_counter()
+            output = generate(encoded)
+            observe_generation(
+                self.translator,
+                batch_sizes.pop(batch_number),
+                time.perf_counter() - start,
+                "pipeline",
+            )
+            return batch_number, output
+
+        def decode_stage(item):
+            batch_number, output = item
+            decode(batch_number, output)
+
+        stages = [
+            PipelineStage("tokenize", tokenize_stage, inputs, tokenized),
+            PipelineStage("generate", generate_stage, tokenized, generated),
+            PipelineStage("decode", decode_stage, generated),
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            for batch_number, batch in enumerate(batches):
+                if any(stage.error is not None for stage in stages):
+                    break
+                inputs.put((batch_number, batch))
+        finally:
+            inputs.put(_DONE)
+            for stage in stages:
+                stage.join()
+
+        for stage in stages:
+            if stage.error is not None:
+                raise stage.error
+        return [stage.stats for stage in stages]
@@ -0,0 +1,158 @@
+# translator_registry.py
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from enum import Enum
+from typing import Dict
+
+from library.config import TranslationConfig
+from library.metrics import MODULE_IMPORT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class AIModel(str, Enum):
+    OPUS = "opus"
+    M2M100 = "m2m100"
+    NLLB = "nllb"
+    MADLAD = "madlad"
+    SEAMLESS = "seamless"
+    DARIJA = "darija"
+    FASEEH = "faseeh"
+    MADLAD_GGUF = "madlad_gguf"
+
+
+class Backend(str, Enum):
+    TRANSFORMERS = "transformers"
+    CTRANSLATE2 = "ctranslate2"
+    ONNX = "onnx"
+
+
+# Translator class serving each model on each backend, as "module:Class". Modules
+# are imported when a model is first requested, so the API starts without torch
+# or transformers and a worker only loads the code of the models it serves.
+TRANSLATOR_CLASSES = {
+    Backend.TRANSFORMERS: {
+        AIModel.OPUS: "library.opus_translator:OpusTranslator",
+        AIModel.DARIJA: "library.opus_translator:OpusTranslator",
+        AIModel.M2M100: "library.M2M100_translator:M2M100Translator",
+        AIModel.NLLB: "library.nllb_translator:NLLBTranslator",
+        AIModel.MADLAD: "library.madlad_translator:MadladTranslator",
+        AIModel.SEAMLESS: "library.hf_seamless_m4t:SeamlessTranslator",
+        AIModel.FASEEH: "library.faseeh_translator:FaseehTranslator",
+        AIModel.MADLAD_GGUF: "library.gguf_madlad_translator:LlamaCppMadladTranslator",
+    },
+    Backend.CTRANSLATE2: {
+        AIModel.OPUS: "library.ctranslate2_translator:CTranslate2Translator",
+        AIModel.DARIJA: "library.ctranslate2_translator:CTranslate2Translator",
+        AIModel.M2M100: "library.ctranslate2_translator:CTranslate2M2M100Translator",
+        AIModel.NLLB: "library.ctranslate2_translator:CTranslate2NLLBTranslator",
+    },
+    Backend.ONNX: {
+        AIModel.OPUS: "library.onnx_translator:OnnxOpusTranslator",
+        AIModel.DARIJA: "library.onnx_translator:OnnxOpusTranslator",
+    },
+}
+
+# Models each non-default backend can serve
+BACKEND_MODELS = {
+    backend: tuple(classes)
+    for backend, classes in TRANSLATOR_CLASSES.items()
+    if backend != Backend.TRANSFORMERS
+}
+
+# Seconds spent importing each translator module, including the libraries it
+# pulled in first (torch, transformers, ...)
+import_seconds: Dict[str, float] = {}
+_import_lock = threading.Lock()
+
+# Models that are always served by CTranslate2, whatever the configured backend
+CT2_MODELS = (AIModel.MADLAD,)
+
+# Models that are always served by llama.cpp, whatever the configured backend
+GGUF_MODELS = (AIModel.MADLAD_GGUF,)
+
+
+def check_backend(model: AIModel, backend: Backend) -> None:
+    if backend != Backend.TRANSFORMERS and model not in BACKEND_MODELS[backend]:
+        raise ValueError(
+            f"Backend {backend.value} does not support model {model.value}; "
+            f"supported: {', '.join(m.value for m in BACKEND_MODELS[backend])}"
+        )
+
+
+# Many-to-many models that pick the target language on the decoder side, so one
+# subtitle job can fan out to several target languages
+MULTI_TARGET_MODELS = (AIModel.M2M100, AIModel.NLLB, AIModel.SEAMLESS)
+
+
+def resolve_model_name(source_lang: str, target_lang: str, model: AIModel) -> str:
+    if model == AIModel.OPUS:
+        return f"Helsinki-NLP/opus-mt-tc-big-{source_lang}-{target_lang}"
+    elif model == AIModel.M2M100:
+        return "facebook/m2m100_418M"
+    elif model == AIModel.NLLB:
+        return "facebook/nllb-200-distilled-600M"
+    elif model == AIModel.MADLAD:
+        # return "google/madlad400-3b-mt"
+        return "santhosh/madlad400-3b-ct2"
+    elif model == AIModel.SEAMLESS:
+        # return "facebook/hf-seamless-m4t-large"
+        return "facebook/hf-seamless-m4t-medium"
+    elif model == AIModel.DARIJA:
+        # return "lachkarsalim/Helsinki-translation-English_Moroccan-Arabic"
+        return "Trabis/Helsinki-NLPopus-mt-tc-big-en-moroccain_dialect"
+    elif model == AIModel.FASEEH:
+        return "Abdulmohsena/Faseeh"
+    elif model == AIModel.MADLAD_GGUF:
+        # Any hub repo ("org/name" or "org/name@revision") holding a MADLAD GGUF file
+        model_name = os.getenv("MADLAD_GGUF_MODEL", "")
+        if not model_name:
+            raise ValueError("Set MADLAD_GGUF_MODEL to serve madlad_gguf")
+        return model_name
+    raise ValueError(f"Unsupported model: {model}")
+
+
+def model_precision(model: AIModel, config: TranslationConfig, device) -> str:
+    """
+    The precision a translator loads with on device, as its resolved_precision()
+    reports once loaded; keys the model cache and the translation memory.
+    """
+    # Imported here as it needs torch
+    from library.precision import ct2_compute_type, resolve_precision
+
+    if model in GGUF_MODELS:
+        # Quantization is part of the GGUF file
+        return "gguf"
+    if model in CT2_MODELS or config.backend == Backend.CTRANSLATE2:
+        return f"ct2-{ct2_compute_type(config.precision, device)}"
+    if config.backend == Backend.ONNX:
+        # Exported graphs are always fp32
+        return "onnx-fp32"
+    return resolve_precision(config.precision, device)
+
+
+def translator_class(model: AIModel, backend: Backend = Backend.TRANSFORMERS) -> type:
+    """Import and return the translator class serving model on backend."""
+    check_backend(model, backend)
+    module_name, class_name = TRANSLATOR_CLASSES[backend][model].split(":")
+    module = sys.modules.get(module_name)
+    if module is None:
+        with _import_lock:
+            start = time.perf_counter()
+            module = importlib.import_module(module_name)
+            seconds = time.perf_counter() - start
+            if module_name not in import_seconds:
+                import_seconds[module_name] = seconds
+                MODULE_IMPORT_SECONDS.labels(module_name).set(seconds)
+                logger.info("Imported %s in %.2fs", module_name, seconds)
+    return getattr(module, class_name)
+
+
+def create_translator(model: AIModel, model_name: str, config: TranslationConfig):
+    translator = translator_class(model, Backend(config.backend))(model_name, config)
+    translator.load_model()
+    return translator
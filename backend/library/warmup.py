@@ -0,0 +1,102 @@
+# warmup.py
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+# Subtitle-like lines of increasing length, so warmup exercises short and padded
+# batches alike
+WARMUP_TEXTS = [
+    "Hello.",
+    "Where are you going?",
+    "I told you we should have left earlier.",
+    "The meeting has been moved to Thursday afternoon, so we still have time.",
+    "If you see him before I do, tell him I'm looking for him and that it's "
+    "about the money he owes us from last summer.",
+]
+
+
+@dataclass
+class PreloadSpec:
+    model: str
+    source_lang: str = "en"
+    target_lang: str = "ar"
+    backend: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        label = f"{self.model}:{self.source_lang}-{self.target_lang}"
+        return f"{label}@{self.backend}" if self.backend else label
+
+
+def parse_preload_models(value: str) -> List[PreloadSpec]:
+    """
+    Parse a comma separated list of model[:source-target][@backend] entries,
+    e.g. "opus:en-fr,nllb@ctranslate2". The language pair defaults to en-ar.
+    """
+    specs = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        entry, _, backend = entry.partition("@")
+        model, _, pair = entry.partition(":")
+        spec = PreloadSpec(model=model.strip(), backend=backend.strip() or None)
+        if pair:
+            source_lang, separator, target_lang = pair.partition("-")
+            if not separator or not source_lang or not target_lang:
+                raise ValueError(f"Invalid language pair in preload entry: {entry}")
+            spec.source_lang, spec.target_lang = source_lang, target_lang
+        specs.append(spec)
+    return specs
+
+
+def warm_up(
+    translator,
+    source_lang: str,
+    target_lang: str,
+    batch_sizes: Sequence[int] = (1, 8, 32),
+) -> float:
+    """
+    Run a batch of each size through the translator so the allocator, kernel
+    selection and any lazy initialization happen before the first real request.
+
+    Returns:
+        Seconds spent warming up
+    """
+    start = time.perf_counter()
+    for batch_size in batch_sizes:
+        texts = [WARMUP_TEXTS[i % len(WARMUP_TEXTS)] for i in range(batch_size)]
+        translator.batch_translate(texts, source_lang, target_lang)
+    return time.perf_counter() - start
+
+
+class Readiness:
+    """
+    Tracks the preloaded models through pending -> loading -> warming -> ready
+    (or failed). The instance is ready once every one of them is ready.
+    """
+
+    def __init__(self, labels: List[str]):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, object]] = {
+            label: {"state": "pending"} for label in labels
+        }
+
+    def update(self, label: str, state: str, **details) -> None:
+        with self._lock:
+            self._models[label] = {**self._models.get(label, {}), **details}
+            self._models[label]["state"] = state
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(model["state"] == "ready" for model in self._models.values())
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            models = {label: dict(model) for label, model in self._models.items()}
+        return {
+            "ready": all(model["state"] == "ready" for model in models.values()),
+            "models": models,
+        }
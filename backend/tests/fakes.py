@@ -0,0 +1,84 @@
+# fakes.py
+import threading
+import time
+from typing import Dict, List, Optional
+
+from library.config import TranslationConfig
+
+
+class FakeTranslator:
+    """
+    Stands in for a loaded translator without torch: a text "translates" to
+    "<target_lang>:<TEXT>" and counts one token per word plus an end token.
+    Every generated batch is recorded in batches.
+    """
+
+    deterministic = True
+
+    def __init__(
+        self,
+        model_name: str = "fake/model",
+        config: Optional[TranslationConfig] = None,
+        generate_seconds: float = 0.0,
+    ):
+        self.model_name = model_name
+        self.config = config or TranslationConfig()
+        # Time each generate_batch() call sleeps, to stand in for the model
+        self.generate_seconds = generate_seconds
+        self.batches: List[List[str]] = []
+        self._lock = threading.Lock()
+
+    def resolved_precision(self) -> str:
+        return "fp32"
+
+    def count_tokens(self, text: str) -> int:
+        return len(text.split()) + 1
+
+    def max_input_tokens(self) -> int:
+        return 512
+
+    def encode_batch(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[str]:
+        return list(texts)
+
+    def generate_batch(
+        self, encoded: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[str]:
+        with self._lock:
+            self.batches.append(list(encoded))
+        if self.generate_seconds:
+            time.sleep(self.generate_seconds)
+        return [f"{target_lang}:{text.upper()}" for text in encoded]
+
+    def generate_batch_multi(
+        self, encoded: List[str], source_lang: str, target_langs: List[str]
+    ) -> Dict[str, List[str]]:
+        return {
+            target_lang: self.generate_batch(encoded, source_lang, target_lang)
+            for target_lang in target_langs
+        }
+
+    def decode_batch(self, generated: List[str]) -> List[str]:
+        return list(generated)
+
+    def batch_translate(
+        self, texts: List[str], source_lang: str = "en", target_lang: str = "ar"
+    ) -> List[str]:
+        encoded = self.encode_batch(texts, source_lang, target_lang)
+        return self.decode_batch(self.generate_batch(encoded, source_lang, target_lang))
+
+    def translate(
+        self, text: str, source_lang: str = "en", target_lang: str = "ar"
+    ) -> str:
+        return self.batch_translate([text], source_lang, target_lang)[0]
+
+
+def write_srt(path, texts: List[str]) -> None:
+    """Write texts as the cues of an .srt file, one second each."""
+    with open(path, "w", encoding="utf-8") as srt_file:
+        for i, text in enumerate(texts):
+            srt_file.write(
+                f"{i + 1}\n00:00:{i % 60:02d},000 --> 00:00:{i % 60:02d},900\n"
+                f"{text}\n\n"
+            )
@@ -0,0 +1,78 @@
+# test_backend_parity.py
+"""
+The CTranslate2 and ONNX backends must reproduce the transformers translations.
+Uses a tiny Marian checkpoint from the hub (PARITY_TEST_MODEL overrides it) and
+is skipped when a backend's dependencies are missing or the model cannot be fetched.
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from library import model_handler  # noqa: E402
+from library.config import TranslationConfig  # noqa: E402
+from library.model_handler import ModelHandler  # noqa: E402
+from library.translator_registry import (  # noqa: E402
+    AIModel,
+    Backend,
+    translator_class,
+)
+
+PARITY_TEST_MODEL = os.getenv(
+    "PARITY_TEST_MODEL", "hf-internal-testing/tiny-random-MarianMTModel"
+)
+
+TEXTS = [
+    "Hello, how are you?",
+    "Where were you last night?",
+    "The meeting has been moved to Thursday afternoon.",
+    "We need to talk about what happened.",
+]
+
+# Greedy and short, with the same settings on every backend
+MAX_NEW_TOKENS = 16
+
+
+@pytest.fixture(scope="module")
+def models_dir(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(model_handler, "MODELS_DIR", tmp_path_factory.mktemp("models"))
+        try:
+            ModelHandler.download_model(PARITY_TEST_MODEL)
+        except Exception as e:
+            pytest.skip(f"Could not fetch {PARITY_TEST_MODEL}: {e}")
+        yield
+
+
+def translate(backend: Backend):
+    config = TranslationConfig(
+        num_beams=1,
+        max_new_tokens=MAX_NEW_TOKENS,
+        precision="fp32",
+        backend=backend.value,
+    )
+    translator = translator_class(AIModel.OPUS, backend)(PARITY_TEST_MODEL, config)
+    translator.load_model()
+    if backend != Backend.CTRANSLATE2:
+        # CTranslate2 stops at config.max_new_tokens; generate() at the model's
+        # generation config, where max_new_tokens wins over max_length
+        translator.model.generation_config.max_new_tokens = MAX_NEW_TOKENS
+    return translator.batch_translate(TEXTS, "en", "de")
+
+
+@pytest.fixture(scope="module")
+def reference(models_dir):
+    return translate(Backend.TRANSFORMERS)
+
+
+def test_ctranslate2_matches_transformers(reference):
+    pytest.importorskip("ctranslate2")
+    assert translate(Backend.CTRANSLATE2) == reference
+
+
+def test_onnx_matches_transformers(reference):
+    pytest.importorskip("optimum.onnxruntime")
+    assert translate(Backend.ONNX) == reference
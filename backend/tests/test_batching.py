@@ -0,0 +1,45 @@
+# test_batching.py
+from library.batching import token_budget_batches
+
+
+def test_batches_cover_every_item_once():
+    lengths = [5, 1, 30, 7, 7, 2, 12, 3]
+
+    batches = token_budget_batches(lengths, max_batch_tokens=32)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+
+
+def test_padded_size_stays_within_the_budget():
+    lengths = [5, 1, 30, 7, 7, 2, 12, 3, 9, 4]
+
+    for batch in token_budget_batches(lengths, max_batch_tokens=32):
+        assert max(lengths[i] for i in batch) * len(batch) <= 32
+
+
+def test_similar_lengths_are_batched_together():
+    lengths = [2, 20, 2, 20]
+
+    assert token_budget_batches(lengths, max_batch_tokens=40) == [[1, 3], [0, 2]]
+
+
+def test_item_over_the_budget_gets_its_own_batch():
+    assert token_budget_batches([100, 3, 3], max_batch_tokens=10) == [[0], [1, 2]]
+
+
+def test_max_batch_size_caps_items():
+    batches = token_budget_batches([1] * 5, max_batch_tokens=100, max_batch_size=2)
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_sort_window_keeps_windows_in_order():
+    lengths = [1, 9, 2, 8, 3, 7]
+
+    batches = token_budget_batches(lengths, max_batch_tokens=100, sort_window=2)
+
+    assert batches == [[1, 0], [3, 2], [5, 4]]
+
+
+def test_no_items_no_batches():
+    assert token_budget_batches([], max_batch_tokens=10) == []
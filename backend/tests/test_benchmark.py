@@ -0,0 +1,86 @@
+# test_benchmark.py
+"""
+Throughput of the subtitle pipeline around a fake translator: the cost of
+batching, dedup, the pipeline threads and the incremental writer, without a
+model. Needs pytest-benchmark and only runs when RUN_BENCHMARKS is set:
+
+    RUN_BENCHMARKS=1 pytest backend/tests/test_benchmark.py
+
+benchmark.py measures real models.
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from fakes import FakeTranslator, write_srt  # noqa: E402
+
+from library.batching import token_budget_batches  # noqa: E402
+from library.benchmark import synthetic_corpus  # noqa: E402
+from library.subtitle_processor import (  # noqa: E402
+    MultiTargetSubtitleProcessor,
+    SubtitleProcessor,
+)
+from library.translation_pipeline import TranslationPipeline  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to run benchmarks"
+)
+
+CUES = 2000
+
+
+@pytest.fixture(scope="module")
+def srt_path(tmp_path_factory):
+    # Recurring lines, as in a real episode
+    texts = synthetic_corpus(CUES // 2) * 2
+    path = tmp_path_factory.mktemp("benchmark") / "episode.srt"
+    write_srt(path, texts)
+    return path
+
+
+def test_pipeline(benchmark):
+    translator = FakeTranslator()
+    texts = synthetic_corpus(CUES)
+    batches = token_budget_batches(
+        [translator.count_tokens(text) for text in texts],
+        translator.config.max_batch_tokens,
+        max_batch_size=64,
+        sort_window=512,
+    )
+    translated = []
+
+    def run():
+        translated.clear()
+        TranslationPipeline(translator, "en", "fr").run(
+            ([texts[i] for i in indices] for indices in batches),
+            lambda batch_number, translations: translated.extend(translations),
+        )
+
+    benchmark(run)
+    assert len(translated) == CUES
+
+
+def test_process_file(benchmark, srt_path, tmp_path):
+    processor = SubtitleProcessor(
+        FakeTranslator(), target_lang="fr", batch_size=64, batch_processing=True
+    )
+    output_path = tmp_path / "episode.fr.srt"
+
+    benchmark(processor.process_file, str(srt_path), str(output_path))
+    assert processor.stats["cues_total"] == CUES
+
+
+def test_process_file_multi_target(benchmark, srt_path, tmp_path):
+    target_langs = ["fr", "de", "es"]
+    processor = MultiTargetSubtitleProcessor(
+        FakeTranslator(), "en", target_langs, batch_size=64
+    )
+    output_paths = {
+        lang: str(tmp_path / f"episode.{lang}.srt") for lang in target_langs
+    }
+
+    benchmark(processor.process_file, str(srt_path), output_paths)
+    assert processor.stats["cues_total"] == CUES
@@ -0,0 +1,35 @@
+# test_checkpoint_journal.py
+from library.checkpoint_journal import CheckpointJournal
+
+
+def test_resume_after_torn_line_keeps_new_entries(tmp_path):
+    path = tmp_path / "job.journal"
+    journal = CheckpointJournal(str(path))
+    journal.append(["Hello"], ["Bonjour"])
+    journal.close()
+    # A crash in the middle of a write leaves an unterminated line
+    with open(path, "a", encoding="utf-8") as journal_file:
+        journal_file.write(
+            '{"source": "Good',
+        )
+
+    resumed = CheckpointJournal(str(path))
+    assert resumed.load() == {"Hello": "Bonjour"}
+    resumed.append(["Good night"], ["Bonne nuit"])
+    resumed.close()
+
+    assert CheckpointJournal(str(path)).load() == {
+        "Hello": "Bonjour",
+        "Good night": "Bonne nuit",
+    }
+
+
+def test_load_keeps_an_intact_journal(tmp_path):
+    path = tmp_path / "job.journal"
+    journal = CheckpointJournal(str(path))
+    journal.append(["One", "Two"], ["Un", "Deux"])
+    journal.close()
+    size = path.stat().st_size
+
+    assert CheckpointJournal(str(path)).load() == {"One": "Un", "Two": "Deux"}
+    assert path.stat().st_size == size
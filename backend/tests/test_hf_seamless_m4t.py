@@ -0,0 +1,88 @@
+# test_hf_seamless_m4t.py
+from unittest import mock
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from transformers.utils import ModelOutput  # noqa: E402
+
+from library.config import TranslationConfig  # noqa: E402
+from library.hf_seamless_m4t import SeamlessTranslator  # noqa: E402
+
+
+class TextGenerationOutput(ModelOutput):
+    sequences: torch.Tensor = None
+
+
+def test_generate_batch_returns_sequences_of_generation_output():
+    translator = SeamlessTranslator(config=TranslationConfig(num_beams=1))
+    sequences = torch.tensor([[3, 4, 5], [6, 7, 1]])
+    translator.model = mock.Mock()
+    translator.model.generate.return_value = TextGenerationOutput(sequences=sequences)
+    encoded = mock.Mock()
+    encoded.to.return_value = {"input_ids": sequences}
+
+    generated = translator.generate_batch(encoded, "en", "ar")
+
+    assert torch.equal(generated, sequences)
+    kwargs = translator.model.generate.call_args.kwargs
+    assert kwargs["tgt_lang"] == "arb"
+    assert kwargs["generate_speech"] is False
+    assert "do_sample" not in kwargs
+
+
+def test_batch_translate_decodes_every_text_in_order():
+    translator = SeamlessTranslator(
+        config=TranslationConfig(num_beams=1, max_batch_tokens=4)
+    )
+    texts = ["one", "two words", "three more words"]
+    translator.count_tokens = lambda text: len(text.split())
+    translator.processor = mock.Mock(
+        side_effect=lambda text, **kwargs: mock.Mock(to=lambda device: {"text": text})
+    )
+    translator.model = mock.Mock()
+    translator.model.generate.side_effect = lambda text, **kwargs: (
+        TextGenerationOutput(sequences=mock.Mock(cpu=lambda: text))
+    )
+    translator.tokenizer = mock.Mock()
+    translator.tokenizer.batch_decode.side_effect = lambda texts, **kwargs: [
+        text.upper() for text in texts
+    ]
+
+    assert translator.batch_translate(texts, "en", "ar") == [
+        "ONE",
+        "TWO WORDS",
+        "THREE MORE WORDS",
+    ]
+    # Split by the token budget into more than one generate() call
+    assert translator.model.generate.call_count > 1
+
+
+def test_generate_batch_multi_runs_the_encoder_once():
+    translator = SeamlessTranslator(config=TranslationConfig(num_beams=1))
+    hidden_states = torch.zeros(2, 3, 4)
+    translator.model = mock.Mock()
+    translator.model.text_encoder.return_value = mock.Mock(
+        last_hidden_state=hidden_states
+    )
+    translator.model.generate.side_effect = lambda **kwargs: TextGenerationOutput(
+        sequences=torch.tensor([[len(kwargs["tgt_lang"])]])
+    )
+    encoded = mock.Mock()
+    encoded.to.return_value = {
+        "input_ids": torch.ones(2, 3, dtype=torch.long),
+        "attention_mask": torch.ones(2, 3, dtype=torch.long),
+    }
+
+    generated = translator.generate_batch_multi(encoded, "en", ["ar", "fr"])
+
+    assert list(generated) == ["ar", "fr"]
+    translator.model.text_encoder.assert_called_once()
+    calls = translator.model.generate.call_args_list
+    assert [call.kwargs["tgt_lang"] for call in calls] == ["arb", "fra"]
+    for call in calls:
+        assert call.kwargs["encoder_outputs"].last_hidden_state is hidden_states
+    # Each target gets its own wrapper, as generate() expands it in place
+    assert calls[0].kwargs["encoder_outputs"] is not calls[1].kwargs["encoder_outputs"]
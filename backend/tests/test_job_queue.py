@@ -0,0 +1,119 @@
+# test_job_queue.py
+import json
+import threading
+import time
+
+import pytest
+
+from library.job_queue import Job, JobQueue, JobState, QueueFullError
+
+
+def wait_until_finished(job: Job, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, f"job {job.id} still {job.state.value}"
+        time.sleep(0.01)
+
+
+def test_job_runs_and_leaves_no_spec_behind(tmp_path):
+    ran = []
+    jobs = JobQueue(ran.append, spool_dir=str(tmp_path))
+    jobs.start()
+    job = jobs.submit(Job(model="opus", params={"text": "hello"}))
+
+    wait_until_finished(job)
+    jobs.stop()
+
+    assert job.state == JobState.DONE
+    assert ran == [job]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_job_records_the_error(tmp_path):
+    def fail(job):
+        raise ValueError("bad subtitle file")
+
+    jobs = JobQueue(fail, spool_dir=str(tmp_path))
+    jobs.start()
+    job = jobs.submit(Job(model="opus", params={}))
+
+    wait_until_finished(job)
+    jobs.stop()
+
+    assert job.state == JobState.FAILED
+    assert job.error == "bad subtitle file"
+
+
+def test_full_queue_rejects_and_unspools_the_job(tmp_path):
+    release = threading.Event()
+    started = threading.Event()
+
+    def block(job):
+        started.set()
+        release.wait(5)
+
+    jobs = JobQueue(block, max_queued=1, spool_dir=str(tmp_path))
+    jobs.start()
+    running = jobs.submit(Job(model="opus", params={}))
+    assert started.wait(5)
+    queued = jobs.submit(Job(model="opus", params={}))
+
+    rejected = Job(model="opus", params={})
+    with pytest.raises(QueueFullError):
+        jobs.submit(rejected)
+    assert jobs.get(rejected.id) is None
+    assert not (tmp_path / f"{rejected.id}.job.json").exists()
+
+    release.set()
+    wait_until_finished(queued)
+    jobs.stop()
+    assert running.state == queued.state == JobState.DONE
+
+
+def test_recover_resubmits_spooled_jobs(tmp_path):
+    # Spec files of the jobs that were queued or running when the server stopped
+    spooled = [Job(model="opus", params={"file": name}) for name in ("a.srt", "b.srt")]
+    for job in spooled:
+        (tmp_path / f"{job.id}.job.json").write_text(json.dumps(job.to_spec()))
+
+    ran = []
+    jobs = JobQueue(ran.append, spool_dir=str(tmp_path))
+    jobs.start()
+    recovered = jobs.recover()
+    for job in recovered:
+        wait_until_finished(job)
+    jobs.stop()
+
+    assert {job.id for job in recovered} == {job.id for job in spooled}
+    assert sorted(job.params["file"] for job in ran) == ["a.srt", "b.srt"]
+    assert list(tmp_path.glob("*.job.json")) == []
+
+
+def test_stop_keeps_the_specs_of_unstarted_jobs(tmp_path):
+    release = threading.Event()
+    started = threading.Event()
+
+    def block(job):
+        started.set()
+        release.wait(5)
+
+    jobs = JobQueue(block, spool_dir=str(tmp_path))
+    jobs.start()
+    jobs.submit(Job(model="opus", params={}))
+    assert started.wait(5)
+    queued = jobs.submit(Job(model="opus", params={}))
+    # Let the running job finish only once stop() has dropped the queued one
+    threading.Timer(0.1, release.set).start()
+    jobs.stop()
+
+    assert queued.state == JobState.FAILED
+    assert (tmp_path / f"{queued.id}.job.json").exists()
+
+
+def test_recover_skips_unreadable_specs(tmp_path):
+    (tmp_path / "broken.job.json").write_text("{not json")
+    jobs = JobQueue(lambda job: None, spool_dir=str(tmp_path))
+    jobs.start()
+
+    assert jobs.recover() == []
+    jobs.stop()
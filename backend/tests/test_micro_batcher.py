@@ -0,0 +1,72 @@
+# test_micro_batcher.py
+import asyncio
+
+from fakes import FakeTranslator
+
+from library.config import MicroBatchConfig
+from library.micro_batcher import MicroBatcher
+
+
+def translate_concurrently(batcher, translator, requests):
+    async def run():
+        return await asyncio.gather(
+            *(batcher.translate(translator, texts) for texts in requests)
+        )
+
+    return asyncio.run(run())
+
+
+def test_concurrent_requests_share_a_batch():
+    translator = FakeTranslator()
+    batcher = MicroBatcher("en", "fr", MicroBatchConfig(max_wait_ms=50))
+
+    results = translate_concurrently(
+        batcher, translator, [["hello"], ["good night", "see you"]]
+    )
+
+    assert results == [["fr:HELLO"], ["fr:GOOD NIGHT", "fr:SEE YOU"]]
+    assert translator.batches == [["hello", "good night", "see you"]]
+
+
+def test_token_budget_starts_a_new_batch():
+    translator = FakeTranslator()
+    # Every text counts 3 tokens, so two fit the budget
+    config = MicroBatchConfig(max_wait_ms=50, max_batch_tokens=6)
+    batcher = MicroBatcher("en", "fr", config)
+
+    results = translate_concurrently(batcher, translator, [["a b", "c d", "e f"]])
+
+    assert results == [["fr:A B", "fr:C D", "fr:E F"]]
+    assert translator.batches == [["a b", "c d"], ["e f"]]
+
+
+def test_batch_size_caps_a_batch():
+    translator = FakeTranslator()
+    config = MicroBatchConfig(max_wait_ms=50, max_batch_size=2)
+    batcher = MicroBatcher("en", "fr", config)
+
+    translate_concurrently(batcher, translator, [["one", "two", "three"]])
+
+    assert translator.batches == [["one", "two"], ["three"]]
+
+
+def test_generation_error_fails_every_request_of_the_batch():
+    translator = FakeTranslator()
+
+    def fail(encoded, source_lang, target_lang):
+        raise RuntimeError("out of memory")
+
+    translator.generate_batch = fail
+    batcher = MicroBatcher("en", "fr", MicroBatchConfig(max_wait_ms=50))
+
+    async def run():
+        return await asyncio.gather(
+            batcher.translate(translator, ["hello"]),
+            batcher.translate(translator, ["bye"]),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert [str(result) for result in results] == ["out of memory"] * 2
@@ -0,0 +1,28 @@
+# test_model_cache.py
+from types import SimpleNamespace
+
+from library.model_cache import ModelCache
+
+
+def test_slots_are_sized_from_their_gguf_file_once(tmp_path):
+    gguf_path = tmp_path / "model.gguf"
+    gguf_path.write_bytes(b"\0" * 4096)
+    translator = SimpleNamespace(
+        slots=[SimpleNamespace(model_path=str(gguf_path)) for _ in range(3)]
+    )
+
+    # The slots share the memory-mapped weights
+    assert ModelCache._measure(translator, rss_before=0) == 4096
+
+
+def test_evicted_keys_drop_their_load_lock():
+    cache = ModelCache(max_bytes=-1)
+    cache.get_or_load("a", object)
+    cache.get_or_load("b", object)
+    # "a" was evicted to fit "b" (kept although over budget)
+    assert "a" not in cache._load_locks
+
+    cache.evict("b")
+    cache.get_or_load("c", object)
+    cache.clear()
+    assert cache._load_locks == {}
@@ -0,0 +1,59 @@
+# test_segmenter.py
+from fakes import FakeTranslator
+
+from library.segmenter import segment_text, split_sentences, translate_long_text
+
+
+def count_words(text: str) -> int:
+    # One token per word plus an end token, like FakeTranslator
+    return len(text.split()) + 1
+
+
+def test_split_sentences_on_latin_arabic_and_cjk_ends():
+    assert split_sentences("Hi. How are you? Fine! مرحبا؟ 你好。 再见") == [
+        "Hi.",
+        "How are you?",
+        "Fine!",
+        "مرحبا؟",
+        "你好。",
+        "再见",
+    ]
+
+
+def test_sentences_of_a_line_are_packed_while_they_fit():
+    segmentation = segment_text("One two. Three four. Five six.", count_words, 5)
+
+    assert segmentation.chunks == ["One two. Three four.", "Five six."]
+    assert segmentation.lines == [[0, 1]]
+
+
+def test_chunks_never_cross_line_breaks():
+    segmentation = segment_text("First line.\nSecond line.", count_words, 100)
+
+    assert segmentation.chunks == ["First line.", "Second line."]
+    assert segmentation.lines == [[0], [1]]
+
+
+def test_long_sentence_is_split_between_words():
+    sentence = " ".join(f"w{i}" for i in range(10))
+
+    segmentation = segment_text(sentence, count_words, 4)
+
+    assert all(count_words(chunk) <= 4 for chunk in segmentation.chunks)
+    assert " ".join(segmentation.chunks) == sentence
+
+
+def test_reassemble_puts_translations_back_on_their_lines():
+    segmentation = segment_text("A b. C d.\nE f.", count_words, 3)
+
+    assert segmentation.reassemble(["1 ", "2", " 3"]) == "1 2\n3"
+
+
+def test_translate_long_text_translates_every_chunk():
+    translator = FakeTranslator()
+    translator.max_input_tokens = lambda: 3
+    text = "One two. Three four.\nFive six."
+
+    translated = translate_long_text(translator, text, "en", "fr")
+
+    assert translated == "fr:ONE TWO. fr:THREE FOUR.\nfr:FIVE SIX."
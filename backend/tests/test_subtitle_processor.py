@@ -0,0 +1,114 @@
+# test_subtitle_processor.py
+import time
+
+from fakes import FakeTranslator, write_srt
+
+from library.subtitle_processor import (
+    IncrementalSubtitleWriter,
+    SubtitleProcessor,
+    Subtitle,
+)
+
+
+def read_texts(path) -> list:
+    return [
+        block.split("\n")[2]
+        for block in path.read_text(encoding="utf-8").strip().split("\n\n")
+    ]
+
+
+def wait_for_writes(writer: IncrementalSubtitleWriter, items: int) -> None:
+    deadline = time.monotonic() + 5
+    while writer.stats.items < items:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_repeated_lines_are_translated_once(tmp_path):
+    input_path = tmp_path / "episode.srt"
+    write_srt(input_path, ["Hello", "Bye", "Hello ", "hello", "Bye"])
+    translator = FakeTranslator()
+    processor = SubtitleProcessor(
+        translator, target_lang="fr", batch_size=8, batch_processing=True
+    )
+    output_path = tmp_path / "episode.fr.srt"
+
+    processor.process_file(str(input_path), str(output_path))
+
+    translated = sorted(text for batch in translator.batches for text in batch)
+    assert translated == ["Bye", "Hello", "hello"]
+    assert read_texts(output_path) == [
+        "fr:HELLO",
+        "fr:BYE",
+        "fr:HELLO",
+        "fr:HELLO",
+        "fr:BYE",
+    ]
+    assert processor.stats["cues_total"] == 5
+    assert processor.stats["unique_texts"] == 3
+
+
+def test_progress_counts_duplicates(tmp_path):
+    input_path = tmp_path / "episode.srt"
+    write_srt(input_path, ["Hello", "Hello", "Bye"])
+    progress = []
+    processor = SubtitleProcessor(
+        FakeTranslator(),
+        target_lang="fr",
+        batch_processing=True,
+        progress_callback=lambda done, total, cues: progress.append((done, total)),
+    )
+
+    processor.process_file(str(input_path), str(tmp_path / "episode.fr.srt"))
+
+    assert progress[-1] == (3, 3)
+
+
+def test_output_is_in_file_order_despite_length_sorting(tmp_path):
+    input_path = tmp_path / "episode.srt"
+    texts = ["a", "a b c d e f", "a b", "a b c d", "a b c"]
+    write_srt(input_path, texts)
+    translator = FakeTranslator()
+    # One cue per batch, translated longest first
+    processor = SubtitleProcessor(
+        translator, target_lang="fr", batch_size=1, batch_processing=True
+    )
+    output_path = tmp_path / "episode.fr.srt"
+
+    processor.process_file(str(input_path), str(output_path))
+
+    assert translator.batches[0] == ["a b c d e f"]
+    assert read_texts(output_path) == [f"fr:{text.upper()}" for text in texts]
+
+
+def test_writer_waits_for_earlier_cues(tmp_path):
+    subtitles = [
+        Subtitle(i + 1, "00:00:01,000 --> 00:00:02,000", f"cue {i}") for i in range(3)
+    ]
+    output_path = tmp_path / "out.srt"
+    writer = IncrementalSubtitleWriter(subtitles, str(output_path))
+
+    writer.mark_done([subtitles[2], subtitles[1]])
+    wait_for_writes(writer, 2)
+    part_path = tmp_path / "out.srt.part"
+    # The first cue is not translated yet
+    assert part_path.read_text(encoding="utf-8") == ""
+
+    writer.mark_done([subtitles[0]])
+    wait_for_writes(writer, 3)
+    assert read_texts(part_path) == ["cue 0", "cue 1", "cue 2"]
+
+    writer.close()
+    assert not part_path.exists()
+    assert read_texts(output_path) == ["cue 0", "cue 1", "cue 2"]
+
+
+def test_aborted_writer_leaves_no_output(tmp_path):
+    subtitles = [Subtitle(1, "00:00:01,000 --> 00:00:02,000", "cue")]
+    output_path = tmp_path / "out.srt"
+    writer = IncrementalSubtitleWriter(subtitles, str(output_path))
+    writer.mark_done(subtitles)
+
+    writer.abort()
+
+    assert list(tmp_path.iterdir()) == []
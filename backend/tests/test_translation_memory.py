@@ -0,0 +1,75 @@
+# test_translation_memory.py
+from fakes import FakeTranslator
+
+from library.config import TranslationConfig
+from library.translation_memory import TranslationMemory
+
+
+def remember(memory, settings, texts, translations):
+    memory.put_many("fake/model", settings, "en", "fr", texts, translations)
+
+
+def recall(memory, settings, texts):
+    return memory.get_many("fake/model", settings, "en", "fr", texts)
+
+
+def test_hits_ignore_whitespace_differences(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite3"))
+    settings = TranslationMemory.settings_fingerprint(TranslationConfig())
+    remember(memory, settings, ["Hello  there"], ["Salut"])
+
+    assert recall(memory, settings, [" Hello there\n", "Bye"]) == ["Salut", None]
+    assert memory.stats()["hits"] == 1
+    assert memory.stats()["misses"] == 1
+
+
+def test_fingerprint_ignores_batching_but_not_decoding_settings():
+    fingerprint = TranslationMemory.settings_fingerprint
+    base = TranslationConfig()
+
+    assert fingerprint(base) == fingerprint(TranslationConfig(batch_size=64))
+    assert fingerprint(base) != fingerprint(TranslationConfig(num_beams=1))
+    assert fingerprint(base) != fingerprint(TranslationConfig(backend="ctranslate2"))
+    assert fingerprint(base, "fp32") != fingerprint(base, "bf16")
+
+
+def test_sampled_translators_are_not_remembered():
+    translator = FakeTranslator()
+    assert TranslationMemory.translator_settings(translator) is not None
+
+    translator.deterministic = False
+    assert TranslationMemory.translator_settings(translator) is None
+
+
+def test_entries_persist_across_connections(tmp_path):
+    path = str(tmp_path / "tm.sqlite3")
+    remember(TranslationMemory(path), "s1", ["Hello"], ["Bonjour"])
+
+    memory = TranslationMemory(path)
+    assert recall(memory, "s1", ["Hello"]) == ["Bonjour"]
+    assert memory.stats()["entries"] == 1
+
+
+def test_invalidate_keeps_current_settings(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite3"))
+    remember(memory, "old", ["Hello"], ["Bonjour"])
+    remember(memory, "new", ["Hello"], ["Salut"])
+
+    assert memory.invalidate("fake/model", keep_settings=["new"]) == 1
+    assert recall(memory, "old", ["Hello"]) == [None]
+    assert recall(memory, "new", ["Hello"]) == ["Salut"]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite3"), max_entries=10)
+    texts = [f"line {i}" for i in range(10)]
+    remember(memory, "s", texts, texts)
+    # Touch the first line so it is no longer among the oldest
+    recall(memory, "s", ["line 0"])
+
+    remember(memory, "s", ["line 10"], ["line 10"])
+
+    # Eviction leaves 10% headroom
+    assert memory.stats()["entries"] == 9
+    assert recall(memory, "s", ["line 0", "line 10"]) == ["line 0", "line 10"]
+    assert recall(memory, "s", texts[1:]).count(None) == 2
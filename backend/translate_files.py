@@ -0,0 +1,294 @@
+# translate_files.py
+"""
+Translate every .srt file of a directory (or glob) offline, e.g. a whole season:
+
+    python translate_files.py "Show/Season 1" --model opus --source-lang en --target-lang fr --workers 2
+
+Each worker process loads the model once and translates whole files; files are
+handed out largest first so one long episode does not end up last. Files whose
+output is newer than the input are skipped, so re-runs only redo what changed,
+and earlier outputs (<name>.<lang>.srt next to <name>.srt) are never taken as inputs.
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import re
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from library.config import TranslationConfig
+from library.log_utils import configure_logging
+from library.subtitle_processor import SubtitleProcessor
+from library.translation_memory import TranslationMemory
+from library.translator_registry import (
+    AIModel,
+    Backend,
+    check_backend,
+    create_translator,
+    resolve_model_name,
+)
+
+# Language code suffix of translated files, as in "ep1.fr.srt" or "ep1.pt-BR.srt"
+_LANG_SUFFIX = re.compile(r"[a-z]{2,3}([-_][A-Za-z0-9]{2,8})?")
+
+# Set in each worker process by _init_worker
+_translator = None
+_init_error: Optional[str] = None
+_translation_memory: Optional[TranslationMemory] = None
+_source_lang = ""
+_target_lang = ""
+
+
+def find_subtitle_files(path: str, recursive: bool = False) -> Tuple[str, List[str]]:
+    """
+    Return the base directory outputs are laid out relative to, and the .srt
+    files of a directory or glob pattern.
+    """
+    if os.path.isdir(path):
+        pattern = (
+            os.path.join(path, "**", "*.srt")
+            if recursive
+            else os.path.join(path, "*.srt")
+        )
+        return path, sorted(glob.glob(pattern, recursive=recursive))
+    files = [f for f in glob.glob(path, recursive=True) if f.lower().endswith(".srt")]
+    return "", sorted(files)
+
+
+def is_translation_output(path: str) -> bool:
+    """Whether path is a <name>.<lang>.srt written next to an existing <name>.srt."""
+    stem, extension = os.path.splitext(path)
+    source_stem, dot, lang = stem.rpartition(".")
+    return bool(
+        dot and _LANG_SUFFIX.fullmatch(lang) and os.path.exists(source_stem + extension)
+    )
+
+
+def output_path_for(
+    input_path: str, base_dir: str, output_dir: Optional[str], target_lang: str
+) -> str:
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    filename = f"{stem}.{target_lang}.srt"
+    if output_dir is None:
+        return os.path.join(os.path.dirname(input_path), filename)
+    if base_dir:
+        relative_dir = os.path.dirname(os.path.relpath(input_path, base_dir))
+        return os.path.join(output_dir, relative_dir, filename)
+    return os.path.join(output_dir, filename)
+
+
+def is_up_to_date(input_path: str, output_path: str) -> bool:
+    return os.path.exists(output_path) and os.path.getmtime(
+        output_path
+    ) >= os.path.getmtime(input_path)
+
+
+def _init_worker(
+    model: AIModel,
+    config: TranslationConfig,
+    source_lang: str,
+    target_lang: str,
+    threads: Optional[int],
+    translation_memory_path: Optional[str],
+) -> None:
+    """
+    Load the model once per worker process. A failure is reported by
+    _translate_file, as raising here would make the pool respawn the worker and
+    retry the load forever.
+    """
+    global _translator, _translation_memory, _source_lang, _target_lang, _init_error
+    configure_logging()
+    _source_lang = source_lang
+    _target_lang = target_lang
+    try:
+        if threads:
+            # Keep workers from oversubscribing the CPU cores between them
+            import torch
+
+            torch.set_num_threads(threads)
+        model_name = resolve_model_name(source_lang, target_lang, model)
+        _translator = create_translator(model, model_name, config)
+        if translation_memory_path:
+            _translation_memory = TranslationMemory(translation_memory_path)
+    except Exception as e:
+        _init_error = f"{type(e).__name__}: {e}"
+
+
+def _translate_file(paths: Tuple[str, str]) -> dict:
+    input_path, output_path = paths
+    if _init_error is not None:
+        return {"input_path": input_path, "error": _init_error, "init_failed": True}
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    start = time.perf_counter()
+    try:
+        processor = SubtitleProcessor(
+            translator=_translator,
+            source_lang=_source_lang,
+            target_lang=_target_lang,
+            batch_size=64,
+            batch_processing=True,
+            translation_memory=_translation_memory,
+            # Journals of failed files end up next to their output for the re-run
+            checkpoint_dir=os.path.dirname(output_path) or ".",
+        )
+        processor.process_file(input_path=input_path, output_path=output_path)
+    except Exception as e:
+        return {"input_path": input_path, "error": str(e)}
+    return {
+        "input_path": input_path,
+        "output_path": output_path,
+        "cues": processor.stats.get("cues_total", 0),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def translate_files(
+    files: List[Tuple[str, str]],
+    model: AIModel,
+    source_lang: str,
+    target_lang: str,
+    workers: int = 1,
+    threads_per_worker: Optional[int] = None,
+    translation_memory_path: Optional[str] = None,
+    config: Optional[TranslationConfig] = None,
+) -> List[dict]:
+    """
+    Translate (input_path, output_path) pairs across a pool of worker processes.
+
+    Raises:
+        RuntimeError: If a worker could not load the model
+    """
+    # Largest first, so the long tail of the run is made of short files
+    files = sorted(files, key=lambda pair: os.path.getsize(pair[0]), reverse=True)
+    # spawn gives every worker a clean interpreter, which CUDA requires
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with context.Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(
+            model,
+            config or TranslationConfig(),
+            source_lang,
+            target_lang,
+            threads_per_worker,
+            translation_memory_path,
+        ),
+    ) as pool:
+        for result in pool.imap_unordered(_translate_file, files, chunksize=1):
+            if result.get("init_failed"):
+                raise RuntimeError(f"Could not load {model.value}: {result['error']}")
+            if "error" in result:
+                print(f"Failed {result['input_path']}: {result['error']}")
+            else:
+                print(
+                    f"Translated {result['input_path']}: {result['cues']} cues "
+                    f"in {result['seconds']:.1f}s"
+                )
+            results.append(result)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Translate a directory or glob of .srt files"
+    )
+    parser.add_argument("path", help="Directory of .srt files or a glob pattern")
+    parser.add_argument(
+        "--model", type=AIModel, choices=list(AIModel), default=AIModel.OPUS
+    )
+    parser.add_argument(
+        "--backend", type=Backend, choices=list(Backend), default=Backend.TRANSFORMERS
+    )
+    parser.add_argument(
+        "--precision",
+        default="auto",
+        help="auto, fp32, bf16, fp16 or int8 (default: auto)",
+    )
+    parser.add_argument("--source-lang", default="en")
+    parser.add_argument("--target-lang", default="ar")
+    parser.add_argument(
+        "--output-dir",
+        help="Where translated files go (default: next to each input file)",
+    )
+    parser.add_argument(
+        "--recursive", action="store_true", help="Include subdirectories"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Worker processes, one model each"
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        help="Torch threads per worker (default: CPU cores / workers)",
+    )
+    parser.add_argument(
+        "--translation-memory",
+        help="SQLite translation memory shared by the workers (default: none)",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Translate files that are up to date"
+    )
+    args = parser.parse_args(argv)
+    configure_logging()
+    try:
+        check_backend(args.model, args.backend)
+    except ValueError as e:
+        parser.error(str(e))
+
+    base_dir, inputs = find_subtitle_files(args.path, args.recursive)
+    # Outputs of earlier runs, into any language, must not be picked up as inputs
+    inputs = [path for path in inputs if not is_translation_output(path)]
+
+    files, skipped = [], 0
+    for input_path in inputs:
+        output_path = output_path_for(
+            input_path, base_dir, args.output_dir, args.target_lang
+        )
+        if not args.force and is_up_to_date(input_path, output_path):
+            skipped += 1
+            continue
+        files.append((input_path, output_path))
+
+    print(f"Found {len(inputs)} subtitle files, {skipped} already up to date")
+    if not files:
+        return 0
+
+    workers = max(1, min(args.workers, len(files)))
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    start = time.perf_counter()
+    try:
+        results = translate_files(
+            files,
+            args.model,
+            args.source_lang,
+            args.target_lang,
+            workers=workers,
+            threads_per_worker=threads,
+            translation_memory_path=args.translation_memory,
+            config=TranslationConfig(
+                precision=args.precision, backend=args.backend.value
+            ),
+        )
+    except RuntimeError as e:
+        print(e)
+        return 1
+    wall_seconds = time.perf_counter() - start
+
+    translated = [result for result in results if "error" not in result]
+    failed = len(results) - len(translated)
+    cues = sum(result["cues"] for result in translated)
+    print(
+        f"Translated {len(translated)} files ({cues} cues) in {wall_seconds:.1f}s "
+        f"with {workers} workers: {cues / wall_seconds:.1f} cues/s, "
+        f"{len(translated) / wall_seconds * 60:.1f} files/min; "
+        f"{skipped} skipped, {failed} failed"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
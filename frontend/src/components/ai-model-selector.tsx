@@ -37,6 +37,7 @@ export function AIModelSelector({
           <SelectItem value="seamless">SEAMLESS</SelectItem>
           <SelectItem value="darija">Moroccan Darija</SelectItem>
           <SelectItem value="faseeh">Faseeh</SelectItem>
+          <SelectItem value="madlad_gguf">MADLAD (GGUF)</SelectItem>
         </SelectContent>
       </Select>
     </div>
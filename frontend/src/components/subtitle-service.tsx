@@ -16,6 +16,8 @@ import {
   translateSubtitle,
   downloadSubtitle,
   fetchTranslatedSubtitles,
+  subscribeToJobEvents,
+  TranslatedCue,
 } from "@/services/api";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { languages } from "@/types/languages";
@@ -47,8 +49,18 @@ export function SubtitleServiceComponent({
   const [isDragging, setIsDragging] = useState(false);
   const [showTranslationSection, setShowTranslationSection] = useState(false);
   const translationSectionRef = useRef<HTMLDivElement>(null);
+  // Closes the event stream (or polling) of the job being followed
+  const unsubscribeRef = useRef<(() => void) | null>(null);
   const { toast } = useToast();
 
+  const stopFollowingJob = useCallback(() => {
+    unsubscribeRef.current?.();
+    unsubscribeRef.current = null;
+  }, []);
+
+  // Stop following the job when the component unmounts
+  useEffect(() => stopFollowingJob, [stopFollowingJob]);
+
   useEffect(() => {
     localStorage.setItem("sourceLanguage", sourceLanguage);
   }, [sourceLanguage]);
@@ -67,6 +79,7 @@ export function SubtitleServiceComponent({
   }, [showTranslationSection]);
 
   const clearAll = () => {
+    stopFollowingJob();
     setInputSubtitles("");
     setTranslatedSubtitles("");
     setOutputFileName("");
@@ -75,6 +88,7 @@ export function SubtitleServiceComponent({
   };
 
   const clearTranslation = () => {
+    stopFollowingJob();
     setTranslatedSubtitles("");
     setOutputFileName("");
   };
@@ -139,37 +153,53 @@ export function SubtitleServiceComponent({
   const handleTranslate = async () => {
     if (!uniqueFilename || !targetLanguage) return;
 
+    stopFollowingJob();
     setIsProcessing(true);
     try {
       const result = await translateSubtitle(
         uniqueFilename,
         sourceLanguage,
         targetLanguage,
-        selectedModel,
-        2
+        selectedModel
       );
       setOutputFileName(result.download_filename);
 
-      // Poll to check if translation is complete
-      const intervalId = setInterval(async () => {
-        try {
-          const translatedContent = await fetchTranslatedSubtitles(
-            result.download_filename
+      // Stream progress and translated cues until the job is finished
+      const translatedCues = new Map<number, TranslatedCue>();
+      unsubscribeRef.current = subscribeToJobEvents(result.job_id, {
+        onProgress: (progress) => {
+          progress.cues?.forEach((cue) => translatedCues.set(cue.index, cue));
+          setTranslatedSubtitles(
+            Array.from(translatedCues.values())
+              .sort((a, b) => a.index - b.index)
+              .map((cue) => `${cue.index}\n${cue.timestamp}\n${cue.text}\n`)
+              .join("\n")
           );
-          if (translatedContent) {
+        },
+        onStateChange: async (job) => {
+          if (job.state === "done") {
+            const translatedContent = await fetchTranslatedSubtitles(
+              job.download_filename
+            );
             setTranslatedSubtitles(translatedContent);
             toast({
               title: "Translation complete",
               description: "Subtitles have been translated successfully.",
             });
-            clearInterval(intervalId); // Stop polling once translation is complete
+          } else if (job.state === "failed") {
+            toast({
+              title: "Translation failed",
+              description:
+                job.error ||
+                "An error occurred while translating the subtitles.",
+              variant: "destructive",
+            });
           }
-        } catch (pollError) {
-          // Translation is still processing, continue polling
-          console.log("Polling for translation...");
-          console.error(pollError);
-        }
-      }, 6000); // Poll every 6 seconds
+        },
+        onError: (streamError) => {
+          console.error(streamError);
+        },
+      });
     } catch (error) {
       toast({
         title: "Translation failed",
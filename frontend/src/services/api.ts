@@ -55,7 +55,7 @@ export const translateSubtitle = async (
   sourceLang: string,
   targetLang: string,
   model: AIModel,
-  batchSize: number = 2
+  batchSize: number = 64
 ) => {
   const response = await axios.post(
     `${API_BASE_URL}/translate-subtitle`,
@@ -73,6 +73,89 @@ export const translateSubtitle = async (
   return response.data;
 };
 
+export interface TranslationJob {
+  job_id: string;
+  model: AIModel;
+  state: "queued" | "running" | "done" | "failed";
+  cues_done: number;
+  cues_total: number;
+  cues_per_second: number;
+  error: string | null;
+  download_filename: string;
+}
+
+export const fetchJobStatus = async (jobId: string) => {
+  const response = await axios.get<TranslationJob>(
+    `${API_BASE_URL}/jobs/${jobId}`
+  );
+  return response.data;
+};
+
+export interface TranslatedCue {
+  index: number;
+  timestamp: string;
+  text: string;
+}
+
+export interface JobProgressEvent {
+  cues_done: number;
+  cues_total: number;
+  cues_per_second: number;
+  cues?: TranslatedCue[];
+}
+
+const JOB_POLL_INTERVAL_MS = 2000;
+
+export const subscribeToJobEvents = (
+  jobId: string,
+  handlers: {
+    onProgress: (progress: JobProgressEvent) => void;
+    onStateChange: (job: TranslationJob) => void;
+    onError: (error: Event) => void;
+  }
+) => {
+  const source = new EventSource(
+    `${API_BASE_URL}/jobs/${jobId}/events?include_cues=true`
+  );
+  source.addEventListener("progress", (event) => {
+    handlers.onProgress(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener("state", (event) => {
+    const job: TranslationJob = JSON.parse((event as MessageEvent).data);
+    if (job.state === "done" || job.state === "failed") {
+      source.close();
+    }
+    handlers.onStateChange(job);
+  });
+  let pollTimer: ReturnType<typeof setInterval> | undefined;
+  const stopPolling = () => clearInterval(pollTimer);
+  source.onerror = (error) => {
+    // EventSource reconnects by itself after a dropped connection and the server
+    // replays the job state. Only once it gives up, fall back to polling.
+    if (source.readyState !== EventSource.CLOSED) return;
+    handlers.onError(error);
+    pollTimer = setInterval(async () => {
+      try {
+        const job = await fetchJobStatus(jobId);
+        if (job.state === "done" || job.state === "failed") {
+          stopPolling();
+          handlers.onStateChange(job);
+        }
+      } catch (pollError) {
+        console.error("Job status error:", pollError);
+        // The job is gone (e.g. not recovered after a restart)
+        if (axios.isAxiosError(pollError) && pollError.response?.status === 404) {
+          stopPolling();
+        }
+      }
+    }, JOB_POLL_INTERVAL_MS);
+  };
+  return () => {
+    source.close();
+    stopPolling();
+  };
+};
+
 export const downloadSubtitle = async (fileName: string) => {
   const response = await axios.get(
     `${API_BASE_URL}/download-subtitle/${fileName}`,
@@ -6,4 +6,5 @@ export type AIModel =
   | "madlad"
   | "seamless"
   | "darija"
-  | "faseeh";
+  | "faseeh"
+  | "madlad_gguf";